@@ -0,0 +1,387 @@
+"""Summarize groups of close approaches with vectorized reductions over their columns.
+
+The `aggregate` function groups the rows of a `columns.ColumnStore` by some
+keys - the NEO, the year, the month or the hazardous flag of each approach - and
+computes metrics such as the number of approaches, the minimum distance or the
+mean velocity of each group.
+
+The groups are found by sorting: the key columns are stacked and made unique
+with `np.unique`, which assigns each row the number of its group. The rows are
+then sorted by group, so that every metric is a single `reduceat` over the
+contiguous rows of each group.
+
+Metrics are named `count` or `<statistic>_<column>`, such as `min_distance`, for
+each of the `STATISTICS` and `METRIC_COLUMNS`. Missing values (NaN), like
+unknown diameters, are ignored by every statistic; a group without any known
+value gets a NaN.
+
+The `time_clusters` function sweeps a sorted array of times with a sliding
+window to find the bursts of approaches that fall close together in time.
+
+The `neo_summaries` function computes a fixed summary of the approaches of every
+NEO at once - their number, the first and last approach, the closest approach
+and the maximum velocity - from the approaches grouped by NEO.
+
+The `time_series` function counts the approaches per day, week or month from
+the cumulative per-day counts of an `indexes.DayCounts`, without looking at
+the approaches themselves.
+
+The `histogram2d` function counts pairs of values, such as the distance and
+velocity of each approach, in a grid of bins with linear or logarithmic edges
+computed by `bin_edges`.
+"""
+import numpy as np
+
+from columns import approach_years
+
+
+# The keys by which close approaches can be grouped.
+GROUP_KEYS = ("neo", "year", "month", "hazardous")
+
+# The columns and statistics that metrics can combine.
+METRIC_COLUMNS = ("distance", "velocity", "diameter")
+STATISTICS = ("min", "max", "mean")
+
+DEFAULT_METRICS = ("count", "min_distance", "max_velocity")
+
+# The periods of time by which a time series counts close approaches.
+TIME_SERIES_INTERVALS = ("day", "week", "month")
+
+# The fields of the rows of a time series.
+TIME_SERIES_FIELDNAMES = ("period", "approaches", "hazardous", "diameter_known")
+
+# The fields of the rows describing the bins of a 2-D histogram.
+HISTOGRAM_FIELDNAMES = ("distance_low", "distance_high", "velocity_low", "velocity_high", "count")
+
+
+def parse_metric(metric):
+    """Split the name of a metric into a statistic and a column.
+
+    :param metric: The name of a metric, such as "count" or "min_distance".
+    :return: A `(statistic, column)` tuple, where `column` is None for "count".
+    :raises ValueError: If the metric is unknown.
+    """
+    if metric == "count":
+        return "count", None
+    statistic, _, column = metric.partition("_")
+    if statistic not in STATISTICS or column not in METRIC_COLUMNS:
+        raise ValueError(f"Unknown metric: {metric!r}.")
+    return statistic, column
+
+
+def group_key_column(columns, key):
+    """Compute the values of a group key for every row of a `ColumnStore`.
+
+    Months are numbered from January 1970, so that they sort chronologically.
+
+    :param columns: A `ColumnStore` of close approaches.
+    :param key: One of the `GROUP_KEYS`.
+    :return: A NumPy array of int64 key values, aligned with the rows.
+    :raises ValueError: If the key is unknown.
+    """
+    if key == "neo":
+        return columns["neo_index"].astype(np.int64)
+    if key == "year":
+        return approach_years(columns)
+    if key == "month":
+        return columns["time"].astype("datetime64[m]").astype("datetime64[M]").astype(np.int64)
+    if key == "hazardous":
+        return columns["hazardous"].astype(np.int64)
+    raise ValueError(f"Unknown group key: {key!r}.")
+
+
+def aggregate(columns, group_by=(), metrics=DEFAULT_METRICS):
+    """Group the rows of a `ColumnStore` and compute metrics for each group.
+
+    Without any group key, all rows form a single group (if there is any row).
+    The groups are sorted by their keys.
+
+    :param columns: A `ColumnStore` of close approaches.
+    :param group_by: A sequence of `GROUP_KEYS`.
+    :param metrics: A sequence of metric names.
+    :return: A tuple of the number of groups, a dictionary mapping each group
+             key to a NumPy array of its values, and a dictionary mapping each
+             metric to a NumPy array of its values, both aligned with the groups.
+    """
+    parsed = [parse_metric(metric) for metric in metrics]
+    n = len(columns)
+    if group_by:
+        stacked = np.column_stack([group_key_column(columns, key) for key in group_by])
+        unique, inverse = np.unique(stacked, axis=0, return_inverse=True)
+        inverse = inverse.reshape(-1)
+    else:
+        unique = np.zeros((min(n, 1), 0), dtype=np.int64)
+        inverse = np.zeros(n, dtype=np.int64)
+    keys = {key: unique[:, i] for i, key in enumerate(group_by)}
+
+    order = np.argsort(inverse, kind="stable")
+    starts = np.flatnonzero(np.diff(inverse[order], prepend=-1))
+    counts = np.diff(np.append(starts, n))
+
+    values = {}
+    for metric, (statistic, column) in zip(metrics, parsed):
+        if statistic == "count":
+            values[metric] = counts
+            continue
+        column_values = np.asarray(columns[column], dtype=np.float64)[order]
+        if not n:
+            values[metric] = column_values
+        elif statistic == "min":
+            values[metric] = np.fmin.reduceat(column_values, starts)
+        elif statistic == "max":
+            values[metric] = np.fmax.reduceat(column_values, starts)
+        else:
+            known = ~np.isnan(column_values)
+            totals = np.add.reduceat(np.where(known, column_values, 0.0), starts)
+            n_known = np.add.reduceat(known, starts)
+            with np.errstate(invalid="ignore", divide="ignore"):
+                values[metric] = np.where(n_known > 0, totals / n_known, np.nan)
+    return len(unique), keys, values
+
+
+def aggregate_fieldnames(group_by=(), metrics=DEFAULT_METRICS):
+    """Return the names of the fields of the rows produced by `aggregate_rows`.
+
+    :param group_by: A sequence of `GROUP_KEYS`.
+    :param metrics: A sequence of metric names.
+    :return: A list of field names, keys first.
+    """
+    fieldnames = []
+    for key in group_by:
+        fieldnames.extend(("designation", "name") if key == "neo" else (key,))
+    return fieldnames + list(metrics)
+
+
+def aggregate_rows(columns, neos, group_by=(), metrics=DEFAULT_METRICS):
+    """Group the rows of a `ColumnStore` and describe each group as a dictionary.
+
+    A group by NEO is described by the designation and name of the NEO (or
+    None for approaches without a known NEO), a month by a "YYYY-MM" string, and
+    a missing metric value by None, so that the rows can be written to CSV or
+    JSON as they are.
+
+    :param columns: A `ColumnStore` of close approaches.
+    :param neos: The sequence of `NearEarthObject`s indexed by the `neo_index` column.
+    :param group_by: A sequence of `GROUP_KEYS`.
+    :param metrics: A sequence of metric names.
+    :return: A list of dictionaries, one per group, mapping keys and metrics to values.
+    """
+    n_groups, keys, values = aggregate(columns, group_by, metrics)
+    rows = []
+    for group in range(n_groups):
+        row = {}
+        for key, key_values in keys.items():
+            value = int(key_values[group])
+            if key == "neo":
+                neo = neos[value] if value >= 0 else None
+                row["designation"] = neo.designation if neo else None
+                row["name"] = neo.name if neo else None
+            elif key == "month":
+                row["month"] = str(np.datetime64(value, "M"))
+            elif key == "hazardous":
+                row["hazardous"] = bool(value)
+            else:
+                row[key] = value
+        for metric, metric_values in values.items():
+            value = metric_values[group].item()
+            row[metric] = None if value != value else value
+        rows.append(row)
+    return rows
+
+
+def neo_summaries(columns, by_neo, approach_offsets):
+    """Summarize the close approaches of every NEO.
+
+    The times of an NEO without approaches are 0, and its distance and velocity
+    are NaN.
+
+    :param columns: A `ColumnStore` of close approaches.
+    :param by_neo: A NumPy array of approach indices ordered by NEO and then by time.
+    :param approach_offsets: A NumPy array delimiting each NEO's slice of `by_neo`.
+    :return: A dictionary of NumPy arrays aligned with the NEOs: `count`,
+        `first_time`, `last_time`, `min_distance`, `min_distance_time` and
+        `max_velocity`, with times in minutes since the epoch.
+    """
+    counts = np.diff(approach_offsets)
+    n_neos = len(counts)
+    summaries = {
+        "count": counts,
+        "first_time": np.zeros(n_neos, dtype=np.int64),
+        "last_time": np.zeros(n_neos, dtype=np.int64),
+        "min_distance": np.full(n_neos, np.nan),
+        "min_distance_time": np.zeros(n_neos, dtype=np.int64),
+        "max_velocity": np.full(n_neos, np.nan),
+    }
+    present = np.flatnonzero(counts)
+    if not len(present):
+        return summaries
+    starts = approach_offsets[present]
+    times = np.asarray(columns["time"])[by_neo]
+    distances = np.asarray(columns["distance"])[by_neo]
+    summaries["first_time"][present] = times[starts]
+    summaries["last_time"][present] = times[approach_offsets[present + 1] - 1]
+    min_distance = np.minimum.reduceat(distances, starts)
+    summaries["min_distance"][present] = min_distance
+    summaries["max_velocity"][present] = np.maximum.reduceat(
+        np.asarray(columns["velocity"])[by_neo], starts
+    )
+    # The first (earliest) approach of each NEO at its minimum distance.
+    positions = np.flatnonzero(distances == np.repeat(min_distance, counts[present]))
+    groups = np.searchsorted(starts, positions, side="right") - 1
+    _, first = np.unique(groups, return_index=True)
+    summaries["min_distance_time"][present] = times[positions[first]]
+    return summaries
+
+
+def time_clusters(times, window, min_size):
+    """Find the clusters of times that fall within a sliding window of each other.
+
+    A window of length `window` starting at each time is dense if it holds at
+    least `min_size` times, and overlapping dense windows are merged. The end of
+    every window is found by bisection, so this takes O(n log n) time.
+
+    :param times: A sorted NumPy array of times.
+    :param window: The length of the window, in the units of `times`.
+    :param min_size: The minimum number of times in a dense window.
+    :return: A list of `(start, stop)` index ranges into `times`, one per cluster.
+    """
+    ends = np.searchsorted(times, times + window, side="right")
+    dense = np.flatnonzero(ends - np.arange(len(times)) >= min_size)
+    if not len(dense):
+        return []
+    # A dense window starts a new cluster if it begins after the previous one ends.
+    firsts = np.flatnonzero(np.append(True, dense[1:] >= ends[dense[:-1]]))
+    lasts = np.append(firsts[1:], len(dense)) - 1
+    return list(zip(dense[firsts].tolist(), ends[dense[lasts]].tolist()))
+
+
+def period_starts(first, last, interval):
+    """Return the first day of each period of time from day `first` to day `last`.
+
+    Weeks start on Mondays and months on their first day, except that the first
+    period starts on day `first`.
+
+    :param first: The first day, in days since the epoch.
+    :param last: The last day, in days since the epoch.
+    :param interval: One of the `TIME_SERIES_INTERVALS`.
+    :return: A NumPy array of days since the epoch.
+    :raises ValueError: If the interval is unknown.
+    """
+    if interval == "day":
+        return np.arange(first, last + 1, dtype=np.int64)
+    if interval == "week":
+        # The epoch was a Thursday.
+        starts = np.arange(first - (first + 3) % 7, last + 1, 7, dtype=np.int64)
+    elif interval == "month":
+        months = np.arange(
+            np.datetime64(first, "D").astype("datetime64[M]"),
+            np.datetime64(last, "D").astype("datetime64[M]") + 1,
+        )
+        starts = months.astype("datetime64[D]").astype(np.int64)
+    else:
+        raise ValueError(f"Unknown interval: {interval!r}.")
+    starts[0] = first
+    return starts
+
+
+def time_series(day_counts, first, last, interval="day"):
+    """Count the close approaches in each period of time from day `first` to day `last`.
+
+    Each row counts every approach, those of potentially hazardous NEOs and
+    those of NEOs with a known diameter, as differences of the cumulative
+    counts. A period is named by its first day as "YYYY-MM-DD", or by its month
+    as "YYYY-MM".
+
+    :param day_counts: An `indexes.DayCounts` of the close approaches.
+    :param first: The first day, in days since the epoch.
+    :param last: The last day, in days since the epoch.
+    :param interval: One of the `TIME_SERIES_INTERVALS`.
+    :return: A list of dictionaries, one per period, mapping the `TIME_SERIES_FIELDNAMES` to values.
+    """
+    if first > last:
+        return []
+    starts = period_starts(first, last, interval)
+    edges = np.append(starts, last + 1)
+    counts = {
+        "approaches": day_counts.counts(edges, "total"),
+        "hazardous": day_counts.counts(edges, "hazardous"),
+        "diameter_known": day_counts.counts(edges, "diameter_known"),
+    }
+    unit = "M" if interval == "month" else "D"
+    periods = starts.astype("datetime64[D]").astype(f"datetime64[{unit}]").astype(str)
+    return [
+        {"period": period, **{field: int(values[i]) for field, values in counts.items()}}
+        for i, period in enumerate(periods.tolist())
+    ]
+
+
+def bin_edges(values, bins, value_range=None, log=False):
+    """Compute the edges of equal bins spanning some values.
+
+    On a logarithmic scale, the bins have equal ratios instead of equal widths,
+    and only positive values are spanned.
+
+    :param values: A NumPy array of values, used if `value_range` is None.
+    :param bins: The number of bins.
+    :param value_range: A `(low, high)` tuple of the ends of the bins, or None to
+        span the known values.
+    :param log: Whether the bins are on a logarithmic scale.
+    :return: A NumPy array of `bins + 1` increasing edges.
+    :raises ValueError: If the range is empty, or not positive on a logarithmic scale.
+    """
+    if value_range is None:
+        values = values[~np.isnan(values) & ((values > 0) if log else True)]
+        if len(values):
+            low, high = float(values.min()), float(values.max())
+        else:
+            low, high = (1.0, 10.0) if log else (0.0, 1.0)
+        if low == high:
+            high = low * 10 if log else low + 1
+    else:
+        low, high = value_range
+    if not low < high or (log and low <= 0):
+        raise ValueError(f"Invalid range of bins: {low} to {high}.")
+    return np.geomspace(low, high, bins + 1) if log else np.linspace(low, high, bins + 1)
+
+
+def histogram2d(x, y, x_edges, y_edges):
+    """Count the pairs of values in each bin of a 2-D grid.
+
+    As with `np.histogram2d`, each bin includes its low edge, the last bins
+    also include their high edge, and values outside the edges or missing (NaN)
+    aren't counted. The bins are found by bisection, and counted at once.
+
+    :param x: A NumPy array of the first values of the pairs.
+    :param y: A NumPy array of the second values of the pairs.
+    :param x_edges: A NumPy array of the increasing edges of the bins of `x`.
+    :param y_edges: A NumPy array of the increasing edges of the bins of `y`.
+    :return: A 2-D NumPy array of counts, indexed by the bin of `x` and then of `y`.
+    """
+    nx, ny = len(x_edges) - 1, len(y_edges) - 1
+    rows = np.searchsorted(x_edges, x, side="right") - 1
+    columns = np.searchsorted(y_edges, y, side="right") - 1
+    rows[x == x_edges[-1]] = nx - 1
+    columns[y == y_edges[-1]] = ny - 1
+    inside = (rows >= 0) & (rows < nx) & (columns >= 0) & (columns < ny)
+    return np.bincount(rows[inside] * ny + columns[inside], minlength=nx * ny).reshape(nx, ny)
+
+
+def histogram_rows(distance_edges, velocity_edges, counts):
+    """Describe each bin of a 2-D histogram of distances and velocities as a dictionary.
+
+    :param distance_edges: A NumPy array of the edges of the bins of distance.
+    :param velocity_edges: A NumPy array of the edges of the bins of velocity.
+    :param counts: A 2-D NumPy array of counts, as produced by `histogram2d`.
+    :return: A list of dictionaries mapping the `HISTOGRAM_FIELDNAMES` to values.
+    """
+    return [
+        {
+            "distance_low": float(distance_edges[i]),
+            "distance_high": float(distance_edges[i + 1]),
+            "velocity_low": float(velocity_edges[j]),
+            "velocity_high": float(velocity_edges[j + 1]),
+            "count": int(counts[i, j]),
+        }
+        for i in range(counts.shape[0])
+        for j in range(counts.shape[1])
+    ]
@@ -0,0 +1,6 @@
+"""Benchmarks for the query engine of the NEO database.
+
+Each benchmark is a script that can be run from the project root, e.g.::
+
+    $ python3 -m benchmarks.parallel_scan --approaches 1000000
+"""
@@ -0,0 +1,70 @@
+"""Compare box queries on the k-d tree with full scans of the columns.
+
+Build a `KDTree` over the time, distance and velocity of a synthetic
+`ColumnStore`, then answer boxes of growing selectivity both with the tree and
+with a vectorized scan of the three columns:
+
+    $ python3 -m benchmarks.kdtree --approaches 1000000 --repeat 5
+
+For each box, the number of matches and the best time of each method are
+reported. The tree wins by
+a wide margin on selective boxes, and loses its edge as the box grows to cover
+much of the data, which is where `NEODatabase.query` falls back to a scan.
+"""
+import argparse
+import time
+
+import numpy as np
+
+from database import KDTREE_COLUMNS
+from indexes import KDTree
+
+from benchmarks.shared_columns import synthetic_columns
+
+
+# The fraction of the range of each column covered by the boxes.
+FRACTIONS = (0.001, 0.01, 0.05, 0.2, 0.5, 1.0)
+
+
+def best_time(function, repeat):
+    """Call a function `repeat` times and return its last result and its best time, in seconds."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        best = min(best, time.perf_counter() - start)
+    return result, best
+
+
+def main():
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--approaches", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    columns = synthetic_columns(args.approaches)
+    points = np.column_stack([columns[name] for name in KDTREE_COLUMNS])
+    tree, build_time = best_time(lambda: KDTree(points), 1)
+    print(f"Built a k-d tree of {tree.n_leaves} leaves over {len(points)} approaches in {build_time:.2f} s.")
+
+    minimum, maximum = points.min(axis=0), points.max(axis=0)
+    print(f"{'fraction':>10} {'matches':>10} {'tree (ms)':>10} {'scan (ms)':>10}")
+    for fraction in FRACTIONS:
+        # A box in the middle of the data, covering `fraction` of each column's range.
+        middle = (minimum + maximum) / 2
+        half = (maximum - minimum) * fraction / 2
+        low, high = middle - half, middle + half
+        matches, tree_time = best_time(lambda: tree.query(low, high), args.repeat)
+        scanned, scan_time = best_time(
+            lambda: np.flatnonzero(np.all((points >= low) & (points <= high), axis=1)), args.repeat
+        )
+        assert np.array_equal(matches, scanned)
+        print(
+            f"{fraction:>10} {len(matches):>10} "
+            f"{tree_time * 1000:>10.2f} {scan_time * 1000:>10.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
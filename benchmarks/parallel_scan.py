@@ -0,0 +1,73 @@
+"""Measure how a parallel scan of close approaches scales with the number of workers.
+
+Build a synthetic `NEODatabase` and time the same query with 1, 2, 4, ... worker
+processes, up to the number of CPU cores:
+
+    $ python3 -m benchmarks.parallel_scan
+    $ python3 -m benchmarks.parallel_scan --approaches 1000000 --workers 1 2 4
+
+The default data set has 10 million close approaches, which needs several
+gigabytes of memory.
+
+Every worker count must take the same path through the data, so the query
+bounds the distance alone: the k-d tree only answers bounds on at least two
+of its columns, no bitmap or interval tree applies, and the uniform synthetic
+distances leave the zone map no block to skip. A single worker therefore scans
+every block, like the workers of a parallel scan, and the benchmark checks it.
+"""
+import argparse
+import os
+import time
+
+from database import NEODatabase, QueryStats
+from filters import create_filters
+
+from benchmarks.synthetic import make_neos, make_approaches
+
+
+def default_worker_counts():
+    """Return the powers of two up to the number of CPU cores."""
+    counts = [1]
+    while counts[-1] * 2 <= (os.cpu_count() or 1):
+        counts.append(counts[-1] * 2)
+    return counts
+
+
+def time_query(database, filters, workers, repeat):
+    """Return the best time, in seconds, and the result count of a query."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        count = sum(1 for _ in database.query(filters, workers=workers))
+        best = min(best, time.perf_counter() - start)
+    return best, count
+
+
+def main():
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--neos", type=int, default=30_000)
+    parser.add_argument("--approaches", type=int, default=10_000_000)
+    parser.add_argument("--workers", type=int, nargs="+", default=None)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"Building {args.approaches:,} synthetic close approaches...")
+    neos = make_neos(args.neos)
+    database = NEODatabase(neos, make_approaches(args.approaches, neos))
+    filters = create_filters(distance_max=0.05)
+    stats = QueryStats()
+    sum(1 for _ in database.query(filters, stats=stats))
+    if stats.index_candidates or stats.blocks_skipped:
+        parser.error(f"The query doesn't scan every block with one worker: {stats}")
+
+    baseline = None
+    print(f"{'workers':>8} {'seconds':>10} {'speedup':>8} {'matches':>10}")
+    for workers in args.workers or default_worker_counts():
+        elapsed, count = time_query(database, filters, workers, args.repeat)
+        baseline = baseline or elapsed
+        print(f"{workers:>8} {elapsed:>10.3f} {baseline / elapsed:>7.2f}x {count:>10,}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""Measure the memory used by workers attached to shared close approach columns.
+
+Publish a synthetic `ColumnStore` into shared memory, then let 1, 2, 4, ...
+workers attach to it and scan every column. Each worker reports its private
+(anonymous) resident memory, which should stay flat as the data set and the
+number of workers grow, and its resident shared memory, which is the same pages
+for every worker:
+
+    $ python3 -m benchmarks.shared_columns --approaches 10000000 --workers 1 4 16
+
+The memory figures are read from `/proc/self/status`, so this only runs on Linux.
+"""
+import argparse
+import multiprocessing
+
+import numpy as np
+
+from columns import ColumnStore, SharedColumnStore
+from filters import create_filters, combined_mask
+
+from benchmarks.parallel_scan import default_worker_counts
+
+
+def synthetic_columns(n, n_neos=30_000, seed=0):
+    """Build a `ColumnStore` of `n` random close approaches without creating any objects."""
+    rng = np.random.default_rng(seed)
+    neo_index = rng.integers(0, n_neos, n).astype(np.int32)
+    diameters = np.where(rng.random(n_neos) < 0.3, np.nan, rng.lognormal(-1.0, 1.0, n_neos))
+    hazardous = rng.random(n_neos) < 0.1
+    return ColumnStore(
+        {
+            "time": np.sort(rng.integers(-36_000_000, 121_000_000, n)),
+            "distance": rng.uniform(0.0, 0.5, n),
+            "velocity": rng.uniform(1.0, 40.0, n),
+            "neo_index": neo_index,
+            "diameter": diameters[neo_index],
+            "hazardous": hazardous[neo_index],
+        }
+    )
+
+
+def resident_memory_kib():
+    """Return the private and shared resident memory of this process, in KiB."""
+    fields = {}
+    with open("/proc/self/status") as status:
+        for line in status:
+            key, _, value = line.partition(":")
+            fields[key] = value.strip()
+    return int(fields["RssAnon"].split()[0]), int(fields["RssShmem"].split()[0])
+
+
+def scan_and_measure(spec):
+    """Attach to the shared columns, scan them, and report the memory of this worker."""
+    with SharedColumnStore.attach(spec) as shared:
+        filters = create_filters(distance_max=0.05, velocity_min=20.0)
+        matches = int(combined_mask(filters, shared).sum())
+        return matches, resident_memory_kib()
+
+
+def main():
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--approaches", type=int, default=10_000_000)
+    parser.add_argument("--workers", type=int, nargs="+", default=None)
+    args = parser.parse_args()
+
+    store = synthetic_columns(args.approaches)
+    print(f"Publishing {args.approaches:,} close approaches ({store.nbytes / 2**20:.0f} MiB)...")
+    with SharedColumnStore.publish(store) as shared:
+        del store
+        context = multiprocessing.get_context("spawn")
+        print(f"{'workers':>8} {'private MiB/worker':>19} {'shared MiB/worker':>18}")
+        for workers in args.workers or default_worker_counts():
+            with context.Pool(workers) as pool:
+                reports = pool.map(scan_and_measure, [shared.spec] * workers)
+            private = max(anon for _, (anon, _) in reports) / 1024
+            shmem = max(shm for _, (_, shm) in reports) / 1024
+            print(f"{workers:>8} {private:>19.1f} {shmem:>18.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""Compare nearest-neighbour searches for similar orbits with brute force.
+
+Build a `KDTree` over the normalized orbits of synthetic NEOs, as
+`NEODatabase.similar_neos` does, then find the nearest orbits of random NEOs
+both with the tree and by computing the distance to every orbit:
+
+    $ python3 -m benchmarks.similar_neos --neos 1000000 --k 10 --repeat 100
+
+For each number of NEOs, the mean time per search of each method is reported.
+The cost of a tree search barely grows with the number of NEOs, while brute
+force grows linearly.
+"""
+import argparse
+import time
+
+import numpy as np
+
+from columns import ColumnStore
+from database import orbit_points
+from indexes import KDTree
+
+
+def synthetic_orbits(n, seed=0):
+    """Create a `ColumnStore` of plausible orbital elements of `n` NEOs.
+
+    :param n: The number of NEOs.
+    :param seed: The seed of the random number generator.
+    :return: A `ColumnStore` with the columns a, e, i, om and w.
+    """
+    rng = np.random.default_rng(seed)
+    return ColumnStore(
+        {
+            "a": rng.lognormal(0.4, 0.3, n),
+            "e": rng.beta(2.0, 3.0, n),
+            "i": rng.gamma(2.0, 6.0, n),
+            "om": rng.uniform(0.0, 360.0, n),
+            "w": rng.uniform(0.0, 360.0, n),
+        }
+    )
+
+
+def main():
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--neos", type=int, default=1_000_000)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=100)
+    parser.add_argument("--angles", action="store_true")
+    args = parser.parse_args()
+
+    print(f"{'neos':>10} {'build (s)':>10} {'tree (ms)':>10} {'brute (ms)':>10}")
+    n = 10_000
+    while n <= args.neos:
+        points = orbit_points(synthetic_orbits(n), angles=args.angles)
+        start = time.perf_counter()
+        tree = KDTree(points)
+        build_time = time.perf_counter() - start
+        queries = np.random.default_rng(1).integers(0, n, args.repeat)
+
+        start = time.perf_counter()
+        found = [tree.nearest(points[query], args.k + 1)[0] for query in queries]
+        tree_time = (time.perf_counter() - start) / args.repeat
+
+        start = time.perf_counter()
+        expected = []
+        for query in queries:
+            distances = np.sum((points - points[query]) ** 2, axis=1)
+            nearest = np.argpartition(distances, args.k)[: args.k + 1]
+            expected.append(nearest[np.lexsort((nearest, distances[nearest]))])
+        brute_time = (time.perf_counter() - start) / args.repeat
+
+        assert all(np.array_equal(a, b) for a, b in zip(found, expected))
+        print(f"{n:>10} {build_time:>10.2f} {tree_time * 1000:>10.3f} {brute_time * 1000:>10.3f}")
+        n *= 10
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""Compare the SQLite backend with the in-memory and memory-mapped databases.
+
+For each backend, measure the one-time import (or conversion) of the data files,
+the cold start of opening the imported data, and the latency of a few queries
+of varying selectivity:
+
+    $ python3 -m benchmarks.sqlite_backend
+    $ python3 -m benchmarks.sqlite_backend --neofile tests/test-neos-2020.csv --cadfile tests/test-cad-2020.json
+"""
+import argparse
+import datetime
+import pathlib
+import tempfile
+import time
+
+from database import NEODatabase
+from extract import load_neos, load_approaches
+from filters import create_filters
+from sqlite_database import SQLiteDatabase
+
+
+PROJECT_ROOT = pathlib.Path(__file__).parent.parent.resolve()
+
+QUERIES = {
+    "one day": dict(date=datetime.date(2020, 3, 2)),
+    "close and fast": dict(distance_max=0.01, velocity_min=20),
+    "hazardous": dict(hazardous=True),
+    "everything": dict(),
+}
+
+
+def timed(function, *args, **kwargs):
+    """Call a function and return its result and the elapsed time, in seconds."""
+    start = time.perf_counter()
+    result = function(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def main():
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--neofile", type=pathlib.Path, default=PROJECT_ROOT / "data" / "neos.csv")
+    parser.add_argument("--cadfile", type=pathlib.Path, default=PROJECT_ROOT / "data" / "cad.json")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tempdir:
+        sqlite_path = pathlib.Path(tempdir) / "neos.sqlite"
+        columns_path = pathlib.Path(tempdir) / "columns"
+
+        memory, load_time = timed(
+            lambda: NEODatabase(load_neos(args.neofile), load_approaches(args.cadfile))
+        )
+        _, convert_time = timed(memory.save_columns, columns_path)
+        imported, import_time = timed(
+            SQLiteDatabase.import_files, sqlite_path, args.neofile, args.cadfile
+        )
+        imported.close()
+        mapped, mapped_start = timed(NEODatabase.from_columns, columns_path)
+        sqlite, sqlite_start = timed(SQLiteDatabase, sqlite_path)
+
+        print(f"{'':>20} {'in-memory':>12} {'mapped':>12} {'sqlite':>12}")
+        print(f"{'import (s)':>20} {'-':>12} {convert_time:>12.3f} {import_time:>12.3f}")
+        print(f"{'cold start (s)':>20} {load_time:>12.3f} {mapped_start:>12.3f} {sqlite_start:>12.3f}")
+        for label, criteria in QUERIES.items():
+            filters = create_filters(**criteria)
+            latencies = []
+            for database in (memory, mapped, sqlite):
+                best = min(
+                    timed(lambda: sum(1 for _ in database.query(filters)))[1]
+                    for _ in range(args.repeat)
+                )
+                latencies.append(best * 1000)
+            print(f"{label + ' (ms)':>20} " + " ".join(f"{value:>12.2f}" for value in latencies))
+        sqlite.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""Generate synthetic near-Earth objects and close approaches for benchmarks.
+
+The real data set has roughly 400,000 close approaches, which is too small to
+measure how the query engine scales. The `make_neos` and `make_approaches`
+functions produce arbitrarily many objects with plausible values, sorted by time
+like the close approaches in `cad.json`.
+
+Objects are created by copying a template rather than by calling the model
+constructors, because parsing a calendar date for each of millions of approaches
+would dominate the time spent building a benchmark.
+"""
+import copy
+import datetime
+import random
+
+from models import NearEarthObject, CloseApproach
+
+
+# The synthetic approaches are spread over the same range as the real data set.
+START = datetime.datetime(1900, 1, 1)
+SPAN_MINUTES = 300 * 365 * 24 * 60
+
+
+def make_neos(n, seed=0):
+    """Create `n` synthetic `NearEarthObject`s.
+
+    About a third of the NEOs have an unknown diameter, and about a tenth of them
+    are potentially hazardous.
+
+    :param n: The number of NEOs to create.
+    :param seed: The seed of the random number generator.
+    :return: A list of `NearEarthObject`s.
+    """
+    rng = random.Random(seed)
+    neos = []
+    for i in range(n):
+        diameter = "" if rng.random() < 0.3 else str(rng.lognormvariate(-1.0, 1.0))
+        neos.append(
+            NearEarthObject(
+                designation=f"S{i}",
+                name=f"Synthetic {i}" if i % 20 == 0 else "",
+                diameter=diameter,
+                hazardous="Y" if rng.random() < 0.1 else "N",
+            )
+        )
+    return neos
+
+
+def make_approaches(n, neos, seed=0):
+    """Create `n` synthetic `CloseApproach`es of the given NEOs, sorted by time.
+
+    :param n: The number of approaches to create.
+    :param neos: A sequence of `NearEarthObject`s that the approaches refer to.
+    :param seed: The seed of the random number generator.
+    :return: A list of `CloseApproach`es.
+    """
+    rng = random.Random(seed)
+    template = CloseApproach(
+        _designation=neos[0].designation,
+        time="1900-Jan-01 00:00",
+        distance="0.1",
+        velocity="10.0",
+    )
+    minutes = sorted(rng.randrange(SPAN_MINUTES) for _ in range(n))
+    approaches = []
+    for offset in minutes:
+        approach = copy.copy(template)
+        approach._designation = neos[rng.randrange(len(neos))].designation
+        approach.time = START + datetime.timedelta(minutes=offset)
+        approach.distance = rng.uniform(0.0, 0.5)
+        approach.velocity = rng.uniform(1.0, 40.0)
+        approaches.append(approach)
+    return approaches
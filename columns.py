@@ -0,0 +1,563 @@
+"""Store the attributes of close approaches as typed NumPy columns.
+
+A `ColumnStore` holds one NumPy array per attribute of the close approaches in
+an `NEODatabase`, aligned by approach index: the approach time (in minutes since
+the Unix epoch), the nominal distance and the relative velocity, the index of
+the approach's NEO, and that NEO's diameter and hazardous flag. Filters can be
+evaluated on whole columns at once instead of on one `CloseApproach` at a time.
+
+A `SharedColumnStore` publishes the columns of a `ColumnStore` into
+`multiprocessing.shared_memory` segments. Other processes attach to the segments
+by name and get zero-copy views of the columns, so that a pool of workers shares
+one copy of the data instead of duplicating the object graph of the database.
+
+The `save_tables` and `load_tables` functions store the columns of a database,
+together with a table of its NEOs, in a directory of fixed-width `.npy` column
+files. Strings (designations and names) are dictionary-encoded: each NEO's
+strings are stored once, as a byte buffer with an offsets buffer, and approaches
+refer to their NEO by index. The loader memory-maps the files, so opening a
+directory is cheap regardless of its size and the OS page cache does the rest.
+
+The approaches in such a directory are split into one or more `Partition`s -
+contiguous ranges of approaches, such as those of a single year. The manifest
+records the row count and the minimum and maximum time, distance and velocity of
+each partition, so that a query can skip the partitions that can't match without
+opening their files.
+"""
+import bisect
+import json
+import pathlib
+import sys
+import weakref
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from indexes import ZoneMap
+
+
+# The version of the on-disk layout written by `save_tables`.
+FORMAT_VERSION = 3
+
+# The number of approaches in a block: the unit in which columns are scanned and
+# summarized by a `ZoneMap`. Smaller blocks let a limited query stop sooner and
+# let zone maps skip more precisely; larger blocks amortize per-block overhead.
+BLOCK_SIZE = 16_384
+
+# The columns whose minimum and maximum are recorded for each `Partition`.
+PARTITION_STATS_COLUMNS = ("time", "distance", "velocity")
+
+# The columns of a `ColumnStore`, and their NumPy data types.
+APPROACH_COLUMNS = {
+    "time": np.int64,
+    "distance": np.float64,
+    "velocity": np.float64,
+    "neo_index": np.int32,
+    "diameter": np.float64,
+    "hazardous": np.bool_,
+}
+
+
+class ColumnStore:
+    """Columns of close approach attributes, aligned by approach index."""
+
+    def __init__(self, columns):
+        """Create a new `ColumnStore`.
+
+        :param columns: A dictionary mapping column names to equally long NumPy arrays.
+        """
+        self.columns = columns
+
+    @classmethod
+    def from_objects(cls, neos, approaches, neo_index):
+        """Build a `ColumnStore` from linked NEOs and close approaches.
+
+        :param neos: A sequence of `NearEarthObject`s.
+        :param approaches: A sequence of `CloseApproach`es.
+        :param neo_index: A sequence with the index into `neos` of each approach's NEO, or -1.
+        :return: A new `ColumnStore`.
+        """
+        neo_index = np.asarray(neo_index, dtype=APPROACH_COLUMNS["neo_index"])
+        diameters = np.array([neo.diameter for neo in neos] + [np.nan], dtype=np.float64)
+        hazardous = np.array([bool(neo.hazardous) for neo in neos] + [False])
+        n = len(approaches)
+        return cls(
+            {
+                "time": np.fromiter(
+                    (approach.minutes for approach in approaches),
+                    dtype=APPROACH_COLUMNS["time"],
+                    count=n,
+                ),
+                "distance": np.fromiter(
+                    (approach.distance for approach in approaches),
+                    dtype=APPROACH_COLUMNS["distance"],
+                    count=n,
+                ),
+                "velocity": np.fromiter(
+                    (approach.velocity for approach in approaches),
+                    dtype=APPROACH_COLUMNS["velocity"],
+                    count=n,
+                ),
+                "neo_index": neo_index,
+                # Unlinked approaches (index -1) pick up the sentinel values at the end.
+                "diameter": diameters[neo_index],
+                "hazardous": hazardous[neo_index],
+            }
+        )
+
+    def __len__(self):
+        """Return the number of rows in this `ColumnStore`."""
+        return len(next(iter(self.columns.values()), ()))
+
+    def __getitem__(self, name):
+        """Return the column with the given name."""
+        return self.columns[name]
+
+    def slice(self, start, stop):
+        """Return a `ColumnStore` of zero-copy views of the rows `start..stop`.
+
+        :param start: The first row of the slice.
+        :param stop: One past the last row of the slice.
+        :return: A new `ColumnStore` sharing memory with this one.
+        """
+        return ColumnStore({name: column[start:stop] for name, column in self.columns.items()})
+
+    def take(self, indices):
+        """Return a `ColumnStore` of copies of the given rows.
+
+        :param indices: A NumPy array of row indices.
+        :return: A new `ColumnStore`.
+        """
+        return ColumnStore({name: column[indices] for name, column in self.columns.items()})
+
+    @property
+    def nbytes(self):
+        """Return the total size of the columns, in bytes."""
+        return sum(column.nbytes for column in self.columns.values())
+
+
+class StringColumn:
+    """A column of strings, stored as one UTF-8 byte buffer and an offsets buffer.
+
+    The `i`-th string occupies the bytes `data[offsets[i]:offsets[i + 1]]`. An
+    empty string stands for a missing value and is returned as None.
+    """
+
+    def __init__(self, offsets, data):
+        """Create a new `StringColumn`.
+
+        :param offsets: A NumPy array of `len(self) + 1` increasing byte offsets.
+        :param data: A NumPy array of bytes (`uint8`) holding the encoded strings.
+        """
+        self.offsets = offsets
+        self.data = data
+
+    @classmethod
+    def from_strings(cls, strings):
+        """Encode a sequence of strings (or Nones) into a `StringColumn`.
+
+        :param strings: A sequence of strings, where None stands for a missing value.
+        :return: A new `StringColumn`.
+        """
+        encoded = [(string or "").encode("utf-8") for string in strings]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(value) for value in encoded], out=offsets[1:])
+        data = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+        return cls(offsets, data)
+
+    def __len__(self):
+        """Return the number of strings in this column."""
+        return len(self.offsets) - 1
+
+    def __getitem__(self, index):
+        """Decode the string at the given index, or return None if it is missing."""
+        value = self.data[self.offsets[index] : self.offsets[index + 1]].tobytes()
+        return value.decode("utf-8") or None
+
+    def __iter__(self):
+        """Decode every string of this column, in order."""
+        buffer = self.data.tobytes()
+        offsets = self.offsets.tolist()
+        for start, stop in zip(offsets, offsets[1:]):
+            yield buffer[start:stop].decode("utf-8") or None
+
+
+class Partition:
+    """A contiguous range of close approaches, with the range of their attributes.
+
+    The columns of a partition are only opened when they are first accessed, so
+    a partition that a query skips costs no I/O. Likewise, the `ZoneMap` of a
+    partition is built when first accessed, in blocks of `BLOCK_SIZE` rows.
+    """
+
+    def __init__(self, name, start, stop, stats, columns=None, directory=None):
+        """Create a new `Partition`.
+
+        :param name: The name of the partition, such as its year.
+        :param start: The index of the first approach of the partition.
+        :param stop: One past the index of the last approach of the partition.
+        :param stats: A dictionary mapping column names to `(minimum, maximum)` tuples.
+        :param columns: The `ColumnStore` of the partition, if already in memory.
+        :param directory: A directory from which to map the columns of the partition, otherwise.
+        """
+        self.name = name
+        self.start = start
+        self.stop = stop
+        self.stats = stats
+        self._columns = columns
+        self.directory = directory
+        self._zone_map = None
+
+    @classmethod
+    def from_columns(cls, name, start, columns):
+        """Create a `Partition` of in-memory columns, computing their ranges.
+
+        :param name: The name of the partition.
+        :param start: The index of the first approach of the partition.
+        :param columns: The `ColumnStore` of the partition.
+        :return: A new `Partition`.
+        """
+        stats = {}
+        if len(columns):
+            for column in PARTITION_STATS_COLUMNS:
+                values = columns[column]
+                stats[column] = (values.min().item(), values.max().item())
+        return cls(name, start, start + len(columns), stats, columns=columns)
+
+    @property
+    def loaded(self):
+        """Return whether the columns of this partition have been opened."""
+        return self._columns is not None
+
+    @property
+    def columns(self):
+        """Return the `ColumnStore` of this partition, mapping its files if needed."""
+        if self._columns is None:
+            self._columns = ColumnStore(
+                {
+                    path.name[: -len(".npy")]: np.load(path, mmap_mode="r")
+                    for path in sorted(self.directory.glob("*.npy"))
+                }
+            )
+        return self._columns
+
+    @property
+    def zone_map(self):
+        """Return the `ZoneMap` of this partition, building it if needed."""
+        if self._zone_map is None:
+            self._zone_map = ZoneMap(self.columns, BLOCK_SIZE)
+        return self._zone_map
+
+    @property
+    def n_blocks(self):
+        """Return the number of blocks in this partition."""
+        return -(-len(self) // BLOCK_SIZE)
+
+    def __len__(self):
+        """Return the number of approaches in this partition."""
+        return self.stop - self.start
+
+    def may_match(self, intervals):
+        """Return whether any approach of this partition can fall into the given intervals.
+
+        :param intervals: A dictionary mapping column names to closed `(low, high)` intervals.
+        :return: False if some interval excludes every approach of this partition.
+        """
+        if not len(self):
+            return False
+        for column, (low, high) in intervals.items():
+            if low > high:
+                return False
+            if column in self.stats:
+                minimum, maximum = self.stats[column]
+                if high < minimum or low > maximum:
+                    return False
+        return True
+
+
+class PartitionedColumnStore(ColumnStore):
+    """A `ColumnStore` of the concatenated columns of a sequence of `Partition`s.
+
+    The columns are only concatenated - reading every partition - when they are
+    first accessed. Queries that can be answered partition by partition should
+    use the `partitions` instead.
+    """
+
+    def __init__(self, partitions):
+        """Create a new `PartitionedColumnStore`.
+
+        :param partitions: A list of consecutive `Partition`s.
+        """
+        self.partitions = partitions
+        self._starts = [partition.start for partition in partitions]
+        self._columns = None
+
+    @property
+    def columns(self):
+        """Return the dictionary of concatenated columns."""
+        if self._columns is None:
+            if len(self.partitions) == 1:
+                self._columns = self.partitions[0].columns.columns
+            else:
+                names = self.partitions[0].columns.columns
+                self._columns = {
+                    name: np.concatenate([partition.columns[name] for partition in self.partitions])
+                    for name in names
+                }
+        return self._columns
+
+    def __len__(self):
+        """Return the number of rows in this `ColumnStore`."""
+        return self.partitions[-1].stop if self.partitions else 0
+
+    def locate(self, index):
+        """Find the partition holding a row, without concatenating the columns.
+
+        :param index: The index of a row.
+        :return: A tuple of the `Partition` and the index of the row within it.
+        """
+        partition = self.partitions[bisect.bisect_right(self._starts, index) - 1]
+        return partition, index - partition.start
+
+
+def approach_years(columns):
+    """Return the calendar year of each approach of a `ColumnStore`.
+
+    :param columns: A `ColumnStore`.
+    :return: A NumPy array of years, aligned with the approaches.
+    """
+    years = columns["time"].astype("datetime64[m]").astype("datetime64[Y]")
+    return years.astype(np.int64) + 1970
+
+
+def group_approaches_by_neo(neo_index, time, n_neos):
+    """Group the approaches by NEO, and sort the approaches of each NEO by time.
+
+    :param neo_index: A NumPy array of the index of the NEO of each approach, or -1.
+    :param time: A NumPy array of the time of each approach.
+    :param n_neos: The number of NEOs.
+    :return: A tuple of a NumPy array of approach indices ordered by NEO and then
+        by time, and a NumPy array of `n_neos + 1` offsets delimiting each NEO's
+        slice of it.
+    """
+    by_neo = np.lexsort((time, neo_index))
+    counts = np.bincount(neo_index[neo_index >= 0], minlength=n_neos)
+    approach_offsets = np.zeros(n_neos + 1, dtype=np.int64)
+    np.cumsum(counts, out=approach_offsets[1:])
+    # Unlinked approaches (index -1) sort first and belong to no NEO.
+    return by_neo[len(neo_index) - approach_offsets[-1] :], approach_offsets
+
+
+def save_tables(directory, neo_table, columns, partition_by=None):
+    """Save a table of NEOs and the `ColumnStore` of their approaches into a directory.
+
+    Besides the columns themselves, this saves the approaches grouped by NEO: the
+    `by_neo` column lists approach indices ordered by NEO and then by time, and
+    the NEO's `approach_offsets` delimit each NEO's slice of it.
+
+    With `partition_by="year"`, the approaches are (stably) reordered by year and
+    each year is saved as a separate partition. Otherwise, all approaches are
+    saved as a single partition.
+
+    :param directory: A Path-like object for the directory, which is created if needed.
+    :param neo_table: A dictionary with the `StringColumn`s `designation` and `name`,
+        and the NumPy arrays `diameter` and `hazardous`, aligned by NEO index.
+    :param columns: The `ColumnStore` of the close approaches.
+    :param partition_by: Either None or "year".
+    """
+    directory = pathlib.Path(directory)
+    (directory / "neos").mkdir(parents=True, exist_ok=True)
+    (directory / "approaches").mkdir(parents=True, exist_ok=True)
+
+    if partition_by == "year" and len(columns):
+        years = approach_years(columns)
+        order = np.argsort(years, kind="stable")
+        columns = ColumnStore({name: column[order] for name, column in columns.columns.items()})
+        years = years[order]
+        bounds = np.flatnonzero(np.diff(years)) + 1
+        starts = [0] + bounds.tolist()
+        stops = bounds.tolist() + [len(columns)]
+        names = [str(years[start]) for start in starts]
+    elif partition_by in (None, "year"):
+        starts, stops, names = [0], [len(columns)], ["all"]
+    else:
+        raise ValueError(f"Unsupported partitioning {partition_by!r}.")
+
+    n_neos = len(neo_table["designation"])
+    by_neo, approach_offsets = group_approaches_by_neo(
+        columns["neo_index"], columns["time"], n_neos
+    )
+
+    for name, column in neo_table.items():
+        if isinstance(column, StringColumn):
+            np.save(directory / "neos" / f"{name}.offsets.npy", column.offsets)
+            np.save(directory / "neos" / f"{name}.data.npy", column.data)
+        else:
+            np.save(directory / "neos" / f"{name}.npy", column)
+    np.save(directory / "neos" / "approach_offsets.npy", approach_offsets)
+    np.save(directory / "approaches" / "by_neo.npy", by_neo)
+
+    partitions = []
+    for name, start, stop in zip(names, starts, stops):
+        partition = Partition.from_columns(name, start, columns.slice(start, stop))
+        (directory / "approaches" / name).mkdir(exist_ok=True)
+        for column_name, column in partition.columns.columns.items():
+            np.save(directory / "approaches" / name / f"{column_name}.npy", column)
+        partitions.append(
+            {"name": name, "start": start, "rows": len(partition), "stats": partition.stats}
+        )
+
+    manifest = {
+        "version": FORMAT_VERSION,
+        "neos": n_neos,
+        "approaches": len(columns),
+        "neo_columns": sorted(neo_table),
+        "partition_by": partition_by,
+        "partitions": partitions,
+    }
+    with open(directory / "manifest.json", "w") as file:
+        json.dump(manifest, file, indent=2)
+
+
+def load_tables(directory):
+    """Memory-map a directory written by `save_tables`.
+
+    Only the NEO table is mapped right away; the columns of each partition are
+    mapped when first accessed.
+
+    :param directory: A Path-like object for the directory.
+    :return: A tuple of the NEO table (as a dictionary, with the extra NumPy array
+        `approach_offsets`), the list of `Partition`s of the approaches, and the
+        `by_neo` array.
+    """
+    directory = pathlib.Path(directory)
+    with open(directory / "manifest.json") as file:
+        manifest = json.load(file)
+    if manifest["version"] != FORMAT_VERSION:
+        raise ValueError(f"Unsupported column format version {manifest['version']}.")
+
+    def load(path):
+        return np.load(path, mmap_mode="r")
+
+    neo_table = {}
+    for name in manifest["neo_columns"]:
+        if (directory / "neos" / f"{name}.offsets.npy").exists():
+            neo_table[name] = StringColumn(
+                load(directory / "neos" / f"{name}.offsets.npy"),
+                load(directory / "neos" / f"{name}.data.npy"),
+            )
+        else:
+            neo_table[name] = load(directory / "neos" / f"{name}.npy")
+    neo_table["approach_offsets"] = load(directory / "neos" / "approach_offsets.npy")
+    partitions = [
+        Partition(
+            entry["name"],
+            entry["start"],
+            entry["start"] + entry["rows"],
+            {column: tuple(bounds) for column, bounds in entry["stats"].items()},
+            directory=directory / "approaches" / entry["name"],
+        )
+        for entry in manifest["partitions"]
+    ]
+    return neo_table, partitions, load(directory / "approaches" / "by_neo.npy")
+
+
+def _attach_segment(name):
+    """Attach to an existing shared memory segment without taking ownership of it.
+
+    Only the publishing process should unlink a segment. From Python 3.13 on,
+    attaching without tracking guarantees that. Before that, the attaching
+    process registers the segment with its resource tracker, which is harmless
+    for the worker processes of the publisher: they share its resource tracker,
+    where the segment is already registered.
+
+    :param name: The name of the shared memory segment.
+    :return: A `SharedMemory` instance.
+    """
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+    return shared_memory.SharedMemory(name=name)
+
+
+def _release_segments(segments, unlink):
+    """Close, and optionally unlink, a collection of shared memory segments."""
+    for segment in segments:
+        try:
+            segment.close()
+        except BufferError:
+            # A view of the segment is still alive; the mapping goes away with it.
+            pass
+        if unlink:
+            try:
+                segment.unlink()
+            except FileNotFoundError:
+                pass
+
+
+class SharedColumnStore(ColumnStore):
+    """A `ColumnStore` whose columns live in shared memory segments.
+
+    The process that publishes the columns with `publish` owns the segments and
+    unlinks them when `close` is called, or at the latest when the store is
+    garbage collected or the interpreter shuts down. Processes that `attach` to
+    the segments only close their own mappings.
+    """
+
+    def __init__(self, columns, segments, spec, owner):
+        """Create a new `SharedColumnStore`.
+
+        Use `publish` or `attach` rather than calling this constructor directly.
+
+        :param columns: A dictionary mapping column names to arrays backed by `segments`.
+        :param segments: A list of the `SharedMemory` instances backing the columns.
+        :param spec: A picklable description of the segments, for use with `attach`.
+        :param owner: Whether this process is responsible for unlinking the segments.
+        """
+        super().__init__(columns)
+        self.spec = spec
+        self._finalizer = weakref.finalize(self, _release_segments, segments, owner)
+
+    @classmethod
+    def publish(cls, store):
+        """Copy the columns of a `ColumnStore` into new shared memory segments.
+
+        :param store: The `ColumnStore` to publish.
+        :return: A new `SharedColumnStore` owning the segments.
+        """
+        columns, segments, spec = {}, [], {}
+        for name, column in store.columns.items():
+            segment = shared_memory.SharedMemory(create=True, size=max(column.nbytes, 1))
+            segments.append(segment)
+            shared = np.ndarray(column.shape, dtype=column.dtype, buffer=segment.buf)
+            shared[:] = column
+            columns[name] = shared
+            spec[name] = (segment.name, column.dtype.str, len(column))
+        return cls(columns, segments, spec, owner=True)
+
+    @classmethod
+    def attach(cls, spec):
+        """Attach to the shared memory segments of a published `SharedColumnStore`.
+
+        :param spec: The `spec` of the published store.
+        :return: A new `SharedColumnStore` with zero-copy views of the columns.
+        """
+        columns, segments = {}, []
+        for name, (segment_name, dtype, length) in spec.items():
+            segment = _attach_segment(segment_name)
+            segments.append(segment)
+            columns[name] = np.ndarray((length,), dtype=dtype, buffer=segment.buf)
+        return cls(columns, segments, spec, owner=False)
+
+    def close(self):
+        """Release the shared memory segments, unlinking them if this process owns them."""
+        # Drop the views first, since a segment can't be closed while it is exported.
+        self.columns = {}
+        self._finalizer()
+
+    def __enter__(self):
+        """Enter a context that closes this store on exit."""
+        return self
+
+    def __exit__(self, *exc_info):
+        """Close this store."""
+        self.close()
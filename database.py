@@ -11,7 +11,279 @@ data on NEOs and close approaches extracted by `extract.load_neos` and
 
 You'll edit this file in Tasks 2 and 3.
 """
-from helpers import transform_obs_to_df, feature_to_index_dict
+import collections.abc
+import math
+import multiprocessing
+
+import numpy as np
+
+from aggregate import DEFAULT_METRICS, aggregate_rows, neo_summaries, time_clusters, time_series
+from aggregate import bin_edges, histogram2d
+from columns import BLOCK_SIZE, ColumnStore, SharedColumnStore, StringColumn
+from columns import Partition, PartitionedColumnStore, save_tables, load_tables
+from columns import group_approaches_by_neo
+from filters import NEO_COLUMNS, ORBITAL_COLUMNS, EXTRA_APPROACH_COLUMNS, UnsupportedCriterionError
+from filters import supports_columns, supports_neos, combined_mask, filter_intervals
+from filters import orbital_columns, extra_columns, resolve_orbital_filters
+from filters import DistanceOverlapFilter, DistanceWithinFilter
+from extract import load_approach_chunks
+from indexes import Bitmap, DayCounts, IntervalTree, KDTree, NameIndex, PrefixIndex
+from helpers import feature_to_index_dict
+from helpers import datetime_to_minutes, minutes_to_datetime, datetime_to_str
+from helpers import MINUTES_PER_DAY, date_to_days
+from models import NearEarthObject, CloseApproach, NEOSummary
+from sampling import ApproachSample
+
+
+# Read-only state shared with the worker processes of a parallel query. For a
+# scan of close approach objects, it is populated just before the workers are
+# forked, so they inherit it instead of receiving pickled copies of the close
+# approaches. For a columnar scan, each worker attaches to the shared columns.
+_WORKER_STATE = {}
+
+# Workers of a columnar scan start from a fresh server process rather than from
+# a fork of the database's process, so they never touch its object graph.
+_COLUMN_WORKER_START_METHOD = (
+    "forkserver"
+    if "forkserver" in multiprocessing.get_all_start_methods()
+    else "spawn"
+)
+
+# Times are shifted by this offset to pack an NEO and a time into one sortable key.
+_TIME_KEY_OFFSET = 1 << 39
+
+# The orbital elements compared by `NEODatabase.similar_neos`, and the angles
+# compared as well on request.
+SIMILARITY_ELEMENTS = ("a", "e", "i")
+SIMILARITY_ANGLES = ("om", "w")
+
+# The attributes of NEOs that `NEODatabase.complete` completes.
+COMPLETION_FIELDS = ("designation", "name")
+
+# The columns indexed together by the k-d tree of an in-memory database.
+KDTREE_COLUMNS = ("time", "distance", "velocity")
+
+# A k-d tree search gives up, in favour of a block scan, once it has to test
+# more than this fraction of the tree's leaves point by point.
+KDTREE_MAX_LEAF_FRACTION = 1 / 16
+
+# Bitmaps alone only provide the candidates of a query if they select at most
+# this fraction of the approaches; a block scan is as fast for larger sets.
+BITMAP_MAX_FRACTION = 1 / 2
+
+# Likewise, the interval tree only provides the candidates of a query on the
+# uncertainty interval of the distance if it selects at most this fraction.
+INTERVAL_MAX_FRACTION = 1 / 2
+
+
+def _scan_shard(shard):
+    """Scan a contiguous shard of close approaches in a worker process.
+
+    :param shard: A `(start, stop)` tuple of approach indices to scan.
+    :return: A list of the indices of matching approaches, in internal order.
+    """
+    approaches = _WORKER_STATE["approaches"]
+    filters = _WORKER_STATE["filters"]
+    return [
+        index
+        for index in range(*shard)
+        if all(filter(approaches[index]) for filter in filters)
+    ]
+
+
+def _attach_columns(spec, filters):
+    """Initialize a worker process of a columnar scan.
+
+    :param spec: The `spec` of the published `SharedColumnStore`.
+    :param filters: A collection of filters that support `mask`.
+    """
+    _WORKER_STATE.update(columns=SharedColumnStore.attach(spec), filters=filters)
+
+
+def _scan_column_shard(shard):
+    """Scan a contiguous shard of the shared columns in a worker process.
+
+    :param shard: A `(start, stop)` tuple of approach indices to scan.
+    :return: A NumPy array of the indices of matching approaches, in internal order.
+    """
+    start, stop = shard
+    columns = _WORKER_STATE["columns"].slice(start, stop)
+    return np.flatnonzero(combined_mask(_WORKER_STATE["filters"], columns)) + start
+
+
+def orbit_points(neo_columns, angles=False):
+    """Place the orbits of NEOs in a space where similar orbits are near each other.
+
+    Each of the `SIMILARITY_ELEMENTS` is divided by its standard deviation over
+    all NEOs, so that they weigh alike. With `angles`, each of the
+    `SIMILARITY_ANGLES` is added as the cosine and the sine of the angle, so
+    that angles of 1 and 359 degrees are close, and scaled likewise.
+
+    :param neo_columns: A `ColumnStore` of NEOs holding the orbital columns.
+    :param angles: Whether to include the `SIMILARITY_ANGLES`.
+    :return: A NumPy array of shape `(n_neos, d)`, with NaN for unknown elements.
+    """
+    coordinates = [np.asarray(neo_columns[name], dtype=np.float64) for name in SIMILARITY_ELEMENTS]
+    if angles:
+        for name in SIMILARITY_ANGLES:
+            radians = np.radians(np.asarray(neo_columns[name], dtype=np.float64))
+            coordinates.extend((np.cos(radians), np.sin(radians)))
+    points = np.column_stack(coordinates)
+    if not len(points) or np.isnan(points).all():
+        return points
+    with np.errstate(invalid="ignore"):
+        spread = np.nanstd(points, axis=0)
+    return points / np.where(spread > 0, spread, 1.0)
+
+
+def split_into_shards(n, n_shards):
+    """Split the indices `0..n` into at most `n_shards` contiguous shards.
+
+    :param n: The number of items to split.
+    :param n_shards: The desired number of shards.
+    :return: A list of `(start, stop)` tuples covering `0..n` in order.
+    """
+    n_shards = max(1, min(n_shards, n))
+    bounds = [n * i // n_shards for i in range(n_shards + 1)]
+    return [(start, stop) for start, stop in zip(bounds, bounds[1:]) if stop > start]
+
+
+class QueryStats:
+    """Counters describing how much of the data a query had to look at.
+
+    Pass a `QueryStats` to `NEODatabase.query` to have it filled in. A columnar
+    scan counts the partitions and blocks it scanned and those it skipped, a
+    query answered by an index counts the candidate rows found by the index,
+    and every query counts the number of matches it produced.
+    """
+
+    def __init__(self):
+        """Create a new `QueryStats` with all counters at zero."""
+        self.partitions_scanned = 0
+        self.partitions_skipped = 0
+        self.blocks_scanned = 0
+        self.blocks_skipped = 0
+        self.index_candidates = 0
+        self.matches = 0
+
+    def __str__(self):
+        """Return `str(self)`."""
+        return (
+            f"Scanned {self.blocks_scanned} and skipped {self.blocks_skipped} blocks "
+            f"in {self.partitions_scanned} scanned and {self.partitions_skipped} skipped "
+            f"partitions, checked {self.index_candidates} index candidates, "
+            f"producing {self.matches} matches."
+        )
+
+    def __repr__(self):
+        """Return `repr(self)`, a computer-readable string representation of this object."""
+        return (
+            f"QueryStats(partitions_scanned={self.partitions_scanned}, "
+            f"partitions_skipped={self.partitions_skipped}, "
+            f"blocks_scanned={self.blocks_scanned}, blocks_skipped={self.blocks_skipped}, "
+            f"index_candidates={self.index_candidates}, matches={self.matches})"
+        )
+
+
+class MappedNEOs(collections.abc.Sequence):
+    """A sequence of `NearEarthObject`s created on demand from a mapped NEO table.
+
+    Each NEO is created the first time it is accessed and cached from then on.
+    Its `approaches` are a `MappedApproaches` view of its own close approaches.
+    """
+
+    def __init__(self, neo_table, by_neo):
+        """Create a new `MappedNEOs`.
+
+        :param neo_table: A NEO table, as returned by `columns.load_tables`.
+        :param by_neo: The approach indices grouped by NEO, as returned by `columns.load_tables`.
+        """
+        self.table = neo_table
+        self.by_neo = by_neo
+        self.approaches = None
+        self._cache = {}
+
+    def __len__(self):
+        """Return the number of NEOs."""
+        return len(self.table["designation"])
+
+    def __getitem__(self, index):
+        """Return the NEO at the given index, creating it if needed."""
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        index = int(index)
+        if index < 0:
+            index += len(self)
+        neo = self._cache.get(index)
+        if neo is None:
+            neo = NearEarthObject(
+                designation=self.table["designation"][index],
+                name=self.table["name"][index],
+                diameter=float(self.table["diameter"][index]),
+                hazardous=bool(self.table["hazardous"][index]),
+            )
+            offsets = self.table["approach_offsets"]
+            neo.approaches = self.approaches.subset(
+                self.by_neo[offsets[index] : offsets[index + 1]]
+            )
+            self._cache[index] = neo
+        return neo
+
+
+class MappedApproaches(collections.abc.Sequence):
+    """A sequence of `CloseApproach`es created on demand from mapped partitions.
+
+    Each approach is created the first time it is accessed, linked to its NEO,
+    and cached from then on. Only the partition holding the approach is read.
+    """
+
+    def __init__(self, columns, neos, indices=None, cache=None):
+        """Create a new `MappedApproaches`.
+
+        :param columns: The `PartitionedColumnStore` of the approaches.
+        :param neos: The `MappedNEOs` that the approaches refer to.
+        :param indices: The approach indices in this sequence, or None for all of them.
+        :param cache: The cache of created approaches, shared with other views.
+        """
+        self.columns = columns
+        self.neos = neos
+        self.indices = indices
+        self._cache = {} if cache is None else cache
+
+    def subset(self, indices):
+        """Return a view of the approaches at the given indices, sharing this cache."""
+        return MappedApproaches(self.columns, self.neos, indices, self._cache)
+
+    def __len__(self):
+        """Return the number of close approaches."""
+        return len(self.columns) if self.indices is None else len(self.indices)
+
+    def __getitem__(self, index):
+        """Return the close approach at the given index, creating it if needed."""
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        index = int(index)
+        if index < 0:
+            index += len(self)
+        if self.indices is not None:
+            index = int(self.indices[index])
+        approach = self._cache.get(index)
+        if approach is None:
+            partition, row = self.columns.locate(index)
+            columns = partition.columns
+            neo_index = columns["neo_index"][row]
+            designation = self.neos.table["designation"][neo_index] if neo_index >= 0 else None
+            approach = CloseApproach(
+                _designation=designation,
+                time=int(columns["time"][row]),
+                distance=float(columns["distance"][row]),
+                velocity=float(columns["velocity"][row]),
+            )
+            if neo_index >= 0:
+                approach.neo = self.neos[neo_index]
+            self._cache[index] = approach
+        return approach
+
 
 class NEODatabase:
     """A database of near-Earth objects and their close approaches.
@@ -22,7 +294,7 @@ class NEODatabase:
     querying for close approaches that match criteria.
     """
 
-    def __init__(self, neos, approaches):
+    def __init__(self, neos, approaches, orbits=None, extras=None):
         """Create a new `NEODatabase`.
 
         As a precondition, this constructor assumes that the collections of NEOs
@@ -34,36 +306,221 @@ class NEODatabase:
         matches the `.designation` attribute of the corresponding NEO. This
         constructor modifies the supplied NEOs and close approaches to link them
         together - after it's done, the `.approaches` attribute of each NEO has
-        a collection of that NEO's close approaches, and the `.neo` attribute of
-        each close approach references the appropriate NEO.
+        a collection of that NEO's close approaches, sorted by time, and the
+        `.neo` attribute of each close approach references the appropriate NEO.
+
+        A summary of the close approaches of each NEO (see `get_summary`) is
+        computed as well.
+
+        Orbital elements of the NEOs, as loaded by `extract.load_orbital_columns`,
+        are kept as columns of NEOs, which the orbital filters are evaluated on.
+        Likewise, extra fields of the approaches, as loaded by
+        `extract.load_approach_columns`, are kept as extra columns of approaches.
 
         :param neos: A collection of `NearEarthObject`s.
         :param approaches: A collection of `CloseApproach`es.
+        :param orbits: A dictionary mapping some `filters.ORBITAL_COLUMNS` to NumPy
+            arrays aligned with `neos`.
+        :param extras: A dictionary mapping some `filters.EXTRA_APPROACH_COLUMNS` to NumPy
+            arrays aligned with `approaches`.
         """
         self._neos = neos
         self._approaches = approaches
-        self._matches_df = self.merge_neos_approaches()
-        self.cross_reference_neos_approaches()
         self._neos_des_to_idx = feature_to_index_dict("designation", self._neos)
-        self._neos_name_to_idx = feature_to_index_dict("name", self._neos)
+        self._names = NameIndex([neo.name for neo in self._neos])
+        self._prefix_indexes = {}
+        self._columns = ColumnStore.from_objects(
+            self._neos, self._approaches, self.approach_neo_index()
+        )
+        self._columns.columns.update(extras or {})
+        self._by_neo, self._approach_offsets = group_approaches_by_neo(
+            self._columns["neo_index"], self._columns["time"], len(self._neos)
+        )
+        offsets = self._approach_offsets
+        for index, neo in enumerate(self._neos):
+            neo.approaches = [
+                self._approaches[approach]
+                for approach in self._by_neo[offsets[index] : offsets[index + 1]]
+            ]
+            for approach in neo.approaches:
+                approach.neo = neo
+        self._summaries = neo_summaries(self._columns, self._by_neo, self._approach_offsets)
+        self._neo_times = None
+        self._neo_time_keys = None
+        self._orbit_trees = {}
+        self._neo_columns = ColumnStore(
+            {
+                "diameter": np.array([neo.diameter for neo in self._neos], dtype=np.float64),
+                "hazardous": np.array([bool(neo.hazardous) for neo in self._neos]),
+                **(orbits or {}),
+            }
+        )
+        self._partitions = [Partition.from_columns("all", 0, self._columns)]
+        self._kdtree = KDTree(np.column_stack([self._columns[name] for name in KDTREE_COLUMNS]))
+        hazardous = Bitmap.from_mask(self._columns["hazardous"])
+        self._bitmaps = {
+            "hazardous": hazardous,
+            "not_hazardous": ~hazardous,
+            "diameter_known": Bitmap.from_mask(~np.isnan(self._columns["diameter"])),
+        }
+        if "dist_min" in self._columns.columns and "dist_max" in self._columns.columns:
+            self._interval_tree = IntervalTree(self._columns["dist_min"], self._columns["dist_max"])
+        else:
+            self._interval_tree = None
+        self._sample = ApproachSample.draw(self._columns)
+        self._day_counts = self._build_day_counts()
+        self._shared_columns = None
+
+    @classmethod
+    def from_columns(cls, directory):
+        """Open a directory of column files written by `save_columns`.
 
-    def merge_neos_approaches(self):
-        """Merge NEO objects and approaches.
+        The columns are memory-mapped rather than read, and queries run directly
+        on the mapped columns. `NearEarthObject`s and `CloseApproach`es are only
+        created when they are looked up or produced by a query, and the summaries
+        of the NEOs are only computed when one is first requested.
 
-        :return: pd Dataframe with row that contain merge of neos and approaches
+        :param directory: A Path-like object for the directory.
+        :return: A new `NEODatabase`.
         """
-        dfneos = transform_obs_to_df(self._neos, idxname="idx_neo")
-        dfappro = transform_obs_to_df(self._approaches, idxname="idx_approach")
-        matches_pre = dfneos.merge(
-            dfappro, left_on="designation", right_on="_designation"
+        neo_table, partitions, by_neo = load_tables(directory)
+        columns = PartitionedColumnStore(partitions)
+        neos = MappedNEOs(neo_table, by_neo)
+        neos.approaches = MappedApproaches(columns, neos)
+
+        database = cls.__new__(cls)
+        database._neos = neos
+        database._approaches = neos.approaches
+        database._neos_des_to_idx = {
+            designation: index for index, designation in enumerate(neo_table["designation"])
+        }
+        database._names = NameIndex(neo_table["name"])
+        database._prefix_indexes = {}
+        database._columns = columns
+        database._by_neo = by_neo
+        database._approach_offsets = neo_table["approach_offsets"]
+        database._summaries = None
+        database._neo_times = None
+        database._neo_time_keys = None
+        database._orbit_trees = {}
+        database._neo_columns = ColumnStore(
+            {
+                name: neo_table[name]
+                for name in NEO_COLUMNS + ORBITAL_COLUMNS
+                if name in neo_table
+            }
         )
-        cols_of_interest = [
-            col
-            for col in matches_pre.columns
-            if col not in ["designation", "approaches", "neo"]
-        ]
-        matches = matches_pre[cols_of_interest]
-        return matches
+        database._partitions = partitions
+        database._kdtree = None
+        database._bitmaps = {}
+        database._interval_tree = None
+        database._sample = None
+        database._day_counts = None
+        database._shared_columns = None
+        return database
+
+    def save_columns(self, directory, partition_by=None):
+        """Save this database into a directory of column files.
+
+        The directory can be opened again with `NEODatabase.from_columns`. With
+        `partition_by="year"`, the approaches of each year are saved in their
+        own partition, and queries on the opened directory skip the years that
+        can't match.
+
+        :param directory: A Path-like object for the directory, which is created if needed.
+        :param partition_by: Either None or "year".
+        """
+        neo_table = {
+            "designation": StringColumn.from_strings([neo.designation for neo in self._neos]),
+            "name": StringColumn.from_strings([neo.name for neo in self._neos]),
+            "diameter": np.array([neo.diameter for neo in self._neos], dtype=np.float64),
+            "hazardous": np.array([bool(neo.hazardous) for neo in self._neos]),
+            **{name: np.asarray(self._neo_columns[name]) for name in self.orbital_columns()},
+        }
+        save_tables(directory, neo_table, self._columns, partition_by=partition_by)
+
+    def orbital_columns(self):
+        """Return the names of the orbital columns loaded into this database.
+
+        :return: A list of `filters.ORBITAL_COLUMNS`, in the order they were loaded.
+        """
+        return [name for name in self._neo_columns.columns if name in ORBITAL_COLUMNS]
+
+    def orbital_nbytes(self):
+        """Return the memory used by each loaded orbital column.
+
+        :return: A dictionary mapping the names of the orbital columns to their sizes, in bytes.
+        """
+        return {name: self._neo_columns[name].nbytes for name in self.orbital_columns()}
+
+    def extra_columns(self):
+        """Return the names of the extra columns of approaches loaded into this database.
+
+        :return: A list of `filters.EXTRA_APPROACH_COLUMNS`, in the order they were loaded.
+        """
+        return [name for name in self._columns.columns if name in EXTRA_APPROACH_COLUMNS]
+
+    def extra_nbytes(self):
+        """Return the memory used by each loaded extra column of approaches.
+
+        :return: A dictionary mapping the names of the extra columns to their sizes, in bytes.
+        """
+        return {name: self._columns[name].nbytes for name in self.extra_columns()}
+
+    def _check_columns(self, filters):
+        """Check that the orbital and extra columns needed by a collection of filters are loaded.
+
+        :param filters: A collection of filters capturing user-specified criteria.
+        :raises UnsupportedCriterionError: If a filter needs a column that isn't loaded.
+        """
+        missing = set(orbital_columns(filters)).difference(self.orbital_columns())
+        # Listing the columns of approaches opens them, so only do it if needed.
+        if extra_columns(filters):
+            missing.update(set(extra_columns(filters)).difference(self.extra_columns()))
+        if missing:
+            raise UnsupportedCriterionError(
+                f"The columns {', '.join(sorted(missing))} aren't loaded."
+            )
+
+    def _resolve_orbital_filters(self, filters):
+        """Replace the filters on orbital elements by a filter on the NEOs they select.
+
+        :param filters: A collection of filters capturing user-specified criteria.
+        :return: A list of filters without orbital filters.
+        :raises UnsupportedCriterionError: If a filter needs a column that isn't loaded.
+        """
+        self._check_columns(filters)
+        return resolve_orbital_filters(filters, self._neo_columns)
+
+    def approach_neo_index(self):
+        """Return the index of the NEO of each close approach.
+
+        :return: A NumPy array aligned with the approaches, holding -1 for unlinked approaches.
+        """
+        return np.fromiter(
+            (self._neos_des_to_idx.get(approach._designation, -1) for approach in self._approaches),
+            dtype=np.int64,
+            count=len(self._approaches),
+        )
+
+    def share_columns(self):
+        """Publish the columns of this database into shared memory.
+
+        The columns are published once and reused by later calls. Other
+        processes can attach to them with `SharedColumnStore.attach(spec)`,
+        where `spec` is the `spec` attribute of the returned store.
+
+        :return: The `SharedColumnStore` of this database.
+        """
+        if self._shared_columns is None:
+            self._shared_columns = SharedColumnStore.publish(self._columns)
+        return self._shared_columns
+
+    def close(self):
+        """Release the shared memory segments published by `share_columns`, if any."""
+        if self._shared_columns is not None:
+            self._shared_columns.close()
+            self._shared_columns = None
 
     def get_neo_from_idx(self, idx):
         """Return NEO via given index.
@@ -100,33 +557,172 @@ class NEODatabase:
         Not every NEO in the data set has a name. No NEOs are associated with
         the empty string nor with the `None` singleton.
 
-        The matching is exact - check for spelling and capitalization if no
-        match is found.
+        An exact match is preferred, but the name can also differ in case. For
+        misspelled names, see `search_neos_by_name`.
 
         :param name: The name, as a string, of the NEO to search for.
         :return: The `NearEarthObject` with the desired name, or `None`.
         """
-        for ineligible_key in ["", "None"]:
-            _ = self._neos_name_to_idx.pop(ineligible_key, "")
-        index = self._neos_name_to_idx.get(name, None)
+        return self.get_neo_from_idx(self._names.get(name))
 
-        return self.get_neo_from_idx(index)
+    def search_neos_by_name(self, name, k=5):
+        """Find the NEOs whose names are most similar to a possibly misspelled name.
+
+        The names are ranked by the trigrams they share with the given name,
+        with the trigram index built when the database is loaded.
+
+        :param name: The name, as a string, to search for.
+        :param k: The maximum number of NEOs to return.
+        :return: A list of `(NearEarthObject, similarity)` tuples, most similar first,
+            with similarities between 0 and 1.
+        """
+        return [(self._neos[index], similarity) for index, similarity in self._names.search(name, k)]
+
+    def complete(self, field, prefix, limit=None):
+        """Complete a prefix of the designation or the name of an NEO, ignoring case.
+
+        The first completion of each field builds a `PrefixIndex` of its
+        values, which later completions bisect.
+
+        :param field: One of the `COMPLETION_FIELDS`, "designation" or "name".
+        :param prefix: The prefix to complete.
+        :param limit: The maximum number of completions to return, or None for no limit.
+        :return: A list of the designations or names starting with the prefix.
+        """
+        if field not in COMPLETION_FIELDS:
+            raise ValueError(f"Cannot complete {field!r}. Choose among {', '.join(COMPLETION_FIELDS)}.")
+        if field not in self._prefix_indexes:
+            values = self._neos_des_to_idx if field == "designation" else self._names.exact
+            self._prefix_indexes[field] = PrefixIndex(values)
+        return self._prefix_indexes[field].complete(prefix, limit)
+
+    def similar_neos(self, designation, k=5, angles=False):
+        """Find the NEOs whose orbits are most similar to the orbit of a given NEO.
+
+        Orbits are compared by the distance between their points in the space of
+        `orbit_points`, which compares the semi-major axis, the eccentricity and
+        the inclination, and with `angles` the longitude of the ascending node
+        and the argument of perihelion as well. A `KDTree` of these points is
+        built on first use, so that each search only looks at the orbits near
+        the given one.
+
+        :param designation: The primary designation of the NEO.
+        :param k: The number of similar NEOs to find.
+        :param angles: Whether to compare the node and perihelion angles too.
+        :return: A list of `(NearEarthObject, distance)` tuples, nearest first, not
+            including the NEO itself. It is empty if the NEO isn't found or if its
+            orbit is unknown.
+        :raises ValueError: If the orbital columns to compare aren't loaded.
+        """
+        names = SIMILARITY_ELEMENTS + (SIMILARITY_ANGLES if angles else ())
+        missing = set(names).difference(self.orbital_columns())
+        if missing:
+            raise ValueError(f"The orbital columns {', '.join(sorted(missing))} aren't loaded.")
+        index = self._neos_des_to_idx.get(designation)
+        if index is None:
+            return []
+        if angles not in self._orbit_trees:
+            self._orbit_trees[angles] = KDTree(orbit_points(self._neo_columns, angles))
+        tree = self._orbit_trees[angles]
+        point = tree.points[index]
+        if np.isnan(point).any():
+            return []
+        indices, distances = tree.nearest(point, k + 1)
+        others = indices != index
+        return [
+            (self._neos[int(other)], float(distance))
+            for other, distance in zip(indices[others][:k], distances[others][:k])
+        ]
+
+    def get_summary(self, neo):
+        """Return the summary of the close approaches of an NEO of this database.
 
-    def cross_reference_neos_approaches(self):
-        """Indicate which NEO belongs to which approach and vice versa.
+        The summaries of all NEOs are precomputed, so this takes constant time.
 
-        :return: None
+        :param neo: A `NearEarthObject` of this database.
+        :return: An `NEOSummary`.
         """
-        df = self._matches_df
+        if self._summaries is None:
+            self._summaries = neo_summaries(self._columns, self._by_neo, self._approach_offsets)
+        index = self._neos_des_to_idx[neo.designation]
+        summary = {name: column[index].item() for name, column in self._summaries.items()}
+        if not summary["count"]:
+            return NEOSummary(neo, 0)
+        return NEOSummary(
+            neo,
+            summary["count"],
+            first_time=minutes_to_datetime(summary["first_time"]),
+            last_time=minutes_to_datetime(summary["last_time"]),
+            min_distance=summary["min_distance"],
+            min_distance_time=minutes_to_datetime(summary["min_distance_time"]),
+            max_velocity=summary["max_velocity"],
+        )
 
-        for index_tuple in list(zip(df["idx_neo"], df["idx_approach"])):
-            self._neos[index_tuple[0]].approaches.append(
-                self._approaches[index_tuple[1]]
+    def neo_times(self):
+        """Return the times of the approaches grouped by NEO and sorted by time within each NEO.
+
+        :return: A NumPy array of times in minutes since the epoch, aligned with the `by_neo` order.
+        """
+        if self._neo_times is None:
+            self._neo_times = np.asarray(self._columns["time"])[self._by_neo]
+        return self._neo_times
+
+    def next_approach(self, neo, after):
+        """Find the first close approach of an NEO strictly after a given time.
+
+        The approach is found by bisecting the NEO's time-sorted approaches.
+
+        :param neo: A `NearEarthObject` of this database.
+        :param after: A `datetime`.
+        :return: The next `CloseApproach` of the NEO, or None if there is none.
+        """
+        index = self._neos_des_to_idx[neo.designation]
+        start, stop = self._approach_offsets[index], self._approach_offsets[index + 1]
+        position = start + np.searchsorted(
+            self.neo_times()[start:stop], datetime_to_minutes(after), side="right"
+        )
+        if position == stop:
+            return None
+        return self._approaches[int(self._by_neo[position])]
+
+    def next_approaches(self, after, filters=(), limit=None):
+        """Find the next close approach of each NEO after a given time.
+
+        The NEOs can be selected with NEO-level filters on their diameter,
+        hazardous flag or loaded orbital elements. The next approach of every
+        selected NEO is found at once, by bisecting the approaches sorted by NEO
+        and then by time with a key packing both, so that the cost grows with
+        the number of NEOs rather than with the number of approaches.
+
+        :param after: A `datetime`; only approaches strictly after it are considered.
+        :param filters: A collection of filters on the diameter, hazardous flag or
+            orbit of NEOs.
+        :param limit: The maximum number of approaches to return.
+        :return: A list of `CloseApproach`es, at most one per NEO, sorted by time.
+        :raises ValueError: If a filter doesn't apply to NEOs.
+        """
+        if not supports_neos(filters):
+            raise ValueError(
+                "Only filters on the diameter, hazardous flag or orbit apply to NEOs."
             )
-            self._approaches[index_tuple[1]].neo = self._neos[index_tuple[0]]
-        return
+        self._check_columns(filters)
+        neos = np.flatnonzero(combined_mask(filters, self._neo_columns))
+        if self._neo_time_keys is None:
+            groups = np.repeat(
+                np.arange(len(self._approach_offsets) - 1), np.diff(self._approach_offsets)
+            )
+            self._neo_time_keys = (groups << 40) | (self.neo_times() + _TIME_KEY_OFFSET)
+        keys = (neos << 40) | (datetime_to_minutes(after) + _TIME_KEY_OFFSET)
+        positions = np.searchsorted(self._neo_time_keys, keys, side="right")
+        positions = positions[positions < self._approach_offsets[neos + 1]]
+        indices = self._by_neo[positions]
+        # Approaches at the same time are kept in internal order.
+        indices = indices[np.lexsort((indices, self.neo_times()[positions]))]
+        if limit:
+            indices = indices[:limit]
+        return [self._approaches[int(index)] for index in indices]
 
-    def query(self, filters=()):
+    def query(self, filters=(), limit=None, workers=1, stats=None):
         """Query close approaches to generate those that match a collection of filters.
 
         This generates a stream of `CloseApproach` objects that match all of the
@@ -137,9 +733,613 @@ class NEODatabase:
         The `CloseApproach` objects are generated in internal order, which isn't
         guaranteed to be sorted meaningfully, although is often sorted by time.
 
+        If every filter supports columnar evaluation (see `filters.supports_columns`),
+        the filters are evaluated on the columns of this database rather than on
+        each `CloseApproach`. When they bound at least two of the time, distance
+        and velocity, the k-d tree of an in-memory database finds the candidate
+        approaches, and the filters are only evaluated on those. Filters on the
+        hazardous flag or the diameter narrow the candidates with the bitmaps of
+        an in-memory database, and filters on the uncertainty interval of the
+        distance with its interval tree.
+
+        If `limit` is given, the search stops as soon as that many matches have
+        been produced, so no work is spent on approaches past the last match. As
+        with `filters.limit`, a `limit` of 0 or None doesn't limit the results.
+        The indexes are an exception: they find all their candidates before any
+        is evaluated, so the limit only spares the evaluation of the candidates
+        past the block of candidates holding the last match. The cost of an
+        index search grows with its number of candidates, which is kept small
+        by the thresholds of each index.
+
+        If `workers` is greater than 1, the close approaches are split into
+        contiguous shards which are scanned by a pool of worker processes. The
+        results are merged back in internal order. If every filter supports
+        columnar evaluation, the workers attach to the columns published with
+        `share_columns`; otherwise they are forked and inherit the approaches.
+
+        Filters on orbital elements are first evaluated on the loaded orbital
+        columns of the NEOs, and replaced by a filter on the NEOs they select.
+
+        If `stats` is given, it is filled in as the query runs.
+
         :param filters: A collection of filters capturing user-specified criteria.
+        :param limit: The maximum number of matches to produce.
+        :param workers: The number of worker processes used to scan the approaches.
+        :param stats: A `QueryStats` in which to count the work done by this query.
         :return: A stream of matching `CloseApproach` objects.
+        :raises UnsupportedCriterionError: If a filter needs a column that isn't loaded.
+        """
+        for index in self._query_indices(filters, limit, workers, stats):
+            yield self._approaches[index]
+
+    def query_columns(self, filters=(), names=(), limit=None, workers=1, stats=None):
+        """Query close approaches like `query`, along with some of their columns.
+
+        This is how the extra fields of close approaches, which aren't
+        attributes of `CloseApproach` objects, are exported with them.
+
+        :param filters: A collection of filters capturing user-specified criteria.
+        :param names: The names of columns of approaches, such as "dist_min".
+        :param limit: The maximum number of matches to produce.
+        :param workers: The number of worker processes used to scan the approaches.
+        :param stats: A `QueryStats` in which to count the work done by this query.
+        :return: A stream of tuples of a matching `CloseApproach` and a dictionary
+            mapping the names to its values, with None for missing values.
+        :raises UnsupportedCriterionError: If a filter or name needs a column that isn't loaded.
+        """
+        missing = set(names).difference(self._columns.columns)
+        if missing:
+            raise UnsupportedCriterionError(
+                f"The columns {', '.join(sorted(missing))} aren't loaded."
+            )
+        columns = {name: self._columns[name] for name in names}
+        for index in self._query_indices(filters, limit, workers, stats):
+            values = {name: column[index].item() for name, column in columns.items()}
+            yield self._approaches[index], {
+                name: None if value != value else value for name, value in values.items()
+            }
+
+    def _query_indices(self, filters, limit=None, workers=1, stats=None):
+        """Generate the indices of the approaches that match a collection of filters, for `query`.
+
+        :param filters: A collection of filters capturing user-specified criteria.
+        :param limit: The maximum number of matches to produce.
+        :param workers: The number of worker processes used to scan the approaches.
+        :param stats: A `QueryStats` in which to count the work done by this query.
+        :return: A stream of approach indices, in internal order.
+        """
+        if stats is None:
+            stats = QueryStats()
+        filters = self._resolve_orbital_filters(filters)
+        if workers > 1 and supports_columns(filters):
+            matches = self._parallel_column_scan(filters, workers)
+        elif workers > 1 and "fork" in multiprocessing.get_all_start_methods():
+            matches = self._parallel_scan(filters, workers)
+        elif supports_columns(filters):
+            matches = (
+                int(index)
+                for indices in self._column_matches(filters, stats)
+                for index in indices
+            )
+        else:
+            matches = self._scan(filters)
+
+        for index in matches:
+            yield index
+            stats.matches += 1
+            if limit and stats.matches >= limit:
+                return
+
+    def _scan(self, filters):
+        """Generate the indices of the matching approaches with a sequential scan.
+
+        :param filters: A collection of filters capturing user-specified criteria.
+        :return: A stream of approach indices, in internal order.
+        """
+        for index, approach in enumerate(self._approaches):
+            if all(filter(approach) for filter in filters):
+                yield index
+
+    def count(self, filters=(), workers=1, stats=None):
+        """Count the close approaches that match a collection of filters.
+
+        If every filter supports columnar evaluation, the matches are counted on
+        the columns and the indexes, without creating any `CloseApproach`. A
+        count of the approaches of hazardous (or harmless) NEOs is read off their
+        bitmap.
+
+        :param filters: A collection of filters capturing user-specified criteria.
+        :param workers: The number of worker processes used to scan the approaches.
+        :param stats: A `QueryStats` in which to count the work done by this query.
+        :return: The number of matching close approaches.
+        """
+        if stats is None:
+            stats = QueryStats()
+        filters = self._resolve_orbital_filters(filters)
+        if not supports_columns(filters):
+            return sum(1 for _ in self.query(filters, workers=workers, stats=stats))
+        if filters and all(filter.column == "hazardous" for filter in filters):
+            bitmap = self._bitmap_candidates(filter_intervals(filters))
+        else:
+            bitmap = None
+        if bitmap is not None:
+            count = bitmap.count()
+        else:
+            count = self._day_count(filters)
+        if count is None:
+            count = sum(len(indices) for indices in self._column_matches(filters, stats))
+        stats.matches += count
+        return count
+
+    def exists(self, filters=(), stats=None):
+        """Check whether any close approach matches a collection of filters.
+
+        The search stops at the first match.
+
+        :param filters: A collection of filters capturing user-specified criteria.
+        :param stats: A `QueryStats` in which to count the work done by this query.
+        :return: True if some close approach matches all of the filters.
+        """
+        if stats is None:
+            stats = QueryStats()
+        filters = self._resolve_orbital_filters(filters)
+        if not supports_columns(filters):
+            return any(True for _ in self.query(filters, limit=1, stats=stats))
+        for indices in self._column_matches(filters, stats):
+            if len(indices):
+                stats.matches += 1
+                return True
+        return False
+
+    def _build_day_counts(self):
+        """Build the cumulative per-day counts of the close approaches.
+
+        :return: An `indexes.DayCounts`.
+        """
+        return DayCounts(
+            self._columns["time"] // MINUTES_PER_DAY,
+            {
+                "hazardous": self._columns["hazardous"],
+                "diameter_known": ~np.isnan(self._columns["diameter"]),
+            },
+        )
+
+    def _day_count(self, filters):
+        """Count the matches of filters on the date and the hazardous flag with the per-day counts.
+
+        :param filters: A collection of filters that support `mask`.
+        :return: The number of matches, or None if some filter is on another column or
+            the per-day counts aren't built.
+        """
+        if self._day_counts is None or not filters:
+            return None
+        if any(filter.column not in ("time", "hazardous") for filter in filters):
+            return None
+        intervals = filter_intervals(filters)
+        if "time" not in intervals:
+            return None
+        # Floor division would turn unbounded ends into NaN.
+        first, last = (
+            end if math.isinf(end) else end // MINUTES_PER_DAY for end in intervals["time"]
+        )
+        hazardous_low, hazardous_high = intervals.get("hazardous", (False, True))
+        flags = [flag for flag in (False, True) if hazardous_low <= flag <= hazardous_high]
+        if not flags:
+            return 0
+        total = self._day_counts.count(first, last)
+        if flags == [False, True]:
+            return total
+        hazardous = self._day_counts.count(first, last, "hazardous")
+        return hazardous if flags == [True] else total - hazardous
+
+    def timeseries(self, start_date=None, end_date=None, interval="day"):
+        """Count the close approaches per day, week or month between two dates.
+
+        The counts are differences of cumulative per-day counts, so no close
+        approach is looked at. The per-day counts of an in-memory database are
+        built when it is loaded, and those of a mapped database on first use.
+
+        :param start_date: The first `date`, or None for the date of the first approach.
+        :param end_date: The last `date`, or None for the date of the last approach.
+        :param interval: One of `aggregate.TIME_SERIES_INTERVALS`.
+        :return: A list of dictionaries, one per period, as produced by `aggregate.time_series`.
+        """
+        if self._day_counts is None:
+            self._day_counts = self._build_day_counts()
+        day_counts = self._day_counts
+        if not len(self._columns):
+            return []
+        first = date_to_days(start_date) if start_date else day_counts.first_day
+        last = date_to_days(end_date) if end_date else day_counts.last_day
+        return time_series(day_counts, first, last, interval)
+
+    def estimate(self, filters=(), budget=None, confidence=0.95):
+        """Estimate how many close approaches match a collection of filters, and their distribution.
+
+        The filters are only evaluated on a stratified random sample of the
+        approaches (see `sampling.ApproachSample`), so the cost doesn't grow
+        with the number of approaches. The sample of an in-memory database is
+        drawn when it is loaded, and that of a mapped database on first use.
+
+        :param filters: A collection of filters capturing user-specified criteria.
+        :param budget: The maximum time to spend evaluating the sample, in seconds, or None.
+        :param confidence: The confidence level of the interval of the estimated count.
+        :return: A `sampling.Estimate`.
+        :raises UnsupportedCriterionError: If a filter doesn't support columnar evaluation.
+        """
+        filters = self._resolve_orbital_filters(filters)
+        if not supports_columns(filters):
+            raise UnsupportedCriterionError("Only filters on columns can be estimated.")
+        if self._sample is None:
+            self._sample = ApproachSample.draw(self._columns)
+        return self._sample.estimate(filters, budget=budget, confidence=confidence)
+
+    def aggregate(self, filters=(), group_by=("neo",), metrics=DEFAULT_METRICS, stats=None):
+        """Group the close approaches that match a collection of filters, and summarize each group.
+
+        The matches are found as with `count`, and the groups and their metrics
+        are computed on the columns of the matches with `aggregate.aggregate`.
+
+        :param filters: A collection of filters capturing user-specified criteria.
+        :param group_by: A sequence of group keys among `aggregate.GROUP_KEYS`.
+        :param metrics: A sequence of metric names, such as "count" or "min_distance".
+        :param stats: A `QueryStats` in which to count the work done by this query.
+        :return: A list of dictionaries, one per group, mapping keys and metrics to values.
+        """
+        indices = self._match_indices(filters, stats)
+        return aggregate_rows(self._columns.take(indices), self._neos, group_by, metrics)
+
+    def clusters(self, filters=(), window=360, min_size=3, stats=None):
+        """Find bursts of close approaches of several NEOs within a short time of each other.
+
+        The matching approaches are swept in time order with a window of the
+        given length; every window holding at least `min_size` approaches is
+        dense, and overlapping dense windows are merged into one cluster. A
+        cluster is kept if it involves at least `min_size` distinct NEOs.
+
+        :param filters: A collection of filters capturing user-specified criteria.
+        :param window: The length of the sliding window, in minutes.
+        :param min_size: The minimum number of approaches (and NEOs) in a cluster.
+        :param stats: A `QueryStats` in which to count the work done by this query.
+        :return: A list of dictionaries describing the clusters, sorted by time.
+        """
+        indices = self._match_indices(filters, stats)
+        times = np.asarray(self._columns["time"])[indices]
+        # The matches are in internal order, which may not be sorted by time.
+        order = np.argsort(times, kind="stable")
+        indices, times = indices[order], times[order]
+        distances = np.asarray(self._columns["distance"])[indices]
+        neo_indices = np.asarray(self._columns["neo_index"])[indices]
+        rows = []
+        for start, stop in time_clusters(times, window, min_size):
+            # The distinct NEOs of the cluster, in the order of their first approach.
+            neos, first = np.unique(neo_indices[start:stop], return_index=True)
+            neos, first = neos[neos >= 0], first[neos >= 0]
+            if len(neos) < min_size:
+                continue
+            designations = [self._neos[int(neo)].designation for neo in neos[np.argsort(first)]]
+            rows.append(
+                {
+                    "start": datetime_to_str(minutes_to_datetime(times[start])),
+                    "end": datetime_to_str(minutes_to_datetime(times[stop - 1])),
+                    "approaches": stop - start,
+                    "neos": len(designations),
+                    "min_distance": float(distances[start:stop].min()),
+                    "designations": ";".join(designations),
+                }
+            )
+        return rows
+
+    def histogram2d(
+        self,
+        filters=(),
+        distance_bins=50,
+        velocity_bins=50,
+        distance_range=None,
+        velocity_range=None,
+        log_distance=False,
+        log_velocity=False,
+        stats=None,
+    ):
+        """Count the close approaches that match a collection of filters in a grid of distance and velocity.
+
+        The matches are found as with `count`, and their distances and
+        velocities are binned at once with `aggregate.histogram2d`, without
+        creating any `CloseApproach`. By default, the bins span the distances
+        and velocities of the matches.
+
+        :param filters: A collection of filters capturing user-specified criteria.
+        :param distance_bins: The number of bins of distance.
+        :param velocity_bins: The number of bins of velocity.
+        :param distance_range: A `(low, high)` tuple of the ends of the bins of distance, or None.
+        :param velocity_range: A `(low, high)` tuple of the ends of the bins of velocity, or None.
+        :param log_distance: Whether the bins of distance are on a logarithmic scale.
+        :param log_velocity: Whether the bins of velocity are on a logarithmic scale.
+        :param stats: A `QueryStats` in which to count the work done by this query.
+        :return: A tuple of the NumPy arrays of the edges of the bins of distance and of
+            velocity, and of the 2-D NumPy array of the counts of the bins.
+        :raises ValueError: If a range of bins is empty, or not positive on a logarithmic scale.
+        """
+        indices = self._match_indices(filters, stats)
+        distances = np.asarray(self._columns["distance"])[indices]
+        velocities = np.asarray(self._columns["velocity"])[indices]
+        distance_edges = bin_edges(distances, distance_bins, distance_range, log_distance)
+        velocity_edges = bin_edges(velocities, velocity_bins, velocity_range, log_velocity)
+        return distance_edges, velocity_edges, histogram2d(
+            distances, velocities, distance_edges, velocity_edges
+        )
+
+    def _match_indices(self, filters, stats=None):
+        """Return the indices of the close approaches that match a collection of filters.
+
+        :param filters: A collection of filters capturing user-specified criteria.
+        :param stats: A `QueryStats` in which to count the work done by this query.
+        :return: A sorted NumPy array of approach indices.
+        """
+        if stats is None:
+            stats = QueryStats()
+        filters = self._resolve_orbital_filters(filters)
+        if supports_columns(filters):
+            matches = list(self._column_matches(filters, stats))
+        else:
+            matches = [np.fromiter(self._scan(filters), dtype=np.int64)]
+        indices = np.concatenate([np.zeros(0, dtype=np.int64)] + matches)
+        stats.matches += len(indices)
+        return indices
+
+    def _column_matches(self, filters, stats):
+        """Generate the indices of the matching approaches, evaluating the filters on the columns.
+
+        The candidates found by the indexes are evaluated if they apply, and
+        the partitions and blocks that may match are scanned otherwise. The
+        indices are generated one NumPy array at a time, in internal order, so
+        that a limited query stops after the array containing its last match.
+
+        :param filters: A collection of filters that support `mask`.
+        :param stats: A `QueryStats` in which to count the work done.
+        :return: A stream of sorted NumPy arrays of the indices of matching approaches.
+        """
+        candidates = self._index_candidates(filters)
+        if candidates is not None:
+            return self._candidate_matches(filters, candidates, stats)
+        return self._block_matches(filters, stats)
+
+    def _block_matches(self, filters, stats):
+        """Generate the indices of the matching approaches, one block at a time.
+
+        Partitions whose ranges can't satisfy the filters are skipped, and so
+        are the blocks of a partition whose ranges in its `ZoneMap` can't.
+
+        :param filters: A collection of filters that support `mask`.
+        :param stats: A `QueryStats` in which to count scanned and skipped blocks.
+        :return: A stream of sorted NumPy arrays of the indices of matching approaches.
+        """
+        intervals = filter_intervals(filters)
+        for partition in self._partitions:
+            if not partition.may_match(intervals):
+                stats.partitions_skipped += 1
+                stats.blocks_skipped += partition.n_blocks
+                continue
+            stats.partitions_scanned += 1
+            candidates = partition.zone_map.candidate_blocks(intervals)
+            for block_number, candidate in enumerate(candidates):
+                if not candidate:
+                    stats.blocks_skipped += 1
+                    continue
+                stats.blocks_scanned += 1
+                start = block_number * BLOCK_SIZE
+                block = partition.columns.slice(start, start + BLOCK_SIZE)
+                yield partition.start + start + np.flatnonzero(combined_mask(filters, block))
+
+    def _index_candidates(self, filters):
+        """Find the candidate approaches for some filters with the indexes, if worthwhile.
+
+        :param filters: A collection of filters that support `mask`.
+        :return: A sorted NumPy array of the indices of the candidates, or None for a block scan.
+        """
+        intervals = filter_intervals(filters)
+        candidates = self._kdtree_candidates(intervals)
+        bands = self._interval_candidates(filters)
+        if bands is not None:
+            candidates = (
+                bands if candidates is None
+                else np.intersect1d(candidates, bands, assume_unique=True)
+            )
+        bitmap = self._bitmap_candidates(intervals)
+        if bitmap is None:
+            return candidates
+        if candidates is not None:
+            return candidates[bitmap.contains(candidates)]
+        if bitmap.count() <= BITMAP_MAX_FRACTION * len(bitmap):
+            return bitmap.nonzero()
+        return None
+
+    def _bitmap_candidates(self, intervals):
+        """Return the intersection of the bitmaps selected by some intervals, or None.
+
+        An interval on the hazardous flag selects the approaches of hazardous or
+        of harmless NEOs, and an interval on the diameter selects the approaches
+        of NEOs with a known diameter, since an unknown diameter never matches.
+
+        :param intervals: A dictionary mapping column names to closed `(low, high)` intervals.
+        :return: A `Bitmap`, or None if no bitmap applies.
+        """
+        if not self._bitmaps:
+            return None
+        selected = []
+        low, high = intervals.get("hazardous", (None, None))
+        if low is not None and low == high:
+            selected.append(self._bitmaps["hazardous" if low else "not_hazardous"])
+        if "diameter" in intervals:
+            selected.append(self._bitmaps["diameter_known"])
+        if not selected:
+            return None
+        bitmap = selected[0]
+        for other in selected[1:]:
+            bitmap = bitmap & other
+        return bitmap
+
+    def _interval_candidates(self, filters):
+        """Find the candidate approaches for filters on the uncertainty of the distance, if worthwhile.
+
+        The interval tree answers the first `DistanceOverlapFilter` or
+        `DistanceWithinFilter` that selects few enough approaches.
+
+        :param filters: A collection of filters that support `mask`.
+        :return: A sorted NumPy array of the indices of the candidates, or None.
+        """
+        if self._interval_tree is None:
+            return None
+        for filter in filters:
+            if isinstance(filter, DistanceOverlapFilter):
+                candidates = self._interval_tree.overlapping(*filter.value)
+            elif isinstance(filter, DistanceWithinFilter):
+                candidates = self._interval_tree.within(*filter.value)
+            else:
+                continue
+            if len(candidates) <= INTERVAL_MAX_FRACTION * len(self._columns):
+                return candidates
+        return None
+
+    def _kdtree_candidates(self, intervals):
+        """Find the candidate approaches for some intervals with the k-d tree, if worthwhile.
+
+        The k-d tree is only searched if the intervals bound at least two of its
+        columns, since a bound on a single column is handled about as well by
+        a block scan with the `ZoneMap`, and the search is abandoned if the
+        box of the intervals cuts through too many leaves.
+
+        :param intervals: A dictionary mapping column names to closed `(low, high)` intervals.
+        :return: A sorted NumPy array of the indices of the candidates, or None.
+        """
+        if self._kdtree is None:
+            return None
+        if sum(name in intervals for name in KDTREE_COLUMNS) < 2:
+            return None
+        bounds = [intervals.get(name, (-np.inf, np.inf)) for name in KDTREE_COLUMNS]
+        return self._kdtree.query(
+            [low for low, _ in bounds],
+            [high for _, high in bounds],
+            max_leaves=max(1, int(self._kdtree.n_leaves * KDTREE_MAX_LEAF_FRACTION)),
+        )
+
+    def _candidate_matches(self, filters, candidates, stats):
+        """Generate the indices of the matching approaches among candidates found by an index.
+
+        The index only answers the ranges on the columns it covers, so every
+        filter is evaluated again on the candidates, one block of them at a time.
+
+        :param filters: A collection of filters that support `mask`.
+        :param candidates: A sorted NumPy array of the indices of the candidates.
+        :param stats: A `QueryStats` in which to count the candidates.
+        :return: A stream of sorted NumPy arrays of the indices of matching approaches.
+        """
+        for start in range(0, len(candidates), BLOCK_SIZE):
+            indices = candidates[start:start + BLOCK_SIZE]
+            stats.index_candidates += len(indices)
+            yield indices[combined_mask(filters, self._columns.take(indices))]
+
+    def _parallel_scan(self, filters, workers):
+        """Generate the indices of the matching approaches with a pool of forked worker processes.
+
+        The approaches are split into a few shards per worker, so that a
+        limited query can stop the pool after the first shards come back.
+
+        :param filters: A collection of filters capturing user-specified criteria.
+        :param workers: The number of worker processes.
+        :return: A stream of approach indices, in internal order.
+        """
+        shards = split_into_shards(len(self._approaches), 4 * workers)
+        context = multiprocessing.get_context("fork")
+        _WORKER_STATE.update(approaches=self._approaches, filters=list(filters))
+        try:
+            pool = context.Pool(workers)
+        finally:
+            _WORKER_STATE.clear()
+        with pool:
+            for indices in pool.imap(_scan_shard, shards):
+                yield from indices
+
+    def _parallel_column_scan(self, filters, workers):
+        """Generate the indices of the matching approaches with workers attached to the shared columns.
+
+        :param filters: A collection of filters that support `mask`.
+        :param workers: The number of worker processes.
+        :return: A stream of approach indices, in internal order.
+        """
+        shared = self.share_columns()
+        shards = split_into_shards(len(shared), 4 * workers)
+        context = multiprocessing.get_context(_COLUMN_WORKER_START_METHOD)
+        if _COLUMN_WORKER_START_METHOD == "forkserver":
+            context.set_forkserver_preload(["database"])
+        with context.Pool(
+            workers, initializer=_attach_columns, initargs=(shared.spec, list(filters))
+        ) as pool:
+            for indices in pool.imap(_scan_column_shard, shards):
+                yield from indices.tolist()
+
+
+class ApproachStream:
+    """Query close approaches straight from a JSON file, one chunk at a time.
+
+    An `ApproachStream` answers the same queries as an `NEODatabase`, but never
+    holds more than one chunk of close approaches in memory: it reads the file
+    in chunks with `extract.load_approach_chunks`, joins each chunk against an
+    index of the (comparatively few) NEOs, and generates the matches. Matching
+    approaches reference their NEO, but the NEOs don't collect their approaches.
+    """
+
+    def __init__(self, neos, cad_json_path, chunk_size=100_000):
+        """Create a new `ApproachStream`.
+
+        :param neos: A collection of `NearEarthObject`s.
+        :param cad_json_path: A path to a JSON file containing data about close approaches.
+        :param chunk_size: The maximum number of `CloseApproach`es held in memory at once.
+        """
+        self._neos_by_designation = {neo.designation: neo for neo in neos}
+        self.cad_json_path = cad_json_path
+        self.chunk_size = chunk_size
+
+    def query(self, filters=(), limit=None, workers=1, stats=None):
+        """Stream the close approaches in the file that match a collection of filters.
+
+        The approaches are generated in the order of the file, which is the
+        internal order of an `NEODatabase` loaded from the same file. The
+        `workers` argument is accepted for compatibility with
+        `NEODatabase.query`, but the file is always read sequentially.
+
+        :param filters: A collection of filters capturing user-specified criteria.
+        :param limit: The maximum number of matches to produce.
+        :param workers: Ignored.
+        :param stats: A `QueryStats` in which to count the matches.
+        :return: A stream of matching `CloseApproach` objects.
+        """
+        if stats is None:
+            stats = QueryStats()
+        for chunk in load_approach_chunks(self.cad_json_path, self.chunk_size):
+            for approach in chunk:
+                approach.neo = self._neos_by_designation.get(approach._designation)
+                if all(filter(approach) for filter in filters):
+                    yield approach
+                    stats.matches += 1
+                    if limit and stats.matches >= limit:
+                        return
+
+    def count(self, filters=(), workers=1, stats=None):
+        """Count the close approaches in the file that match a collection of filters.
+
+        :param filters: A collection of filters capturing user-specified criteria.
+        :param workers: Ignored.
+        :param stats: A `QueryStats` in which to count the matches.
+        :return: The number of matching close approaches.
+        """
+        return sum(1 for _ in self.query(filters, stats=stats))
+
+    def exists(self, filters=(), stats=None):
+        """Check whether any close approach in the file matches a collection of filters.
+
+        :param filters: A collection of filters capturing user-specified criteria.
+        :param stats: A `QueryStats` in which to count the matches.
+        :return: True if some close approach matches all of the filters.
         """
-        for approach in self._approaches:
-            if all([filter(approach) for filter in filters]):
-                yield approach
+        return any(True for _ in self.query(filters, limit=1, stats=stats))
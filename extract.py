@@ -7,6 +7,18 @@ The `load_approaches` function extracts close approach data from a JSON file,
 formatted as described in the project instructions, into a collection of
 `CloseApproach` objects.
 
+The `load_orbital_columns` function extracts chosen orbital elements, such as
+the MOID or the perihelion distance, from the same CSV file as the NEOs, into
+NumPy arrays aligned with the collection returned by `load_neos`.
+
+The `load_approach_columns` function extracts the other fields of close
+approaches, such as the uncertainty bounds of the distance, into NumPy arrays
+aligned with the collection returned by `load_approaches`.
+
+The `load_approach_chunks` function streams the same close approaches in chunks
+of bounded size, without ever reading the whole JSON file into memory, for data
+sets that are too large to hold as a collection of `CloseApproach` objects.
+
 The main module calls these functions with the arguments provided at the command
 line, and uses the resulting collections to build an `NEODatabase`.
 
@@ -15,6 +27,8 @@ You'll edit this file in Task 2.
 import csv
 import json
 
+import numpy as np
+
 from models import NearEarthObject, CloseApproach
 
 
@@ -47,6 +61,43 @@ def load_neos(neo_csv_path="data//neos.csv"):
     return neolist
 
 
+def load_orbital_columns(names, neo_csv_path="data//neos.csv"):
+    """Read chosen orbital elements of near-Earth objects from a CSV file.
+
+    Each element is read into a float64 NumPy array, with NaN for the NEOs
+    where it is blank, in the same order as the NEOs returned by `load_neos`.
+
+    :param names: A collection of column names of the CSV file, such as "moid".
+    :param neo_csv_path: A path to a CSV file containing data about near-Earth objects.
+    :return: A dictionary mapping each name to a NumPy array, aligned with the NEOs.
+    :raises ValueError: If some name isn't a column of the CSV file.
+    """
+    names = list(dict.fromkeys(names))
+    if not names:
+        return {}
+    with open(neo_csv_path) as csvfile:
+        neofile = csv.reader(csvfile, delimiter=",")
+        header = next(neofile)
+        indices = [header.index(name) for name in names]
+        values = [[] for _ in names]
+        for row in neofile:
+            for column, index in zip(values, indices):
+                column.append(row[index])
+    return {
+        name: np.array([float(value) if value else np.nan for value in column], dtype=np.float64)
+        for name, column in zip(names, values)
+    }
+
+
+# The fields of a close approach in `cad.json`, by `CloseApproach` attribute.
+APPROACH_FIELDS = {
+    "_designation": "des",
+    "time": "cd",
+    "distance": "dist",
+    "velocity": "v_rel",
+}
+
+
 def load_approaches(cad_json_path="data/cad.json"):
     """Read close approach data from a JSON file.
 
@@ -57,19 +108,159 @@ def load_approaches(cad_json_path="data/cad.json"):
         close_app = json.load(json_file)
 
     cap_dict = {
-        "designation": "des",
-        "time": "cd",
-        "distance": "dist",
-        "velocity": "v_rel",
+        key: close_app["fields"].index(field) for key, field in APPROACH_FIELDS.items()
     }
 
-    for feature in cap_dict.keys():
-        cap_dict[feature] = close_app["fields"].index(cap_dict[feature])
-
-    cap_dict["_designation"] = cap_dict.pop("designation")
-
     close_approach_coll = [
         CloseApproach(**{key: element[ind] for key, ind in cap_dict.items()})
         for element in close_app["data"]
     ]
     return close_approach_coll
+
+
+def load_approach_columns(names, cad_json_path="data/cad.json"):
+    """Read chosen fields of close approaches from a JSON file.
+
+    Each field is read into a float64 NumPy array, with NaN where it is missing,
+    in the same order as the close approaches returned by `load_approaches`.
+
+    :param names: A collection of field names of the JSON file, such as "dist_min".
+    :param cad_json_path: A path to a JSON file containing data about close approaches.
+    :return: A dictionary mapping each name to a NumPy array, aligned with the approaches.
+    :raises ValueError: If some name isn't a field of the JSON file.
+    """
+    names = list(dict.fromkeys(names))
+    if not names:
+        return {}
+    with open(cad_json_path) as json_file:
+        close_app = json.load(json_file)
+    indices = [close_app["fields"].index(name) for name in names]
+    return {
+        name: np.array(
+            [float(element[index]) if element[index] else np.nan for element in close_app["data"]],
+            dtype=np.float64,
+        )
+        for name, index in zip(names, indices)
+    }
+
+
+class _JSONStream:
+    """Read JSON values one at a time from a file, holding only a small buffer."""
+
+    def __init__(self, file, buffer_size=1 << 16):
+        """Create a new `_JSONStream` reading from an open text file."""
+        self.file = file
+        self.buffer_size = buffer_size
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+        self.decoder = json.JSONDecoder()
+
+    def _fill(self):
+        """Append the next block of the file to the unread part of the buffer."""
+        block = self.file.read(self.buffer_size)
+        self.buffer = self.buffer[self.pos :] + block
+        self.pos = 0
+        self.eof = not block
+        return bool(block)
+
+    def peek(self):
+        """Skip whitespace and return the next character, or "" at the end of the file."""
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos].isspace():
+                self.pos += 1
+            if self.pos < len(self.buffer) or not self._fill():
+                return self.buffer[self.pos : self.pos + 1]
+
+    def expect(self, char):
+        """Consume the next non-whitespace character, which must be `char`."""
+        if self.peek() != char:
+            raise ValueError(f"Malformed JSON: expected {char!r} at {self.buffer[self.pos:self.pos + 20]!r}.")
+        self.pos += 1
+
+    def value(self):
+        """Decode and consume the next JSON value."""
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                if not self._fill():
+                    raise
+                continue
+            # A number that ends with the buffer might continue in the next block.
+            if end < len(self.buffer) or self.eof or not self._fill():
+                self.pos = end
+                return value
+            self.peek()
+
+    def array(self):
+        """Generate the elements of the next JSON array, one at a time."""
+        self.expect("[")
+        if self.peek() == "]":
+            self.pos += 1
+            return
+        while True:
+            yield self.value()
+            if self.peek() == ",":
+                self.pos += 1
+            else:
+                self.expect("]")
+                return
+
+    def seek_key(self, key):
+        """Position the stream at the value of a key of the top-level JSON object.
+
+        The values of other keys are skipped. Arrays are skipped element by
+        element, so that a large array is never held in memory.
+
+        :param key: The key to look for.
+        :return: Whether the key was found.
+        """
+        self.expect("{")
+        while self.peek() not in ("}", ""):
+            current = self.value()
+            self.expect(":")
+            if current == key:
+                return True
+            if self.peek() == "[":
+                for _ in self.array():
+                    pass
+            else:
+                self.value()
+            if self.peek() == ",":
+                self.pos += 1
+        return False
+
+
+def load_approach_chunks(cad_json_path="data/cad.json", chunk_size=100_000):
+    """Read close approach data from a JSON file in chunks of bounded size.
+
+    The `fields` of the file are read first. If they come after the `data` in
+    the file, the data is skipped over once to find them.
+
+    :param cad_json_path: A path to a JSON file containing data about close approaches.
+    :param chunk_size: The maximum number of `CloseApproach`es in a chunk.
+    :yield: Lists of at most `chunk_size` `CloseApproach`es, in the order of the file.
+    """
+    with open(cad_json_path) as json_file:
+        stream = _JSONStream(json_file)
+        if not stream.seek_key("fields"):
+            raise ValueError(f"{cad_json_path} has no close approach fields.")
+        fields = stream.value()
+    indices = {key: fields.index(field) for key, field in APPROACH_FIELDS.items()}
+
+    with open(cad_json_path) as json_file:
+        stream = _JSONStream(json_file)
+        if not stream.seek_key("data"):
+            return
+        chunk = []
+        for element in stream.array():
+            chunk.append(
+                CloseApproach(**{key: element[ind] for key, ind in indices.items()})
+            )
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
@@ -11,14 +11,39 @@ from a comparator (from the `operator` module), a reference value, and a class
 method `get` that subclasses can override to fetch an attribute of interest from
 the supplied `CloseApproach`.
 
+Filters whose attribute is stored in a `columns.ColumnStore` name that column
+in a `column` class attribute, and can be evaluated on whole columns at once with
+`mask` - the vectorized counterpart of calling the filter on a single approach.
+The `filter_intervals` function summarizes such filters as the range of values
+each column must fall into, which lets the database skip data that can't match.
+
 The `limit` function simply limits the maximum number of values produced by an
 iterator.
 
 You'll edit this file in Tasks 3a and 3c.
 """
+import math
 import operator
 import itertools
 
+import numpy as np
+
+from helpers import date_to_days, MINUTES_PER_DAY
+
+
+# The columns that describe an NEO rather than one of its close approaches.
+NEO_COLUMNS = ("diameter", "hazardous")
+
+# The orbital elements and physical parameters of NEOs that can be loaded from
+# the NEO file as columns of NEOs (see `extract.load_orbital_columns`).
+ORBITAL_COLUMNS = (
+    "a", "e", "i", "q", "ad", "om", "w", "ma", "n", "per_y", "moid", "moid_ld", "H", "albedo",
+)
+
+# The fields of close approaches that can be loaded from the close approach
+# file as extra columns of approaches (see `extract.load_approach_columns`).
+EXTRA_APPROACH_COLUMNS = ("jd", "dist_min", "dist_max", "v_inf", "h")
+
 
 class UnsupportedCriterionError(NotImplementedError):
     """A filter criterion is unsupported."""
@@ -38,8 +63,15 @@ class AttributeFilter:
 
     Concrete subclasses can override the `get` classmethod to provide custom
     behavior to fetch a desired attribute from the given `CloseApproach`.
+
+    Subclasses that set `column` can also be evaluated on a `ColumnStore` with
+    `mask`. They can override `get_column` and `encode` to convert the column
+    and the reference value into comparable units.
     """
 
+    # The name of the `ColumnStore` column holding this filter's attribute, if any.
+    column = None
+
     def __init__(self, op, value):
         """Construct a new `AttributeFilter` from an binary predicate and a reference value.
 
@@ -70,6 +102,44 @@ class AttributeFilter:
         """
         raise UnsupportedCriterionError
 
+    @classmethod
+    def get_column(cls, columns):
+        """Get the column of interest from a `ColumnStore`.
+
+        :param columns: A `ColumnStore` on which to evaluate this filter.
+        :return: A NumPy array, comparable to `encode(self.value)` via `self.op`.
+        """
+        if cls.column is None:
+            raise UnsupportedCriterionError
+        return columns[cls.column]
+
+    @classmethod
+    def encode(cls, value):
+        """Convert a reference value into the units of the column of interest."""
+        return value
+
+    def mask(self, columns):
+        """Evaluate this filter on every row of a `ColumnStore` at once.
+
+        :param columns: A `ColumnStore` on which to evaluate this filter.
+        :return: A boolean NumPy array, True for the rows that satisfy this filter.
+        """
+        return self.op(self.get_column(columns), self.encode(self.value))
+
+    def interval(self):
+        """Return the closed interval of column values that can satisfy this filter.
+
+        :return: A `(low, high)` tuple in the units of the column of interest.
+        """
+        value = self.encode(self.value)
+        if self.op is operator.ge:
+            return value, math.inf
+        if self.op is operator.le:
+            return -math.inf, value
+        if self.op is operator.eq:
+            return value, value
+        raise UnsupportedCriterionError
+
     def __repr__(self):
         """Represent object when printed.
 
@@ -81,15 +151,48 @@ class AttributeFilter:
 class DateFilter(AttributeFilter):
     """Filter based on Date of Approach."""
 
+    column = "time"
+
+    def __init__(self, op, value):
+        """Construct a new `DateFilter` from a binary predicate and a reference date.
+
+        :param op: A 2-argument predicate comparator (such as `operator.le`).
+        :param value: The reference `date` to compare against.
+        """
+        super().__init__(op, value)
+        # The reference date in the units of `get`, so that calls compare numbers.
+        self.days = self.encode(value)
+
+    def __call__(self, approach):
+        """Invoke `self(approach)`."""
+        return self.op(self.get(approach), self.days)
+
     @classmethod
     def get(cls, approach):
-        """Get the respective filter."""
-        return approach.time.date()
+        """Get the day of Approach, in days since the epoch."""
+        return approach.minutes // MINUTES_PER_DAY
+
+    @classmethod
+    def get_column(cls, columns):
+        """Get the days since the epoch of the approach times."""
+        return columns["time"] // MINUTES_PER_DAY
+
+    @classmethod
+    def encode(cls, value):
+        """Convert a date into days since the epoch."""
+        return date_to_days(value)
+
+    def interval(self):
+        """Return the closed interval of approach times, in minutes, on the matching dates."""
+        low, high = super().interval()
+        return low * MINUTES_PER_DAY, high * MINUTES_PER_DAY + (MINUTES_PER_DAY - 1)
 
 
 class DistanceFilter(AttributeFilter):
     """Filter based on Distance of Approach."""
 
+    column = "distance"
+
     @classmethod
     def get(cls, approach):
         """Get the respective filter."""
@@ -99,6 +202,8 @@ class DistanceFilter(AttributeFilter):
 class VelocityFilter(AttributeFilter):
     """Filter based on Velocity of Approach."""
 
+    column = "velocity"
+
     @classmethod
     def get(cls, approach):
         """Get the respective filter."""
@@ -108,6 +213,8 @@ class VelocityFilter(AttributeFilter):
 class DiameterFilter(AttributeFilter):
     """Filter based on Diameter of Neo."""
 
+    column = "diameter"
+
     @classmethod
     def get(cls, approach):
         """Get the respective filter."""
@@ -117,12 +224,178 @@ class DiameterFilter(AttributeFilter):
 class HazardousFilter(AttributeFilter):
     """Filter based on whether Neo is hazardous."""
 
+    column = "hazardous"
+
     @classmethod
     def get(cls, approach):
         """Get the respective filter."""
         return approach.neo.hazardous
 
 
+class OrbitalFilter(AttributeFilter):
+    """A superclass for filters on an orbital element of Neo.
+
+    Orbital elements aren't attributes of `NearEarthObject`s: they are only
+    loaded, on request, as columns of NEOs. These filters are evaluated with
+    `mask` on those columns, and a database turns the NEOs they select into an
+    `NEOIndexFilter` on its approaches (see `resolve_orbital_filters`).
+    """
+
+
+class SemiMajorAxisFilter(OrbitalFilter):
+    """Filter based on the semi-major axis of Neo, in astronomical units."""
+
+    column = "a"
+
+
+class EccentricityFilter(OrbitalFilter):
+    """Filter based on the eccentricity of Neo."""
+
+    column = "e"
+
+
+class InclinationFilter(OrbitalFilter):
+    """Filter based on the inclination of Neo, in degrees."""
+
+    column = "i"
+
+
+class PerihelionFilter(OrbitalFilter):
+    """Filter based on the perihelion distance of Neo, in astronomical units."""
+
+    column = "q"
+
+
+class MOIDFilter(OrbitalFilter):
+    """Filter based on the Earth minimum orbit intersection distance of Neo, in astronomical units."""
+
+    column = "moid"
+
+
+class MagnitudeFilter(OrbitalFilter):
+    """Filter based on the absolute magnitude (H) of Neo."""
+
+    column = "H"
+
+
+class AlbedoFilter(OrbitalFilter):
+    """Filter based on the geometric albedo of Neo."""
+
+    column = "albedo"
+
+
+class ExtraApproachFilter(AttributeFilter):
+    """A superclass for filters on an extra field of close approaches.
+
+    The extra fields aren't attributes of `CloseApproach`es: they are only
+    loaded, on request, as columns of approaches. These filters are therefore
+    only evaluated with `mask`.
+    """
+
+
+class JulianDateFilter(ExtraApproachFilter):
+    """Filter based on the Julian date (TDB) of Approach."""
+
+    column = "jd"
+
+
+class MinimumDistanceFilter(ExtraApproachFilter):
+    """Filter based on the minimum possible (3-sigma) distance of Approach, in astronomical units."""
+
+    column = "dist_min"
+
+
+class MaximumDistanceFilter(ExtraApproachFilter):
+    """Filter based on the maximum possible (3-sigma) distance of Approach, in astronomical units."""
+
+    column = "dist_max"
+
+
+class InfinityVelocityFilter(ExtraApproachFilter):
+    """Filter based on the velocity of Approach relative to a massless Earth, in km/s."""
+
+    column = "v_inf"
+
+
+class ApproachMagnitudeFilter(ExtraApproachFilter):
+    """Filter based on the absolute magnitude (H) of Neo at the time of Approach."""
+
+    column = "h"
+
+
+class DistanceBandFilter(ExtraApproachFilter):
+    """A superclass for filters comparing the uncertainty interval of Approach to a band.
+
+    The uncertainty interval of the distance of an approach runs from its
+    `dist_min` to its `dist_max` column, and the reference value is a `(low,
+    high)` band of distances. The filter's `interval` only bounds `dist_min`,
+    while `mask` checks both ends.
+    """
+
+    column = "dist_min"
+    # The columns of the uncertainty interval.
+    columns = ("dist_min", "dist_max")
+
+
+class DistanceOverlapFilter(DistanceBandFilter):
+    """Filter based on whether the distance of Approach may fall within a band."""
+
+    def mask(self, columns):
+        """Evaluate this filter on every row of a `ColumnStore` at once."""
+        low, high = self.value
+        return (columns["dist_min"] <= high) & (columns["dist_max"] >= low)
+
+    def interval(self):
+        """Return the closed interval of minimum distances that can satisfy this filter."""
+        return -math.inf, self.value[1]
+
+
+class DistanceWithinFilter(DistanceBandFilter):
+    """Filter based on whether the distance of Approach certainly falls within a band."""
+
+    def mask(self, columns):
+        """Evaluate this filter on every row of a `ColumnStore` at once."""
+        low, high = self.value
+        return (columns["dist_min"] >= low) & (columns["dist_max"] <= high)
+
+    def interval(self):
+        """Return the closed interval of minimum distances that can satisfy this filter."""
+        return self.value
+
+
+class NEOIndexFilter(AttributeFilter):
+    """Filter selecting the close approaches of a set of NEOs, given by their indices.
+
+    The set is a boolean mask aligned with the NEOs. It can only be evaluated on
+    columns, where the `neo_index` of each approach picks its NEO's flag.
+    """
+
+    column = "neo_index"
+
+    def __init__(self, selected):
+        """Create a new `NEOIndexFilter`.
+
+        :param selected: A boolean NumPy array, True for the selected NEOs.
+        """
+        # Unlinked approaches (index -1) pick up the sentinel value at the end.
+        super().__init__(operator.getitem, np.append(np.asarray(selected, dtype=bool), False))
+
+    def mask(self, columns):
+        """Evaluate this filter on every row of a `ColumnStore` at once."""
+        return self.value[columns["neo_index"]]
+
+    def interval(self):
+        """Return the closed interval of the indices of the selected NEOs."""
+        selected = np.flatnonzero(self.value)
+        if not len(selected):
+            return math.inf, -math.inf
+        return int(selected[0]), int(selected[-1])
+
+    def __repr__(self):
+        """Represent object when printed."""
+        return f"{self.__class__.__name__}(selected={int(self.value.sum())})"
+
+
 def identify_operator(filter):
     """Identify logical operator from text pattern.
 
@@ -163,6 +436,32 @@ def create_filters(
     diameter_min=None,
     diameter_max=None,
     hazardous=None,
+    a_min=None,
+    a_max=None,
+    e_min=None,
+    e_max=None,
+    i_min=None,
+    i_max=None,
+    q_min=None,
+    q_max=None,
+    moid_min=None,
+    moid_max=None,
+    H_min=None,
+    H_max=None,
+    albedo_min=None,
+    albedo_max=None,
+    jd_min=None,
+    jd_max=None,
+    dist_lower_min=None,
+    dist_lower_max=None,
+    dist_upper_min=None,
+    dist_upper_max=None,
+    v_inf_min=None,
+    v_inf_max=None,
+    approach_H_min=None,
+    approach_H_max=None,
+    distance_overlaps=None,
+    distance_within=None,
 ):
     """Create a collection of filters from user-specified criteria.
 
@@ -177,6 +476,13 @@ def create_filters(
     line (in particular, this means that the `--not-hazardous` flag results in
     `hazardous=False`, not to be confused with `hazardous=None`).
 
+    The orbital filters, such as `moid_max`, apply to the orbital elements of
+    NEOs, which must have been loaded as columns (see `OrbitalFilter`), and
+    the filters on extra fields, such as `dist_lower_max` on the minimum
+    possible distance `dist_min`, apply to extra columns of approaches (see
+    `ExtraApproachFilter`). So do `distance_overlaps` and `distance_within`,
+    which compare the whole uncertainty interval of the distance to a band.
+
     The return value must be compatible with the `query` method of `NEODatabase`
     because the main module directly passes this result to that method. For now,
     this can be thought of as a collection of `AttributeFilter`s.
@@ -191,6 +497,34 @@ def create_filters(
     :param diameter_min: A minimum diameter of the NEO of a matching `CloseApproach`.
     :param diameter_max: A maximum diameter of the NEO of a matching `CloseApproach`.
     :param hazardous: Whether the NEO of a matching `CloseApproach` is potentially hazardous.
+    :param a_min: A minimum semi-major axis of the NEO of a matching `CloseApproach`.
+    :param a_max: A maximum semi-major axis of the NEO of a matching `CloseApproach`.
+    :param e_min: A minimum eccentricity of the NEO of a matching `CloseApproach`.
+    :param e_max: A maximum eccentricity of the NEO of a matching `CloseApproach`.
+    :param i_min: A minimum inclination of the NEO of a matching `CloseApproach`.
+    :param i_max: A maximum inclination of the NEO of a matching `CloseApproach`.
+    :param q_min: A minimum perihelion distance of the NEO of a matching `CloseApproach`.
+    :param q_max: A maximum perihelion distance of the NEO of a matching `CloseApproach`.
+    :param moid_min: A minimum Earth MOID of the NEO of a matching `CloseApproach`.
+    :param moid_max: A maximum Earth MOID of the NEO of a matching `CloseApproach`.
+    :param H_min: A minimum absolute magnitude of the NEO of a matching `CloseApproach`.
+    :param H_max: A maximum absolute magnitude of the NEO of a matching `CloseApproach`.
+    :param albedo_min: A minimum albedo of the NEO of a matching `CloseApproach`.
+    :param albedo_max: A maximum albedo of the NEO of a matching `CloseApproach`.
+    :param jd_min: A minimum Julian date of a matching `CloseApproach`.
+    :param jd_max: A maximum Julian date of a matching `CloseApproach`.
+    :param dist_lower_min: A minimum of the minimum possible distance of a matching `CloseApproach`.
+    :param dist_lower_max: A maximum of the minimum possible distance of a matching `CloseApproach`.
+    :param dist_upper_min: A minimum of the maximum possible distance of a matching `CloseApproach`.
+    :param dist_upper_max: A maximum of the maximum possible distance of a matching `CloseApproach`.
+    :param v_inf_min: A minimum velocity relative to a massless Earth of a matching `CloseApproach`.
+    :param v_inf_max: A maximum velocity relative to a massless Earth of a matching `CloseApproach`.
+    :param approach_H_min: A minimum absolute magnitude at a matching `CloseApproach`.
+    :param approach_H_max: A maximum absolute magnitude at a matching `CloseApproach`.
+    :param distance_overlaps: A `(low, high)` band of distances that the uncertainty
+        interval of the distance of a matching `CloseApproach` overlaps.
+    :param distance_within: A `(low, high)` band of distances that contains the uncertainty
+        interval of the distance of a matching `CloseApproach`.
     :return: A collection of filters for use with `query`.
     """
     defined_filters = [filter for (filter, val) in locals().items() if val is not None]
@@ -201,6 +535,20 @@ def create_filters(
         "velocity": VelocityFilter,
         "diameter": DiameterFilter,
         "hazardous": HazardousFilter,
+        "a": SemiMajorAxisFilter,
+        "e": EccentricityFilter,
+        "i": InclinationFilter,
+        "q": PerihelionFilter,
+        "moid": MOIDFilter,
+        "H": MagnitudeFilter,
+        "albedo": AlbedoFilter,
+        "jd": JulianDateFilter,
+        "dist_lower": MinimumDistanceFilter,
+        "dist_upper": MaximumDistanceFilter,
+        "v_inf": InfinityVelocityFilter,
+        "approach_H": ApproachMagnitudeFilter,
+        "distance_overlaps": DistanceOverlapFilter,
+        "distance_within": DistanceWithinFilter,
     }
     for filter in defined_filters:
         root_filter_name = strip_filter_to_root_name(filter)
@@ -213,6 +561,100 @@ def create_filters(
     return collected_filters
 
 
+def supports_columns(filters):
+    """Return whether every filter in a collection can be evaluated with `mask`.
+
+    :param filters: A collection of filters.
+    :return: True if each filter names a `ColumnStore` column.
+    """
+    return all(getattr(filter, "column", None) is not None for filter in filters)
+
+
+def supports_neos(filters):
+    """Return whether every filter in a collection applies to NEOs themselves.
+
+    Such filters can be evaluated with `mask` on a `ColumnStore` of NEOs.
+
+    :param filters: A collection of filters.
+    :return: True if each filter names one of the `NEO_COLUMNS` or `ORBITAL_COLUMNS`.
+    """
+    return all(
+        getattr(filter, "column", None) in NEO_COLUMNS + ORBITAL_COLUMNS for filter in filters
+    )
+
+
+def orbital_columns(filters):
+    """Return the orbital columns that a collection of filters applies to.
+
+    :param filters: A collection of filters.
+    :return: A sorted list of the `ORBITAL_COLUMNS` named by some filter.
+    """
+    return sorted({filter.column for filter in filters if isinstance(filter, OrbitalFilter)})
+
+
+def extra_columns(filters):
+    """Return the extra columns of approaches that a collection of filters applies to.
+
+    :param filters: A collection of filters.
+    :return: A sorted list of the `EXTRA_APPROACH_COLUMNS` named by some filter.
+    """
+    return sorted(
+        {
+            column
+            for filter in filters
+            if isinstance(filter, ExtraApproachFilter)
+            for column in getattr(filter, "columns", (filter.column,))
+        }
+    )
+
+
+def resolve_orbital_filters(filters, neo_columns):
+    """Replace the filters on orbital elements by a filter on the NEOs they select.
+
+    The orbital filters are evaluated on the columns of NEOs, and the NEOs
+    matching all of them become a single `NEOIndexFilter`, which can then be
+    evaluated on the columns of close approaches like any other filter.
+
+    :param filters: A collection of filters.
+    :param neo_columns: A `ColumnStore` of NEOs holding the orbital columns of the filters.
+    :return: A list of filters without any `OrbitalFilter`.
+    """
+    orbital = [filter for filter in filters if isinstance(filter, OrbitalFilter)]
+    if not orbital:
+        return list(filters)
+    others = [filter for filter in filters if not isinstance(filter, OrbitalFilter)]
+    return others + [NEOIndexFilter(combined_mask(orbital, neo_columns))]
+
+
+def filter_intervals(filters):
+    """Intersect the intervals of a collection of filters, column by column.
+
+    An interval whose low end is above its high end can't be satisfied.
+
+    :param filters: A collection of filters that support `mask`.
+    :return: A dictionary mapping column names to closed `(low, high)` intervals.
+    """
+    intervals = {}
+    for filter in filters:
+        low, high = filter.interval()
+        previous_low, previous_high = intervals.get(filter.column, (-math.inf, math.inf))
+        intervals[filter.column] = (max(low, previous_low), min(high, previous_high))
+    return intervals
+
+
+def combined_mask(filters, columns):
+    """Evaluate a collection of filters on every row of a `ColumnStore`.
+
+    :param filters: A collection of filters that support `mask`.
+    :param columns: A `ColumnStore` on which to evaluate the filters.
+    :return: A boolean NumPy array, True for the rows that satisfy every filter.
+    """
+    result = np.ones(len(columns), dtype=bool)
+    for filter in filters:
+        result &= filter.mask(columns)
+    return result
+
+
 def limit(iterator, n=None):
     """Produce a limited stream of values from an iterator.
 
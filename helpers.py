@@ -9,6 +9,12 @@ The `datetime_to_str` function converts a Python `datetime` into a string.
 Although `datetime`s already have human-readable string representations, those
 representations display seconds, but NASA's data (and our datetimes!) don't
 provide that level of resolution, so the output format also will not.
+
+The `datetime_to_minutes` and `date_to_days` functions convert datetimes and
+dates into whole minutes and days since the Unix epoch, which is how times are
+represented in the columns of a `columns.ColumnStore` and in `CloseApproach`
+objects. The `cd_to_minutes` function converts a `cd` field straight into
+minutes, without creating a `datetime`.
 """
 import datetime
 import numpy as np
@@ -39,6 +45,7 @@ transformdict = {
     "str": lambda obj: str(obj) if obj not in ["", None] else None,
     "float": lambda obj: float(obj) if obj not in ["", None] else float(np.nan),
     "bool": lambda obj: booltransform(obj),
+    "minutes": lambda obj: to_minutes(obj),
 }
 
 
@@ -87,6 +94,79 @@ def cd_to_datetime(calendar_date):
     return datetime.datetime.strptime(calendar_date, "%Y-%b-%d %H:%M")
 
 
+def cd_to_minutes(calendar_date):
+    """Convert a NASA-formatted calendar date/time description into minutes since the epoch.
+
+    This accepts the same `YYYY-bb-DD hh:mm` format as `cd_to_datetime`, but
+    computes the number of minutes with integer arithmetic instead of creating
+    a `datetime`. It rejects every calendar date that `strptime` rejects, and
+    is stricter: the year must have four ASCII digits, the other numbers one or
+    two, and the date and the time are separated by a single space.
+
+    :param calendar_date: A calendar date in YYYY-bb-DD hh:mm format.
+    :return: The number of minutes between the epoch and the given time, as an integer.
+    :raises ValueError: If the calendar date isn't in the expected format.
+    """
+    try:
+        date, clock = calendar_date.split(" ")
+        year, month, day = date.split("-")
+        hour, minute = clock.split(":")
+        if not (
+            _is_number(year, 4, 4)
+            and all(_is_number(field, 1, 2) for field in (day, hour, minute))
+        ):
+            raise ValueError
+        year, month, day = int(year), MONTH_NUMBERS[month.title()], int(day)
+        hour, minute = int(hour), int(minute)
+    except (AttributeError, KeyError, ValueError):
+        raise ValueError(f"Invalid calendar date: {calendar_date!r}.") from None
+    if not (1 <= day <= days_in_month(year, month) and 0 <= hour < 24 and 0 <= minute < 60):
+        raise ValueError(f"Invalid calendar date: {calendar_date!r}.")
+    return (civil_to_days(year, month, day) * 24 + hour) * 60 + minute
+
+
+def _is_number(field, min_width, max_width):
+    """Return whether a field of a calendar date is a number of ASCII digits of the given width."""
+    return field.isascii() and field.isdigit() and min_width <= len(field) <= max_width
+
+
+def to_minutes(obj):
+    """Convert a time into whole minutes since the Unix epoch.
+
+    :param obj: A naive `datetime`, a calendar date in the `cd` format, or a number of minutes.
+    :return: The number of minutes since the epoch, as an integer.
+    """
+    if isinstance(obj, datetime.datetime):
+        return datetime_to_minutes(obj)
+    if isinstance(obj, str):
+        return cd_to_minutes(obj)
+    return int(obj)
+
+
+def civil_to_days(year, month, day):
+    """Convert a date of the proleptic Gregorian calendar into days since the Unix epoch.
+
+    :param year: The year.
+    :param month: The month, from 1 to 12.
+    :param day: The day of the month.
+    :return: The number of days between the epoch and the date, as an integer.
+    """
+    # Count years from March, so that the leap day ends the year.
+    year -= month <= 2
+    era = year // 400
+    year_of_era = year - era * 400
+    day_of_year = (153 * (month + 9 if month <= 2 else month - 3) + 2) // 5 + day - 1
+    day_of_era = year_of_era * 365 + year_of_era // 4 - year_of_era // 100 + day_of_year
+    return era * 146097 + day_of_era - 719468
+
+
+def days_in_month(year, month):
+    """Return the number of days in a month of the proleptic Gregorian calendar."""
+    if month == 2:
+        return 29 if year % 4 == 0 and (year % 100 != 0 or year % 400 == 0) else 28
+    return 30 if month in (4, 6, 9, 11) else 31
+
+
 def datetime_to_str(dt):
     """Convert a naive Python datetime into a human-readable string.
 
@@ -102,6 +182,46 @@ def datetime_to_str(dt):
     return datetime.datetime.strftime(dt, "%Y-%m-%d %H:%M")
 
 
+# The reference point of the numeric time columns.
+EPOCH = datetime.datetime(1970, 1, 1)
+MINUTES_PER_DAY = 24 * 60
+
+# The number of each month by its English abbreviation, as in the `cd` field.
+MONTH_NUMBERS = {
+    name: number
+    for number, name in enumerate(
+        ("Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"), start=1
+    )
+}
+
+
+def datetime_to_minutes(dt):
+    """Convert a naive Python datetime into whole minutes since the Unix epoch.
+
+    :param dt: A naive Python datetime.
+    :return: The number of minutes between the epoch and `dt`, as an integer.
+    """
+    return (dt - EPOCH) // datetime.timedelta(minutes=1)
+
+
+def minutes_to_datetime(minutes):
+    """Convert whole minutes since the Unix epoch into a naive Python datetime.
+
+    :param minutes: A number of minutes since the epoch.
+    :return: The corresponding naive `datetime`.
+    """
+    return EPOCH + datetime.timedelta(minutes=int(minutes))
+
+
+def date_to_days(date):
+    """Convert a Python date into whole days since the Unix epoch.
+
+    :param date: A Python `date`.
+    :return: The number of days between the epoch and `date`, as an integer.
+    """
+    return (date - EPOCH.date()).days
+
+
 def transform_obs_to_df(obs_list, idxname):
     """Transform NEO and approaches objects to a pandas dataframe.
 
@@ -0,0 +1,624 @@
+"""Auxiliary indexes that speed up queries over the columns of close approaches.
+
+A `ZoneMap` records the minimum and maximum of a few columns for each fixed-size
+block of a `ColumnStore`. Since close approaches are mostly sorted by time and
+their distances cluster, many blocks can be skipped without reading them: a
+block whose range of some column lies outside the interval required by a query
+can't hold a match.
+
+A `KDTree` indexes a few columns together, so that a query combining ranges on
+several of them (say a date window, a maximum distance and a minimum velocity)
+only looks at the approaches near the corner of the data it selects, wherever
+they are in the table. It also finds the nearest neighbours of a point, such as
+the NEOs on the orbits most similar to a given one.
+
+A `Bitmap` is a precomputed set of approaches, such as those of potentially
+hazardous NEOs, packed eight approaches to a byte. Bitmaps are combined with
+bitwise operations and with the candidates found by other indexes.
+
+An `IntervalTree` indexes an interval per approach, such as the uncertainty
+interval of its distance, to find the intervals that overlap a band of values
+without looking at the others.
+
+A `DayCounts` holds cumulative counts of approaches per day, so that the number
+of approaches between two dates - in total, of hazardous NEOs or of NEOs with a
+known diameter - is the difference of two prefix sums.
+
+A `NameIndex` finds NEOs by name: exactly or ignoring case with dictionaries,
+and approximately with an inverted index of the character trigrams of the
+names, which ranks the names sharing the most trigrams with a misspelled one.
+
+A `PrefixIndex` keeps strings, such as designations, sorted ignoring case, so
+that those starting with a prefix form a contiguous range found by bisection.
+
+The indexes work on the closed `(low, high)` intervals per column produced by
+`filters.filter_intervals`.
+"""
+import bisect
+import collections
+import heapq
+
+import numpy as np
+
+
+# The number of set bits in each byte value.
+_POPCOUNT = np.array([bin(byte).count("1") for byte in range(256)], dtype=np.uint8)
+
+
+class ZoneMap:
+    """The per-block minimum and maximum of some columns of a `ColumnStore`."""
+
+    # The columns summarized by default.
+    COLUMNS = ("time", "distance", "velocity", "diameter")
+
+    def __init__(self, columns, block_size, names=COLUMNS):
+        """Create a new `ZoneMap`.
+
+        Missing values (NaN) are ignored. A block without any known value of a
+        column has a NaN minimum and maximum for that column, and can't match any
+        interval on it.
+
+        :param columns: The `ColumnStore` to summarize.
+        :param block_size: The number of rows in each block.
+        :param names: The names of the columns to summarize.
+        """
+        self.block_size = block_size
+        self.n_blocks = -(-len(columns) // block_size)
+        starts = np.arange(self.n_blocks) * block_size
+        self.minimum = {}
+        self.maximum = {}
+        for name in names:
+            values = np.asarray(columns[name])
+            if not self.n_blocks:
+                self.minimum[name] = self.maximum[name] = values[:0]
+            elif values.dtype.kind == "f":
+                self.minimum[name] = np.fmin.reduceat(values, starts)
+                self.maximum[name] = np.fmax.reduceat(values, starts)
+            else:
+                self.minimum[name] = np.minimum.reduceat(values, starts)
+                self.maximum[name] = np.maximum.reduceat(values, starts)
+
+    def candidate_blocks(self, intervals):
+        """Find the blocks that may hold rows within the given intervals.
+
+        :param intervals: A dictionary mapping column names to closed `(low, high)` intervals.
+        :return: A boolean NumPy array, False for the blocks that can be skipped.
+        """
+        candidates = np.ones(self.n_blocks, dtype=bool)
+        for name, (low, high) in intervals.items():
+            if name not in self.minimum:
+                continue
+            # Comparisons with a NaN range are False, so such blocks are skipped.
+            candidates &= (self.maximum[name] >= low) & (self.minimum[name] <= high)
+        return candidates
+
+
+class Bitmap:
+    """A set of rows of a `ColumnStore`, as a packed array of bits."""
+
+    def __init__(self, bits, length):
+        """Create a new `Bitmap`.
+
+        :param bits: A NumPy array of `uint8`, holding one bit per row, most significant first.
+        :param length: The number of rows, which may not fill the last byte.
+        """
+        self.bits = bits
+        self.length = length
+
+    @classmethod
+    def from_mask(cls, mask):
+        """Create a `Bitmap` of the rows that are True in a boolean mask.
+
+        :param mask: A boolean NumPy array.
+        :return: A new `Bitmap`.
+        """
+        return cls(np.packbits(mask), len(mask))
+
+    def __len__(self):
+        """Return the number of rows, set or not, of this bitmap."""
+        return self.length
+
+    def __and__(self, other):
+        """Return the intersection of two bitmaps over the same rows."""
+        return Bitmap(self.bits & other.bits, self.length)
+
+    def __invert__(self):
+        """Return the complement of this bitmap."""
+        # The padding bits of the last byte stay unset.
+        return Bitmap.from_mask(~self.to_mask())
+
+    @property
+    def nbytes(self):
+        """Return the size of this bitmap, in bytes."""
+        return self.bits.nbytes
+
+    def count(self):
+        """Return the number of set rows."""
+        return int(_POPCOUNT[self.bits].sum(dtype=np.int64))
+
+    def to_mask(self):
+        """Return this bitmap as a boolean NumPy array, one item per row."""
+        return np.unpackbits(self.bits, count=self.length).view(bool)
+
+    def nonzero(self):
+        """Return a sorted NumPy array of the set rows."""
+        return np.flatnonzero(self.to_mask())
+
+    def contains(self, indices):
+        """Check whether some rows are set, without unpacking the whole bitmap.
+
+        :param indices: A NumPy array of row indices.
+        :return: A boolean NumPy array, True for the rows that are set.
+        """
+        return (self.bits[indices >> 3] >> (7 - (indices & 7)) & 1).astype(bool)
+
+
+class KDTree:
+    """A bulk-loaded k-d tree answering axis-aligned box queries over a few columns.
+
+    The tree is built once by recursively splitting the points at the median of
+    their widest dimension, relative to the spread of all points in that
+    dimension, down to leaves of at most `leaf_size` points. Each
+    node records the bounding box of its points, so a box query descends only
+    into the nodes that overlap the box, takes the nodes that lie within the box
+    wholesale, and tests individual points only in the leaves on its boundary.
+
+    The nodes are kept in NumPy arrays and searched one level at a time, so
+    that a query costs a few array operations per level of the tree rather
+    than some Python code per node.
+    """
+
+    def __init__(self, points, leaf_size=128):
+        """Create a new `KDTree`.
+
+        :param points: A NumPy array of shape `(n, d)`, one row per point.
+        :param leaf_size: The maximum number of points in a leaf.
+        """
+        self.points = np.asarray(points, dtype=np.float64)
+        self.leaf_size = leaf_size
+        self.order = np.arange(len(self.points))
+        nodes = []
+        if len(self.points):
+            spread = np.fmax.reduce(self.points, axis=0) - np.fmin.reduce(self.points, axis=0)
+            self._scale = np.where(spread > 0, spread, 1.0)
+            self._build(0, len(self.points), nodes)
+        dimensions = self.points.shape[1]
+        self.lows = np.array([node[0] for node in nodes]).reshape(-1, dimensions)
+        self.highs = np.array([node[1] for node in nodes]).reshape(-1, dimensions)
+        # Whether some point of a node misses a value, in each dimension.
+        self.missing = np.array([node[2] for node in nodes], dtype=bool).reshape(-1, dimensions)
+        self.starts = np.array([node[3] for node in nodes], dtype=np.int64)
+        self.stops = np.array([node[4] for node in nodes], dtype=np.int64)
+        # The children of each node, or -1 for a leaf.
+        self.left = np.array([node[5] for node in nodes], dtype=np.int64)
+        self.right = np.array([node[6] for node in nodes], dtype=np.int64)
+        self.n_leaves = int(np.sum(self.left < 0))
+        # The points in tree order, so that each node's points are contiguous.
+        self.sorted_points = self.points[self.order]
+
+    def _build(self, start, stop, nodes):
+        """Build the node for the points `order[start:stop]` and return its number."""
+        node = len(nodes)
+        indices = self.order[start:stop]
+        points = self.points[indices]
+        missing = np.isnan(points).any(axis=0)
+        low, high = np.fmin.reduce(points, axis=0), np.fmax.reduce(points, axis=0)
+        nodes.append([low, high, missing, start, stop, -1, -1])
+        if stop - start > self.leaf_size:
+            dimension = int(np.argmax(np.nan_to_num((high - low) / self._scale, nan=-1.0)))
+            middle = (start + stop) // 2
+            split = np.argpartition(points[:, dimension], middle - start)
+            self.order[start:stop] = indices[split]
+            nodes[node][5] = self._build(start, middle, nodes)
+            nodes[node][6] = self._build(middle, stop, nodes)
+        return node
+
+    def query(self, low, high, max_leaves=None):
+        """Find the points within a closed, axis-aligned box.
+
+        Infinite bounds leave a dimension unconstrained, in which case missing
+        values (NaN) in that dimension don't exclude a point.
+
+        A box that cuts through many leaves is expensive to search, and is
+        better answered by a scan: if more than `max_leaves` leaves have to be
+        tested point by point, the search gives up and returns None.
+
+        :param low: A sequence of the lower bounds of the box, one per dimension.
+        :param high: A sequence of the upper bounds of the box, one per dimension.
+        :param max_leaves: The maximum number of leaves to test, or None for no maximum.
+        :return: A sorted NumPy array of the indices of the points within the box, or None.
+        """
+        low = np.asarray(low, dtype=np.float64)
+        high = np.asarray(high, dtype=np.float64)
+        constrained = np.isfinite(low) | np.isfinite(high)
+        low, high = low[constrained], high[constrained]
+        if not len(self.starts) or np.any(low > high):
+            return np.zeros(0, dtype=np.int64)
+
+        lows = self.lows[:, constrained]
+        highs = self.highs[:, constrained]
+        missing = self.missing[:, constrained]
+        taken, tested = [], []
+        n_tested = 0
+        frontier = np.zeros(1, dtype=np.int64)
+        while len(frontier):
+            # Comparisons with a NaN range are False, so such nodes are dropped.
+            overlaps = np.all((highs[frontier] >= low) & (lows[frontier] <= high), axis=1)
+            frontier = frontier[overlaps]
+            inside = np.all(
+                (lows[frontier] >= low) & (highs[frontier] <= high) & ~missing[frontier], axis=1
+            )
+            taken.append(frontier[inside])
+            frontier = frontier[~inside]
+            leaves = self.left[frontier] < 0
+            tested.append(frontier[leaves])
+            n_tested += int(np.sum(leaves))
+            if max_leaves is not None and n_tested > max_leaves:
+                return None
+            frontier = frontier[~leaves]
+            frontier = np.concatenate([self.left[frontier], self.right[frontier]])
+
+        taken = _expand_ranges(self.starts[np.concatenate(taken)], self.stops[np.concatenate(taken)])
+        tested = _expand_ranges(
+            self.starts[np.concatenate(tested)], self.stops[np.concatenate(tested)]
+        )
+        points = self.sorted_points[tested][:, constrained]
+        inside = np.all((points >= low) & (points <= high), axis=1)
+        return np.sort(np.concatenate([self.order[taken], self.order[tested[inside]]]))
+
+    def nearest(self, point, k):
+        """Find the `k` points nearest to a given point, by Euclidean distance.
+
+        The nodes are visited best first, by the distance from the point to
+        their bounding box, and the search stops as soon as no unvisited node
+        can be nearer than the `k`-th nearest point found so far, so that
+        usually only a few leaves near the point are tested. Points missing a
+        value (NaN) are never returned.
+
+        :param point: A sequence of coordinates, one per dimension.
+        :param k: The number of neighbours to find.
+        :return: A tuple of a NumPy array of the indices of the nearest points
+            and a NumPy array of their distances, sorted by distance.
+        """
+        point = np.asarray(point, dtype=np.float64)
+        indices = np.zeros(0, dtype=np.int64)
+        distances = np.zeros(0, dtype=np.float64)
+        if not len(self.starts) or k <= 0:
+            return indices, distances
+        heap = [(0.0, 0)]
+        while heap:
+            bound, node = heapq.heappop(heap)
+            if len(distances) == k and bound > distances[-1]:
+                break
+            if self.left[node] >= 0:
+                for child in (self.left[node], self.right[node]):
+                    gaps = np.fmax(self.lows[child] - point, point - self.highs[child])
+                    # A dimension without any known value can't hold a neighbour.
+                    bound = np.sum(np.maximum(gaps, 0.0) ** 2)
+                    if not np.isnan(bound):
+                        heapq.heappush(heap, (float(bound), int(child)))
+                continue
+            start, stop = self.starts[node], self.stops[node]
+            leaf = np.sum((self.sorted_points[start:stop] - point) ** 2, axis=1)
+            known = ~np.isnan(leaf)
+            distances = np.concatenate([distances, leaf[known]])
+            indices = np.concatenate([indices, self.order[start:stop][known]])
+            nearest = np.lexsort((indices, distances))[:k]
+            indices, distances = indices[nearest], distances[nearest]
+        return indices, np.sqrt(distances)
+
+
+def _expand_ranges(starts, stops):
+    """Return the concatenation of the ranges `starts[i]..stops[i]`, as a NumPy array."""
+    lengths = stops - starts
+    ends = np.cumsum(lengths)
+    return np.repeat(starts - ends + lengths, lengths) + np.arange(ends[-1] if len(ends) else 0)
+
+
+class IntervalTree:
+    """A centered interval tree answering overlap queries over closed intervals.
+
+    Each node has a center, the median of the endpoints of its intervals, and
+    holds the intervals containing that center, both sorted by their low ends
+    and by their high ends. The intervals entirely below the center go to the
+    left child and those entirely above to the right one, so that the depth of
+    the tree is logarithmic. The intervals containing a point are then found
+    by walking down a single path and reporting, at each node, a prefix or a
+    suffix of one of its sorted lists, in O(log n + k) time for k intervals.
+
+    As with the other indexes, the nodes are kept in NumPy arrays.
+    """
+
+    def __init__(self, lows, highs):
+        """Create a new `IntervalTree`.
+
+        Intervals with a missing end (NaN) are left out of the tree, so they
+        never overlap anything.
+
+        :param lows: A NumPy array of the low ends of the intervals.
+        :param highs: A NumPy array of the high ends of the intervals.
+        """
+        self.lows = np.asarray(lows, dtype=np.float64)
+        self.highs = np.asarray(highs, dtype=np.float64)
+        known = np.flatnonzero(~np.isnan(self.lows) & ~np.isnan(self.highs))
+        # All the known intervals, sorted by their low ends.
+        self.by_low = known[np.argsort(self.lows[known], kind="stable")]
+        self.sorted_lows = self.lows[self.by_low]
+        nodes = []
+        if len(known):
+            self._build(known, nodes)
+        self.centers = np.array([node[0] for node in nodes], dtype=np.float64)
+        self.left = np.array([node[2] for node in nodes], dtype=np.int64)
+        self.right = np.array([node[3] for node in nodes], dtype=np.int64)
+        sizes = np.array([len(node[1]) for node in nodes], dtype=np.int64)
+        self.offsets = np.concatenate([np.zeros(1, dtype=np.int64), np.cumsum(sizes)])
+        # The intervals of each node, sorted by their low and by their high ends.
+        node_intervals = [node[1] for node in nodes] or [np.zeros(0, dtype=np.int64)]
+        self.node_by_low = np.concatenate(
+            [indices[np.argsort(self.lows[indices], kind="stable")] for indices in node_intervals]
+        )
+        self.node_by_high = np.concatenate(
+            [indices[np.argsort(self.highs[indices], kind="stable")] for indices in node_intervals]
+        )
+        self.node_lows = self.lows[self.node_by_low]
+        self.node_highs = self.highs[self.node_by_high]
+
+    def _build(self, indices, nodes):
+        """Build the node for the intervals at `indices` and return its number."""
+        lows, highs = self.lows[indices], self.highs[indices]
+        center = float(np.median(np.concatenate([lows, highs])))
+        node = len(nodes)
+        nodes.append([center, indices[(lows <= center) & (highs >= center)], -1, -1])
+        below, above = indices[highs < center], indices[lows > center]
+        if len(below):
+            nodes[node][2] = self._build(below, nodes)
+        if len(above):
+            nodes[node][3] = self._build(above, nodes)
+        return node
+
+    def __len__(self):
+        """Return the number of intervals in the tree."""
+        return len(self.by_low)
+
+    def stab(self, point):
+        """Find the intervals containing a point.
+
+        :param point: A value.
+        :return: A NumPy array of the indices of the intervals containing the point, unsorted.
+        """
+        found = [np.zeros(0, dtype=np.int64)]
+        node = 0 if len(self.centers) else -1
+        while node >= 0:
+            start, stop = self.offsets[node], self.offsets[node + 1]
+            center = self.centers[node]
+            if point < center:
+                count = np.searchsorted(self.node_lows[start:stop], point, side="right")
+                found.append(self.node_by_low[start : start + count])
+                node = self.left[node]
+            elif point > center:
+                count = np.searchsorted(self.node_highs[start:stop], point, side="left")
+                found.append(self.node_by_high[start + count : stop])
+                node = self.right[node]
+            else:
+                found.append(self.node_by_low[start:stop])
+                break
+        return np.concatenate(found)
+
+    def overlapping(self, low, high):
+        """Find the intervals that overlap a closed band of values.
+
+        These are the intervals containing the low end of the band, and those
+        starting within the band.
+
+        :param low: The low end of the band.
+        :param high: The high end of the band.
+        :return: A sorted NumPy array of the indices of the overlapping intervals.
+        """
+        if low > high:
+            return np.zeros(0, dtype=np.int64)
+        start = np.searchsorted(self.sorted_lows, low, side="right")
+        stop = np.searchsorted(self.sorted_lows, high, side="right")
+        return np.sort(np.concatenate([self.stab(low), self.by_low[start:stop]]))
+
+    def within(self, low, high):
+        """Find the intervals contained in a closed band of values.
+
+        The intervals starting within the band are found by bisection, and only
+        those are checked for their high ends.
+
+        :param low: The low end of the band.
+        :param high: The high end of the band.
+        :return: A sorted NumPy array of the indices of the contained intervals.
+        """
+        start = np.searchsorted(self.sorted_lows, low, side="left")
+        stop = np.searchsorted(self.sorted_lows, high, side="right")
+        candidates = self.by_low[start:stop]
+        return np.sort(candidates[self.highs[candidates] <= high])
+
+
+class DayCounts:
+    """Cumulative counts of close approaches per day, for a few kinds of approaches."""
+
+    # The kinds of approaches counted.
+    KINDS = ("total", "hazardous", "diameter_known")
+
+    def __init__(self, days, masks):
+        """Create a new `DayCounts`.
+
+        :param days: A NumPy array of the day of each approach, in days since the epoch.
+        :param masks: A dictionary mapping each kind but "total" to a boolean NumPy
+            array, True for the approaches of that kind.
+        """
+        days = np.asarray(days, dtype=np.int64)
+        self.first_day = int(days.min()) if len(days) else 0
+        n_days = int(days.max()) - self.first_day + 1 if len(days) else 0
+        offsets = days - self.first_day
+        # The number of approaches before each day, and before the day after the last.
+        self.cumulative = {}
+        for kind in self.KINDS:
+            selected = offsets if kind == "total" else offsets[masks[kind]]
+            self.cumulative[kind] = np.concatenate(([0], np.cumsum(np.bincount(selected, minlength=n_days))))
+
+    @property
+    def last_day(self):
+        """Return the day of the last approach, in days since the epoch."""
+        return self.first_day + len(self.cumulative["total"]) - 2
+
+    @property
+    def nbytes(self):
+        """Return the size of the cumulative counts, in bytes."""
+        return sum(cumulative.nbytes for cumulative in self.cumulative.values())
+
+    def before(self, days, kind="total"):
+        """Count the approaches of a kind before some days.
+
+        :param days: A day or a NumPy array of days, in days since the epoch.
+        :param kind: One of the `KINDS`.
+        :return: The number of approaches before each day, as an integer or a NumPy array.
+        """
+        cumulative = self.cumulative[kind]
+        return cumulative[np.clip(np.asarray(days, dtype=np.int64) - self.first_day, 0, len(cumulative) - 1)]
+
+    def count(self, first, last, kind="total"):
+        """Count the approaches of a kind from day `first` to day `last`, inclusive.
+
+        :param first: The first day, in days since the epoch, or -inf.
+        :param last: The last day, in days since the epoch, or inf.
+        :param kind: One of the `KINDS`.
+        :return: The number of approaches.
+        """
+        first = max(first, self.first_day)
+        last = min(last, self.last_day)
+        if first > last:
+            return 0
+        return int(self.before(last + 1, kind) - self.before(first, kind))
+
+    def counts(self, edges, kind="total"):
+        """Count the approaches of a kind between consecutive days of a sorted sequence.
+
+        :param edges: A sorted NumPy array of days, in days since the epoch.
+        :param kind: One of the `KINDS`.
+        :return: A NumPy array of the number of approaches from each edge to the day
+            before the next.
+        """
+        return np.diff(self.before(edges, kind))
+
+
+def name_trigrams(name):
+    """Return the set of character trigrams of a case-folded name.
+
+    The name is padded with two spaces in front and one behind, so that its
+    first letters, which are rarely mistyped, count more.
+
+    :param name: A string.
+    :return: A set of three-character strings.
+    """
+    padded = f"  {name.casefold()} "
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+
+class NameIndex:
+    """An index of the names of NEOs, for exact, case-insensitive and fuzzy lookups.
+
+    Names are identified by their position in the sequence of names given to
+    the constructor. Missing names (None or empty) are not indexed.
+    """
+
+    def __init__(self, names):
+        """Create a new `NameIndex`.
+
+        :param names: A sequence of names, where None stands for a missing name.
+        """
+        self.exact = {}
+        self.folded = {}
+        postings = collections.defaultdict(list)
+        n_trigrams = []
+        for index, name in enumerate(names):
+            if not name:
+                n_trigrams.append(0)
+                continue
+            self.exact[name] = index
+            self.folded[name.casefold()] = index
+            trigrams = name_trigrams(name)
+            for trigram in trigrams:
+                postings[trigram].append(index)
+            n_trigrams.append(len(trigrams))
+        # The indices of the names containing each trigram, in increasing order.
+        self.postings = {
+            trigram: np.array(indices, dtype=np.int64) for trigram, indices in postings.items()
+        }
+        self.n_trigrams = np.array(n_trigrams, dtype=np.int64)
+
+    def get(self, name):
+        """Find a name exactly, or else ignoring case.
+
+        :param name: The name to search for.
+        :return: The index of the name, or None if it isn't indexed.
+        """
+        if not name:
+            return None
+        index = self.exact.get(name)
+        if index is None:
+            index = self.folded.get(name.casefold())
+        return index
+
+    def search(self, name, k=5, min_similarity=0.2):
+        """Rank the names by the similarity of their trigrams to those of a given name.
+
+        The similarity of two names is the Jaccard index of their sets of
+        trigrams: the number of shared trigrams over the number of distinct
+        trigrams of both. Only the names sharing some trigram are looked at.
+
+        :param name: The (possibly misspelled) name to search for.
+        :param k: The maximum number of names to return.
+        :param min_similarity: The minimum similarity of the returned names.
+        :return: A list of `(index, similarity)` tuples, most similar first.
+        """
+        trigrams = name_trigrams(name) if name else set()
+        found = [self.postings[trigram] for trigram in trigrams if trigram in self.postings]
+        if not found:
+            return []
+        candidates, shared = np.unique(np.concatenate(found), return_counts=True)
+        similarities = shared / (len(trigrams) + self.n_trigrams[candidates] - shared)
+        selected = similarities >= min_similarity
+        candidates, similarities = candidates[selected], similarities[selected]
+        order = np.lexsort((candidates, -similarities))[:k]
+        return list(zip(candidates[order].tolist(), similarities[order].tolist()))
+
+
+class PrefixIndex:
+    """A sorted index of strings, to find those starting with a prefix, ignoring case.
+
+    The strings are sorted by their casefolded forms, so the strings starting
+    with a prefix form a range of consecutive strings, whose ends are found by
+    bisection whatever the number of strings. Missing strings (None or empty)
+    are not indexed.
+    """
+
+    def __init__(self, strings):
+        """Create a new `PrefixIndex`.
+
+        :param strings: An iterable of strings, where None stands for a missing string.
+        """
+        pairs = sorted((string.casefold(), string) for string in strings if string)
+        self.keys = [key for key, _ in pairs]
+        self.strings = [string for _, string in pairs]
+
+    def __len__(self):
+        """Return the number of indexed strings."""
+        return len(self.strings)
+
+    def complete(self, prefix, limit=None):
+        """Find the strings that start with a prefix, ignoring case.
+
+        :param prefix: The prefix to complete.
+        :param limit: The maximum number of strings to return, or None for no limit.
+        :return: A list of the matching strings, in order ignoring case.
+        """
+        key = prefix.casefold()
+        start = bisect.bisect_left(self.keys, key)
+        # No casefolded string has a character beyond the last code point.
+        stop = bisect.bisect_left(self.keys, key + "\U0010ffff", start)
+        if limit is not None:
+            stop = min(stop, start + limit)
+        return self.strings[start:stop]
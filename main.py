@@ -5,7 +5,7 @@ See `README.md` for a detailed discussion of this project.
 
 This script can be invoked from the command line::
 
-    $ python3 main.py {inspect,query,interactive} [args]
+    $ python3 main.py {inspect,query,aggregate,next,clusters,timeseries,histogram2d,convert,interactive} [args]
 
 The `inspect` subcommand looks up an NEO by name or by primary designation, and
 optionally lists all of that NEO's known close approaches:
@@ -13,6 +13,12 @@ optionally lists all of that NEO's known close approaches:
     $ python3 main.py inspect --pdes 1P
     $ python3 main.py inspect --name Halley
     $ python3 main.py inspect --verbose --name Halley
+    $ python3 main.py inspect --summary --name Apophis
+
+It can also list the NEOs on the most similar orbits, by semi-major axis,
+eccentricity and inclination (and, with `--with-angles`, node and perihelion):
+
+    $ python3 main.py inspect --similar 10 --name Apophis
 
 The `query` subcommand searches for close approaches that match given criteria:
 
@@ -29,31 +35,142 @@ or JSON format:
     $ python3 main.py query --limit 5 --outfile results.csv
     $ python3 main.py query --limit 15 --outfile results.json
 
+To only count the matching close approaches, without listing them:
+
+    $ python3 main.py query --count --start-date 2000-01-01 --end-date 2009-12-31 --hazardous
+
+To quickly estimate the number of matches, and the distribution of their
+distance and velocity, from a random sample of the close approaches:
+
+    $ python3 main.py query --estimate --max-distance 0.05 --hazardous
+
+NEOs can also be selected by their orbital elements, which are then loaded
+from the NEO file as columns; `--orbital-columns` loads more of them, for
+example to convert them along with the data files:
+
+    $ python3 main.py query --max-moid 0.01 --max-H 20 --start-date 2030-01-01
+    $ python3 main.py --orbital-columns a,e,i,q,moid,H convert --outdir data/columns
+
+Likewise, the extra fields of close approaches, such as the 3-sigma bounds of
+the distance, are loaded as columns when filtered on or exported:
+
+    $ python3 main.py query --max-dist-min 0.002 --extra-columns dist_min,dist_max,v_inf \
+        --outfile risky.csv
+
+The uncertainty interval of the distance can also be compared to a band of
+distances, with an interval tree built over the intervals:
+
+    $ python3 main.py query --overlaps-distance 0 0.0005 --start-date 2030-01-01
+    $ python3 main.py query --within-distance 0.01 0.02 --max-velocity 10
+
+The `aggregate` subcommand groups the matching close approaches by NEO, year,
+month and/or hazardous flag, and summarizes each group with metrics such as
+`count`, `min_distance`, `max_velocity` or `mean_diameter`:
+
+    $ python3 main.py aggregate --group-by neo year --start-date 2020-01-01 --outfile report.csv
+    $ python3 main.py aggregate --group-by month --metrics count mean_velocity --hazardous
+
+The `next` subcommand lists the next close approach of each NEO after a given
+time (by default, now), sorted by time:
+
+    $ python3 main.py next --hazardous --limit 20
+    $ python3 main.py next --after 2030-01-01 --min-diameter 1.0 --outfile upcoming.csv
+
+The `clusters` subcommand finds bursts of close approaches of several NEOs
+within a short window of time:
+
+    $ python3 main.py clusters --window 6h --max-distance 0.05 --min-size 3
+
+The `timeseries` subcommand counts the close approaches (in total, of hazardous
+NEOs and of NEOs with a known diameter) per day, week or month, from counts per
+day precomputed when the data is loaded:
+
+    $ python3 main.py timeseries --start-date 2020-01-01 --end-date 2020-12-31 --interval week
+    $ python3 main.py timeseries --interval month --outfile monthly.csv
+
+The `histogram2d` subcommand counts the matching close approaches in a grid of
+bins of distance and velocity, with linear or logarithmic bins, and saves the
+edges and counts of the bins, for example to plot a heatmap:
+
+    $ python3 main.py histogram2d --log-distance --distance-bins 40 --outfile heatmap.json
+    $ python3 main.py histogram2d --hazardous --velocity-range 0 50 --outfile heatmap.csv
+
+Large queries can be spread over several worker processes:
+
+    $ python3 main.py query --workers 8 --max-distance 0.01 --outfile results.csv
+
+Close approach files that are too large to load can be streamed in chunks:
+
+    $ python3 main.py query --stream --chunk-size 50000 --hazardous --outfile results.csv
+
 The `interactive` subcommand loads the NEO database and spawns an interactive
 command shell that can repeatedly execute `inspect` and `query` commands without
 having to wait to reload the database each time. However, it doesn't hot-reload.
+The shell completes flags, designations, names and other values with the Tab key.
 
 If needed, the script can load data from data files other than the default with
 `--neofile` or `--cadfile`.
+
+The `convert` subcommand converts the data files into a directory of column
+files, which can then be memory-mapped with `--columns` instead of parsing the
+data files on every run:
+
+    $ python3 main.py convert --outdir data/columns
+    $ python3 main.py --columns data/columns query --max-distance 0.01
+
+With `--partition-by year`, a query on the converted files only reads the years
+that can match its filters:
+
+    $ python3 main.py convert --partition-by year --outdir data/by-year
+    $ python3 main.py --columns data/by-year query --start-date 2020-03-01 --end-date 2020-03-31
+
+Alternatively, `--sqlite` keeps the data in an indexed SQLite file, which is
+imported from the data files on first use:
+
+    $ python3 main.py --sqlite data/neos.sqlite query --max-distance 0.01
 """
 import argparse
 import cmd
 import datetime
+import glob
 import pathlib
+import re
 import shlex
 import sys
 import time
 
-from extract import load_neos, load_approaches
-from database import NEODatabase
-from filters import create_filters, limit
-from write import write_to_csv, write_to_json
+from aggregate import GROUP_KEYS, DEFAULT_METRICS, parse_metric, aggregate_fieldnames
+from aggregate import TIME_SERIES_INTERVALS, TIME_SERIES_FIELDNAMES
+from aggregate import HISTOGRAM_FIELDNAMES, histogram_rows
+from extract import load_neos, load_approaches, load_orbital_columns, load_approach_columns
+from database import NEODatabase, ApproachStream, QueryStats
+from database import SIMILARITY_ELEMENTS, SIMILARITY_ANGLES
+from sqlite_database import SQLiteDatabase
+from filters import ORBITAL_COLUMNS, EXTRA_APPROACH_COLUMNS, UnsupportedCriterionError
+from filters import create_filters, extra_columns
+from write import write_to_csv, write_to_json, write_rows_to_csv, write_rows_to_json
+from write import write_histogram_to_json
 
 
 # Paths to the root of the project and the `data` subfolder.
 PROJECT_ROOT = pathlib.Path(__file__).parent.resolve()
 DATA_ROOT = PROJECT_ROOT / "data"
 
+# The fields of the clusters found by the `clusters` subcommand.
+CLUSTER_FIELDNAMES = ("start", "end", "approaches", "neos", "min_distance", "designations")
+
+# The orbital elements that can be filtered on, with the unit and the
+# description of each.
+ORBITAL_FILTERS = {
+    "a": ("In astronomical units. ", "semi-major axes"),
+    "e": ("", "eccentricities"),
+    "i": ("In degrees. ", "inclinations"),
+    "q": ("In astronomical units. ", "perihelion distances"),
+    "moid": ("In astronomical units. ", "Earth minimum orbit intersection distances"),
+    "H": ("", "absolute magnitudes"),
+    "albedo": ("", "geometric albedos"),
+}
+
 # The current time, for use with the kill-on-change feature of the interactive shell.
 _START = time.time()
 
@@ -75,6 +192,225 @@ def date_fromisoformat(date_string):
         )
 
 
+def metric_name(metric):
+    """Check that a string names a metric, for use as an argparse type.
+
+    :param metric: The name of a metric, such as "count" or "min_distance".
+    :return: The name of the metric.
+    """
+    try:
+        parse_metric(metric)
+    except ValueError as err:
+        raise argparse.ArgumentTypeError(str(err))
+    return metric
+
+
+def column_names(choices):
+    """Create an argparse type splitting a comma-separated list of column names.
+
+    :param choices: The names of the columns that can be chosen.
+    :return: A function turning a string such as "a,e,i,moid" into a list of names.
+    """
+
+    def split(names_string):
+        names = [name.strip() for name in names_string.split(",") if name.strip()]
+        unknown = [name for name in names if name not in choices]
+        if unknown:
+            raise argparse.ArgumentTypeError(
+                f"Unknown columns: {', '.join(unknown)}. Choose among {', '.join(choices)}."
+            )
+        return names
+
+    # The shell completes the names of the columns from the choices.
+    split.choices = choices
+    return split
+
+
+def add_neo_filter_arguments(filters):
+    """Add the filters on the attributes of NEOs to an argument group.
+
+    :param filters: An argparse argument group.
+    """
+    filters.add_argument(
+        "--min-diameter",
+        dest="diameter_min",
+        type=float,
+        help="In kilometers. Only return close approaches of NEOs with "
+        "diameters as large or larger than the given size.",
+    )
+    filters.add_argument(
+        "--max-diameter",
+        dest="diameter_max",
+        type=float,
+        help="In kilometers. Only return close approaches of NEOs with "
+        "diameters as small or smaller than the given size.",
+    )
+    filters.add_argument(
+        "--hazardous",
+        dest="hazardous",
+        default=None,
+        action="store_true",
+        help="If specified, only return close approaches of NEOs that "
+        "are potentially hazardous.",
+    )
+    filters.add_argument(
+        "--not-hazardous",
+        dest="hazardous",
+        default=None,
+        action="store_false",
+        help="If specified, only return close approaches of NEOs that "
+        "are not potentially hazardous.",
+    )
+    for name, (unit, description) in ORBITAL_FILTERS.items():
+        for bound, comparison in (("min", "as large or larger"), ("max", "as small or smaller")):
+            filters.add_argument(
+                f"--{bound}-{name}",
+                dest=f"{name}_{bound}",
+                type=float,
+                help=f"{unit}Only return close approaches of NEOs with {description} "
+                f"{comparison} than the given value.",
+            )
+
+
+def add_extra_filter_arguments(filters):
+    """Add the filters on the extra fields of close approaches to an argument group.
+
+    :param filters: An argparse argument group.
+    """
+    for flag, dest, description in (
+        ("jd", "jd", "Julian dates (TDB)"),
+        ("dist-min", "dist_lower", "minimum possible (3-sigma) distances, in astronomical units,"),
+        ("dist-max", "dist_upper", "maximum possible (3-sigma) distances, in astronomical units,"),
+        ("v-inf", "v_inf", "velocities relative to a massless Earth, in kilometers per second,"),
+        ("approach-H", "approach_H", "absolute magnitudes of the NEO at approach"),
+    ):
+        for bound, comparison in (("min", "as large or larger"), ("max", "as small or smaller")):
+            filters.add_argument(
+                f"--{bound}-{flag}",
+                dest=f"{dest}_{bound}",
+                type=float,
+                help=f"Only return close approaches with {description} "
+                f"{comparison} than the given value.",
+            )
+    filters.add_argument(
+        "--overlaps-distance",
+        dest="distance_overlaps",
+        nargs=2,
+        type=float,
+        metavar=("LO", "HI"),
+        help="In astronomical units. Only return close approaches whose possible (3-sigma) "
+        "distances overlap the given band of distances.",
+    )
+    filters.add_argument(
+        "--within-distance",
+        dest="distance_within",
+        nargs=2,
+        type=float,
+        metavar=("LO", "HI"),
+        help="In astronomical units. Only return close approaches whose possible (3-sigma) "
+        "distances all lie within the given band of distances.",
+    )
+
+
+def extra_filter_arguments(args):
+    """Collect the filters on extra fields of close approaches supplied at the command line.
+
+    :param args: All arguments from the command line, as parsed by the top-level parser.
+    :return: A dictionary of keyword arguments for `create_filters`, such as `dist_lower_max`,
+        which are None for the subcommands without these filters.
+    """
+    arguments = {
+        f"{root}_{bound}": getattr(args, f"{root}_{bound}", None)
+        for root in ("jd", "dist_lower", "dist_upper", "v_inf", "approach_H")
+        for bound in ("min", "max")
+    }
+    for band in ("distance_overlaps", "distance_within"):
+        value = getattr(args, band, None)
+        arguments[band] = tuple(value) if value else None
+    return arguments
+
+
+def required_extra_columns(args):
+    """Return the extra columns of close approaches to load for the command-line arguments.
+
+    These are the columns given with `--approach-columns`, followed by those
+    needed by the filters or exported with `query --extra-columns`.
+
+    :param args: All arguments from the command line, as parsed by the top-level parser.
+    :return: A list of `filters.EXTRA_APPROACH_COLUMNS`.
+    """
+    filtered = extra_columns(create_filters(**extra_filter_arguments(args)))
+    exported = getattr(args, "extra_columns", None) or []
+    return list(dict.fromkeys(args.approach_columns + filtered + exported))
+
+
+def orbital_filter_arguments(args):
+    """Collect the orbital filters supplied at the command line.
+
+    :param args: All arguments from the command line, as parsed by the top-level parser.
+    :return: A dictionary of keyword arguments for `create_filters`, such as `moid_max`,
+        which are None for the subcommands without orbital filters.
+    """
+    return {
+        f"{name}_{bound}": getattr(args, f"{name}_{bound}", None)
+        for name in ORBITAL_FILTERS
+        for bound in ("min", "max")
+    }
+
+
+def required_orbital_columns(args):
+    """Return the orbital columns to load for the arguments supplied at the command line.
+
+    These are the columns given with `--orbital-columns`, followed by those
+    needed by the orbital filters or by `inspect --similar`.
+
+    :param args: All arguments from the command line, as parsed by the top-level parser.
+    :return: A list of `filters.ORBITAL_COLUMNS`.
+    """
+    filtered = [
+        key.rpartition("_")[0]
+        for key, value in orbital_filter_arguments(args).items()
+        if value is not None
+    ]
+    if getattr(args, "similar", None):
+        filtered.extend(SIMILARITY_ELEMENTS + (SIMILARITY_ANGLES if args.with_angles else ()))
+    return list(dict.fromkeys(args.orbital_columns + filtered))
+
+
+def datetime_fromisoformat(datetime_string):
+    """Return a `datetime.datetime` corresponding to a string in YYYY-MM-DD[ HH:MM] format.
+
+    :param datetime_string: A date in the format YYYY-MM-DD, optionally followed by a time.
+    :return: A `datetime.datetime`, at midnight if no time was given.
+    """
+    for pattern in ("%Y-%m-%d %H:%M", "%Y-%m-%d"):
+        try:
+            return datetime.datetime.strptime(datetime_string, pattern)
+        except ValueError:
+            pass
+    raise argparse.ArgumentTypeError(
+        f"'{datetime_string}' is not a valid datetime. Use YYYY-MM-DD or 'YYYY-MM-DD HH:MM'."
+    )
+
+
+def duration_minutes(duration_string):
+    """Return the number of minutes in a duration such as 90m, 6h or 2d.
+
+    :param duration_string: A positive number followed by m (minutes), h (hours) or d (days).
+    :return: The duration in minutes, as a float.
+    """
+    units = {"m": 1, "h": 60, "d": 24 * 60}
+    try:
+        minutes = float(duration_string[:-1]) * units[duration_string[-1]]
+    except (KeyError, ValueError, IndexError):
+        minutes = None
+    if minutes is None or minutes <= 0:
+        raise argparse.ArgumentTypeError(
+            f"'{duration_string}' is not a valid duration. Use e.g. 90m, 6h or 2d."
+        )
+    return minutes
+
+
 def make_parser():
     """Create an ArgumentParser for this script.
 
@@ -97,6 +433,36 @@ def make_parser():
         type=pathlib.Path,
         help="Path to JSON file of close approach data.",
     )
+    parser.add_argument(
+        "--columns",
+        type=pathlib.Path,
+        help="Path to a directory of column files written by `convert`. "
+        "If given, the data files are not read.",
+    )
+    parser.add_argument(
+        "--orbital-columns",
+        type=column_names(ORBITAL_COLUMNS),
+        default=[],
+        help="A comma-separated list of orbital elements (among "
+        f"{', '.join(ORBITAL_COLUMNS)}) to load from the NEO file as columns of "
+        "NEOs, besides those needed by the filters. Their memory use is printed "
+        "to standard error.",
+    )
+    parser.add_argument(
+        "--approach-columns",
+        type=column_names(EXTRA_APPROACH_COLUMNS),
+        default=[],
+        help="A comma-separated list of extra fields of close approaches (among "
+        f"{', '.join(EXTRA_APPROACH_COLUMNS)}) to load from the close approach file "
+        "as columns, besides those needed by the filters and --extra-columns. Their "
+        "memory use is printed to standard error.",
+    )
+    parser.add_argument(
+        "--sqlite",
+        type=pathlib.Path,
+        help="Path to an SQLite database file. If the file doesn't exist yet, "
+        "it is imported from the data files first.",
+    )
     subparsers = parser.add_subparsers(dest="cmd")
 
     # Add the `inspect` subcommand parser.
@@ -107,7 +473,26 @@ def make_parser():
         "-v",
         "--verbose",
         action="store_true",
-        help="Additionally, print all known close approaches of this NEO.",
+        help="Additionally, print all known close approaches of this NEO, sorted by time.",
+    )
+    inspect.add_argument(
+        "-s",
+        "--summary",
+        action="store_true",
+        help="Additionally, print a summary of the close approaches of this NEO: "
+        "their number, the first and last, the closest, and the maximum velocity.",
+    )
+    inspect.add_argument(
+        "--similar",
+        type=int,
+        metavar="K",
+        help="Additionally, print the K NEOs whose orbits are most similar to this NEO's.",
+    )
+    inspect.add_argument(
+        "--with-angles",
+        action="store_true",
+        help="With --similar, also compare the longitudes of the ascending node "
+        "and the arguments of perihelion.",
     )
     inspect_id = inspect.add_mutually_exclusive_group(required=True)
     inspect_id.add_argument(
@@ -119,12 +504,9 @@ def make_parser():
         "-n", "--name", help="The IAU name of the NEO to inspect (e.g. 'Halley')."
     )
 
-    # Add the `query` subcommand parser.
-    query = subparsers.add_parser(
-        "query",
-        description="Query for close approaches that " "match a collection of filters.",
-    )
-    filters = query.add_argument_group(
+    # The filters are shared by the `query` and `aggregate` subcommand parsers.
+    filter_parser = argparse.ArgumentParser(add_help=False)
+    filters = filter_parser.add_argument_group(
         "Filters",
         description="Filter close approaches by their attributes "
         "or the attributes of their NEOs.",
@@ -180,44 +562,151 @@ def make_parser():
         "whose relative velocity to Earth at approach is as slow or slower "
         "than the given velocity.",
     )
-    filters.add_argument(
-        "--min-diameter",
-        dest="diameter_min",
-        type=float,
-        help="In kilometers. Only return close approaches of NEOs with "
-        "diameters as large or larger than the given size.",
+    add_neo_filter_arguments(filters)
+    add_extra_filter_arguments(filters)
+
+    # Add the `query` subcommand parser.
+    query = subparsers.add_parser(
+        "query",
+        description="Query for close approaches that " "match a collection of filters.",
+        parents=[filter_parser],
     )
-    filters.add_argument(
-        "--max-diameter",
-        dest="diameter_max",
+    query.add_argument(
+        "-l",
+        "--limit",
+        type=int,
+        help="The maximum number of matches to return. "
+        "Defaults to 10 if no --outfile is given.",
+    )
+    query.add_argument(
+        "-c",
+        "--count",
+        action="store_true",
+        help="Print the number of matching close approaches instead of the matches.",
+    )
+    query.add_argument(
+        "--estimate",
+        action="store_true",
+        help="Print an estimate of the number of matching close approaches, and of the "
+        "quantiles of their distance and velocity, from a random sample of the approaches.",
+    )
+    query.add_argument(
+        "--time-budget",
         type=float,
-        help="In kilometers. Only return close approaches of NEOs with "
-        "diameters as small or smaller than the given size.",
+        default=0.1,
+        help="The maximum time spent on an --estimate, in seconds. Defaults to 0.1.",
     )
-    filters.add_argument(
-        "--hazardous",
-        dest="hazardous",
-        default=None,
+    query.add_argument(
+        "-x",
+        "--extra-columns",
+        type=column_names(EXTRA_APPROACH_COLUMNS),
+        help="A comma-separated list of extra fields of close approaches "
+        f"(among {', '.join(EXTRA_APPROACH_COLUMNS)}) to print or save with each match.",
+    )
+    query.add_argument(
+        "-w",
+        "--workers",
+        type=int,
+        default=1,
+        help="The number of worker processes used to scan close approaches. "
+        "Defaults to 1 (a sequential scan).",
+    )
+    query.add_argument(
+        "--stats",
         action="store_true",
-        help="If specified, only return close approaches of NEOs that "
-        "are potentially hazardous.",
+        help="Additionally, print how many blocks of close approaches the query "
+        "scanned and skipped to standard error.",
     )
-    filters.add_argument(
-        "--not-hazardous",
-        dest="hazardous",
-        default=None,
-        action="store_false",
-        help="If specified, only return close approaches of NEOs that "
-        "are not potentially hazardous.",
+    query.add_argument(
+        "--stream",
+        action="store_true",
+        help="Read the close approach file in chunks instead of loading it. "
+        "Only applies on the command line, not in an interactive session.",
+    )
+    query.add_argument(
+        "--chunk-size",
+        type=int,
+        default=100_000,
+        help="The maximum number of close approaches held in memory with --stream. "
+        "Defaults to 100000.",
     )
     query.add_argument(
+        "-o",
+        "--outfile",
+        type=pathlib.Path,
+        help="File in which to save structured results. "
+        "If omitted, results are printed to standard output.",
+    )
+
+    aggregate = subparsers.add_parser(
+        "aggregate",
+        description="Group the close approaches that match a collection of filters "
+        "and summarize each group.",
+        parents=[filter_parser],
+    )
+    aggregate.add_argument(
+        "-g",
+        "--group-by",
+        nargs="+",
+        choices=GROUP_KEYS,
+        default=["neo"],
+        help="The keys by which to group close approaches. Defaults to neo.",
+    )
+    aggregate.add_argument(
+        "-m",
+        "--metrics",
+        nargs="+",
+        type=metric_name,
+        default=list(DEFAULT_METRICS),
+        help="The metrics of each group: count, or min, max or mean followed by "
+        "_distance, _velocity or _diameter. Defaults to count min_distance max_velocity.",
+    )
+    aggregate.add_argument(
         "-l",
         "--limit",
         type=int,
-        help="The maximum number of matches to return. "
+        help="The maximum number of groups to print. "
         "Defaults to 10 if no --outfile is given.",
     )
-    query.add_argument(
+    aggregate.add_argument(
+        "--stats",
+        action="store_true",
+        help="Additionally, print how many blocks of close approaches the query "
+        "scanned and skipped to standard error.",
+    )
+    aggregate.add_argument(
+        "-o",
+        "--outfile",
+        type=pathlib.Path,
+        help="File in which to save the groups, as CSV or JSON. "
+        "If omitted, groups are printed to standard output.",
+    )
+
+    next_parser = subparsers.add_parser(
+        "next",
+        description="Find the next close approach of each NEO after a given time, "
+        "sorted by time.",
+    )
+    next_parser.add_argument(
+        "-a",
+        "--after",
+        type=datetime_fromisoformat,
+        help="Only return close approaches after the given time, in YYYY-MM-DD "
+        "or 'YYYY-MM-DD HH:MM' format (UTC). Defaults to now.",
+    )
+    add_neo_filter_arguments(
+        next_parser.add_argument_group(
+            "Filters", description="Filter NEOs by their attributes."
+        )
+    )
+    next_parser.add_argument(
+        "-l",
+        "--limit",
+        type=int,
+        help="The maximum number of approaches to return. "
+        "Defaults to 10 if no --outfile is given.",
+    )
+    next_parser.add_argument(
         "-o",
         "--outfile",
         type=pathlib.Path,
@@ -225,6 +714,131 @@ def make_parser():
         "If omitted, results are printed to standard output.",
     )
 
+    clusters = subparsers.add_parser(
+        "clusters",
+        description="Find windows of time in which several NEOs make close approaches "
+        "that match a collection of filters.",
+        parents=[filter_parser],
+    )
+    clusters.add_argument(
+        "-W",
+        "--window",
+        type=duration_minutes,
+        default=6 * 60,
+        help="The length of the sliding window, such as 90m, 6h or 2d. Defaults to 6h.",
+    )
+    clusters.add_argument(
+        "-n",
+        "--min-size",
+        type=int,
+        default=3,
+        help="The minimum number of NEOs in a cluster. Defaults to 3.",
+    )
+    clusters.add_argument(
+        "-l",
+        "--limit",
+        type=int,
+        help="The maximum number of clusters to print. "
+        "Defaults to 10 if no --outfile is given.",
+    )
+    clusters.add_argument(
+        "-o",
+        "--outfile",
+        type=pathlib.Path,
+        help="File in which to save the clusters, as CSV or JSON. "
+        "If omitted, clusters are printed to standard output.",
+    )
+
+    timeseries = subparsers.add_parser(
+        "timeseries",
+        description="Count the close approaches per day, week or month between two dates.",
+    )
+    timeseries.add_argument(
+        "-s",
+        "--start-date",
+        type=date_fromisoformat,
+        help="The first date, in YYYY-MM-DD format. Defaults to the date of the first approach.",
+    )
+    timeseries.add_argument(
+        "-e",
+        "--end-date",
+        type=date_fromisoformat,
+        help="The last date, in YYYY-MM-DD format. Defaults to the date of the last approach.",
+    )
+    timeseries.add_argument(
+        "-i",
+        "--interval",
+        choices=TIME_SERIES_INTERVALS,
+        default="day",
+        help="The period of time of each count. Weeks start on Mondays. Defaults to day.",
+    )
+    timeseries.add_argument(
+        "-l",
+        "--limit",
+        type=int,
+        help="The maximum number of periods to print. "
+        "Defaults to 10 if no --outfile is given.",
+    )
+    timeseries.add_argument(
+        "-o",
+        "--outfile",
+        type=pathlib.Path,
+        help="File in which to save the counts, as CSV or JSON. "
+        "If omitted, counts are printed to standard output.",
+    )
+
+    histogram = subparsers.add_parser(
+        "histogram2d",
+        description="Count the close approaches that match a collection of filters "
+        "in a grid of bins of distance and velocity.",
+        parents=[filter_parser],
+    )
+    for name, unit in (("distance", "astronomical units"), ("velocity", "kilometers per second")):
+        histogram.add_argument(
+            f"--{name}-bins",
+            type=int,
+            default=50,
+            help=f"The number of bins of {name}. Defaults to 50.",
+        )
+        histogram.add_argument(
+            f"--{name}-range",
+            nargs=2,
+            type=float,
+            metavar=("LO", "HI"),
+            help=f"In {unit}. The ends of the bins of {name}. "
+            f"Defaults to the range of the {name}s of the matches.",
+        )
+        histogram.add_argument(
+            f"--log-{name}",
+            action="store_true",
+            help=f"Use bins of {name} of equal ratios instead of equal widths.",
+        )
+    histogram.add_argument(
+        "-o",
+        "--outfile",
+        type=pathlib.Path,
+        help="File in which to save the edges and counts of the bins, as JSON, or one row "
+        "per bin as CSV. If omitted, the counts are printed to standard output.",
+    )
+
+    convert = subparsers.add_parser(
+        "convert",
+        description="Convert the data files into a directory of column files.",
+    )
+    convert.add_argument(
+        "-o",
+        "--outdir",
+        type=pathlib.Path,
+        required=True,
+        help="Directory in which to save the column files.",
+    )
+    convert.add_argument(
+        "--partition-by",
+        choices=("year",),
+        help="Save the close approaches of each year in a separate partition, "
+        "so that queries skip the years that can't match.",
+    )
+
     repl = subparsers.add_parser(
         "interactive",
         description="Start an interactive command session "
@@ -239,21 +853,29 @@ def make_parser():
     return parser, inspect, query
 
 
-def inspect(database, pdes=None, name=None, verbose=False):
+def inspect(
+    database, pdes=None, name=None, verbose=False, summary=False, similar=None, angles=False
+):
     """Perform the `inspect` subcommand.
 
     This function fetches an NEO by designation or by name. If a matching NEO is
     found, information about the NEO is printed (additionally, information for
-    all of the NEO's known close approaches is printed if `verbose=True`).
+    all of the NEO's known close approaches is printed if `verbose=True`, and a
+    precomputed summary of them if `summary=True`, and the `similar` NEOs on
+    the most similar orbits if given).
     Otherwise, a message is printed noting that there are no matching NEOs.
 
     At least one of `pdes` and `name` must be given. If both are given, prefer
-    to look up the NEO by the primary designation.
+    to look up the NEO by the primary designation. A name may differ in case;
+    if no NEO has the name, the NEOs with the most similar names are suggested.
 
     :param database: The `NEODatabase` containing data on NEOs and their close approaches.
     :param pdes: The primary designation of an NEO for which to search.
     :param name: The name of an NEO for which to search.
     :param verbose: Whether to additionally print all of a matching NEO's close approaches.
+    :param summary: Whether to additionally print the summary of a matching NEO's close approaches.
+    :param similar: The number of NEOs on similar orbits to additionally print, if any.
+    :param angles: Whether to compare the node and perihelion angles of similar orbits.
     :return: The matching `NearEarthObject`, or None if not found.
     """
     # Fetch the NEO of interest.
@@ -262,35 +884,36 @@ def inspect(database, pdes=None, name=None, verbose=False):
     else:
         neo = database.get_neo_by_name(name)
 
-    # Ensure that we have received an NEO.
+    # Ensure that we have received an NEO, or else suggest similar names.
     if not neo:
         print("No matching NEOs exist in the database.", file=sys.stderr)
+        matches = database.search_neos_by_name(name) if name and not pdes else []
+        if matches:
+            print("Did you mean:", file=sys.stderr)
+            for other, similarity in matches:
+                print(f"? {other.fullname} (similarity {similarity:.2f})", file=sys.stderr)
         return None
 
     # Display information about this NEO, and optionally its close approaches if verbose.
     print(neo)
+    if summary:
+        print(database.get_summary(neo))
     if verbose:
         for approach in neo.approaches:
             print(f"- {approach}")
+    if similar:
+        for other, distance in database.similar_neos(neo.designation, similar, angles=angles):
+            print(f"~ {other} (orbit distance {distance:.3f})")
     return neo
 
 
-def query(database, args):
-    """Perform the `query` subcommand.
+def filters_from_args(args):
+    """Construct a collection of filters from arguments supplied at the command line.
 
-    Create a collection of filters with `create_filters` and supply them to the
-    database's `query` method to produce a stream of matching results.
-
-    If an output file wasn't given, print these results to stdout, limiting to
-    10 entries if no limit was specified. If an output file was given, use the
-    file's extension to infer whether the file should hold CSV or JSON data, and
-    then write the results to the output file in that format.
-
-    :param database: The `NEODatabase` containing data on NEOs and their close approaches.
     :param args: All arguments from the command line, as parsed by the top-level parser.
+    :return: A collection of filters for use with `query`.
     """
-    # Construct a collection of filters from arguments supplied at the command line.
-    filters = create_filters(
+    return create_filters(
         date=args.date,
         start_date=args.start_date,
         end_date=args.end_date,
@@ -301,25 +924,297 @@ def query(database, args):
         diameter_min=args.diameter_min,
         diameter_max=args.diameter_max,
         hazardous=args.hazardous,
+        **orbital_filter_arguments(args),
+        **extra_filter_arguments(args),
     )
-    # Query the database with the collection of filters.
-    results = database.query(filters)
 
-    if not args.outfile:
+
+def query(database, args):
+    """Perform the `query` subcommand.
+
+    Create a collection of filters with `create_filters` and supply them to the
+    database's `query` method to produce a stream of matching results.
+
+    With `--count`, only print the number of matching close approaches. With
+    `--estimate`, print an estimate of their number and distribution computed
+    from a random sample of the approaches instead. With `--extra-columns`, the
+    values of those columns are printed or saved along with each close approach.
+
+    If an output file wasn't given, print these results to stdout, limiting to
+    10 entries if no limit was specified. If an output file was given, use the
+    file's extension to infer whether the file should hold CSV or JSON data, and
+    then write the results to the output file in that format.
+
+    :param database: The `NEODatabase` containing data on NEOs and their close approaches.
+    :param args: All arguments from the command line, as parsed by the top-level parser.
+    """
+    filters = filters_from_args(args)
+    extra_columns = getattr(args, "extra_columns", None) or []
+    stats = QueryStats()
+
+    def run_query(limit):
+        if extra_columns:
+            return database.query_columns(
+                filters, extra_columns, limit=limit, workers=args.workers, stats=stats
+            )
+        return database.query(filters, limit=limit, workers=args.workers, stats=stats)
+
+    if args.estimate:
+        if not isinstance(database, NEODatabase):
+            raise UnsupportedCriterionError("--estimate needs the in-memory database or --columns.")
+        print(database.estimate(filters, budget=args.time_budget))
+    elif args.count:
+        print(database.count(filters, workers=args.workers, stats=stats))
+    elif not args.outfile:
         # Write the results to stdout, limiting to 10 entries if not specified.
-        for result in limit(results, args.limit or 10):
-            print(result)
+        for result in run_query(args.limit or 10):
+            if extra_columns:
+                approach, values = result
+                extras = ", ".join(f"{name}: {value}" for name, value in values.items())
+                print(f"{approach} ({extras})")
+            else:
+                print(result)
     else:
-        # Write the results to a file.
+        # Write the results to a file, pushing the limit down into the query.
+        results = run_query(args.limit)
         if args.outfile.suffix == ".csv":
-            write_to_csv(limit(results, args.limit), args.outfile)
+            write_to_csv(results, args.outfile, extra_columns)
         elif args.outfile.suffix == ".json":
-            write_to_json(limit(results, args.limit), args.outfile)
+            write_to_json(results, args.outfile, extra_columns)
         else:
             print(
                 "Please use an output file that ends with `.csv` or `.json`.",
                 file=sys.stderr,
             )
+    if args.stats:
+        print(stats, file=sys.stderr)
+
+
+def aggregate(database, args):
+    """Perform the `aggregate` subcommand.
+
+    Group the close approaches that match the filters with the database's
+    `aggregate` method. If an output file wasn't given, print the groups to
+    stdout, limiting to 10 groups if no limit was specified. Otherwise, write
+    them to the output file as CSV or JSON, depending on its extension.
+
+    :param database: The `NEODatabase` containing data on NEOs and their close approaches.
+    :param args: All arguments from the command line, as parsed by the top-level parser.
+    """
+    stats = QueryStats()
+    rows = database.aggregate(
+        filters_from_args(args), group_by=args.group_by, metrics=args.metrics, stats=stats
+    )
+    if not args.outfile:
+        for row in rows[: args.limit or 10]:
+            print(", ".join(f"{field}: {value}" for field, value in row.items()))
+    elif args.outfile.suffix == ".csv":
+        write_rows_to_csv(
+            rows[: args.limit or None],
+            aggregate_fieldnames(args.group_by, args.metrics),
+            args.outfile,
+        )
+    elif args.outfile.suffix == ".json":
+        write_rows_to_json(rows[: args.limit or None], args.outfile)
+    else:
+        print(
+            "Please use an output file that ends with `.csv` or `.json`.",
+            file=sys.stderr,
+        )
+    if args.stats:
+        print(stats, file=sys.stderr)
+
+
+def next_approaches(database, args):
+    """Perform the `next` subcommand.
+
+    Find the next close approach of each NEO matching the NEO filters after the
+    given time (or now), with the database's `next_approaches` method. Print
+    them to stdout, limiting to 10 approaches if no limit was specified, or
+    write them to the output file as CSV or JSON, depending on its extension.
+
+    :param database: The `NEODatabase` containing data on NEOs and their close approaches.
+    :param args: All arguments from the command line, as parsed by the top-level parser.
+    """
+    filters = create_filters(
+        diameter_min=args.diameter_min,
+        diameter_max=args.diameter_max,
+        hazardous=args.hazardous,
+        **orbital_filter_arguments(args),
+    )
+    after = args.after or datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None)
+    if not args.outfile:
+        for approach in database.next_approaches(after, filters, limit=args.limit or 10):
+            print(approach)
+        return
+    results = database.next_approaches(after, filters, limit=args.limit)
+    if args.outfile.suffix == ".csv":
+        write_to_csv(results, args.outfile)
+    elif args.outfile.suffix == ".json":
+        write_to_json(results, args.outfile)
+    else:
+        print(
+            "Please use an output file that ends with `.csv` or `.json`.",
+            file=sys.stderr,
+        )
+
+
+def clusters(database, args):
+    """Perform the `clusters` subcommand.
+
+    Find the clusters of close approaches that match the filters with the
+    database's `clusters` method. Print them to stdout, limiting to 10 clusters
+    if no limit was specified, or write them to the output file as CSV or JSON,
+    depending on its extension.
+
+    :param database: The `NEODatabase` containing data on NEOs and their close approaches.
+    :param args: All arguments from the command line, as parsed by the top-level parser.
+    """
+    rows = database.clusters(
+        filters_from_args(args), window=args.window, min_size=args.min_size
+    )
+    if not args.outfile:
+        for row in rows[: args.limit or 10]:
+            print(
+                f"{row['neos']} NEOs ({row['approaches']} approaches) from {row['start']} "
+                f"to {row['end']}, closest at {row['min_distance']} au: {row['designations']}"
+            )
+    elif args.outfile.suffix == ".csv":
+        write_rows_to_csv(rows[: args.limit or None], CLUSTER_FIELDNAMES, args.outfile)
+    elif args.outfile.suffix == ".json":
+        write_rows_to_json(rows[: args.limit or None], args.outfile)
+    else:
+        print(
+            "Please use an output file that ends with `.csv` or `.json`.",
+            file=sys.stderr,
+        )
+
+
+def timeseries(database, args):
+    """Perform the `timeseries` subcommand.
+
+    Count the close approaches per period with the database's `timeseries`
+    method. Print the counts to stdout, limiting to 10 periods if no limit was
+    specified, or write them to the output file as CSV or JSON, depending on its
+    extension.
+
+    :param database: The `NEODatabase` containing data on NEOs and their close approaches.
+    :param args: All arguments from the command line, as parsed by the top-level parser.
+    """
+    rows = database.timeseries(args.start_date, args.end_date, interval=args.interval)
+    if not args.outfile:
+        for row in rows[: args.limit or 10]:
+            print(
+                f"{row['period']}: {row['approaches']} approaches, {row['hazardous']} hazardous, "
+                f"{row['diameter_known']} with a known diameter"
+            )
+    elif args.outfile.suffix == ".csv":
+        write_rows_to_csv(rows[: args.limit or None], TIME_SERIES_FIELDNAMES, args.outfile)
+    elif args.outfile.suffix == ".json":
+        write_rows_to_json(rows[: args.limit or None], args.outfile)
+    else:
+        print(
+            "Please use an output file that ends with `.csv` or `.json`.",
+            file=sys.stderr,
+        )
+
+
+def histogram(database, args):
+    """Perform the `histogram2d` subcommand.
+
+    Count the close approaches that match the filters in a grid of bins with
+    the database's `histogram2d` method. Print the counts to stdout, one line
+    per bin of distance, or write them to the output file: as the edges and
+    the counts of the bins in JSON, or as one row per bin in CSV.
+
+    :param database: The `NEODatabase` containing data on NEOs and their close approaches.
+    :param args: All arguments from the command line, as parsed by the top-level parser.
+    """
+    try:
+        distance_edges, velocity_edges, counts = database.histogram2d(
+            filters_from_args(args),
+            distance_bins=args.distance_bins,
+            velocity_bins=args.velocity_bins,
+            distance_range=args.distance_range,
+            velocity_range=args.velocity_range,
+            log_distance=args.log_distance,
+            log_velocity=args.log_velocity,
+        )
+    except ValueError as error:
+        print(error, file=sys.stderr)
+        return
+    if not args.outfile:
+        print("velocity edges (km/s): " + " ".join(f"{edge:.4g}" for edge in velocity_edges))
+        for i, row in enumerate(counts):
+            counts_row = " ".join(str(count) for count in row)
+            print(f"distance {distance_edges[i]:.4g} to {distance_edges[i + 1]:.4g} au: {counts_row}")
+    elif args.outfile.suffix == ".csv":
+        write_rows_to_csv(
+            histogram_rows(distance_edges, velocity_edges, counts), HISTOGRAM_FIELDNAMES, args.outfile
+        )
+    elif args.outfile.suffix == ".json":
+        write_histogram_to_json(distance_edges, velocity_edges, counts, args.outfile)
+    else:
+        print(
+            "Please use an output file that ends with `.csv` or `.json`.",
+            file=sys.stderr,
+        )
+
+
+# The maximum number of designations or names offered by a completion in the shell.
+COMPLETION_LIMIT = 100
+
+# A word of a partial command line, as split by `shlex.split`: escaped characters,
+# unquoted characters and quoted strings, of which the last may be unterminated.
+_WORD = re.compile(r"""(?:\\.?|[^\s"'\\]|"(?:\\.?|[^"\\])*"?|'[^']*'?)+""")
+
+
+def split_partial_line(line):
+    """Split the start of a command line into words, keeping where each one starts.
+
+    Unlike `shlex.split`, an unterminated quote or escape at the end of the
+    line, as in a word being typed, isn't an error.
+
+    :param line: The text of a command line, up to the cursor.
+    :return: A list of `(start, raw, word)` tuples, with the offset of the word in
+        the line, the word as typed and the word once unquoted.
+    """
+    words = []
+    for match in _WORD.finditer(line):
+        raw = match.group()
+        word = raw
+        for closing in ("", '"', "'"):
+            try:
+                word = "".join(shlex.split(raw + closing))
+                break
+            except ValueError:
+                continue
+        words.append((match.start(), raw, word))
+    return words
+
+
+def quote_completion(completion, raw):
+    """Quote a completion of a word, the way the word as typed started to.
+
+    :param completion: The completed, unquoted word.
+    :param raw: The word as typed so far.
+    :return: The completion as it should appear on the command line.
+    """
+    if raw[:1] in ("'", '"') and raw[0] not in completion:
+        return raw[0] + completion + raw[0]
+    return shlex.quote(completion)
+
+
+def complete_path(prefix):
+    """Complete a prefix of the path of a file or of a directory.
+
+    :param prefix: The start of a path.
+    :return: A sorted list of the matching paths, with a trailing slash for directories.
+    """
+    return sorted(
+        path + "/" if pathlib.Path(path).is_dir() else path
+        for path in glob.glob(glob.escape(prefix) + "*")
+    )
 
 
 class NEOShell(cmd.Cmd):
@@ -333,6 +1228,10 @@ class NEOShell(cmd.Cmd):
     The primary purpose of this shell is to allow users to repeatedly perform
     inspect and query commands, while only loading the data (which can be quite
     slow) once.
+
+    Pressing Tab completes the flags of a command and their values: designations
+    and names of NEOs (from a sorted prefix index of the database), choices,
+    lists of columns and paths.
     """
 
     intro = (
@@ -387,6 +1286,85 @@ class NEOShell(cmd.Cmd):
             # method which prints the error message and then calls `sys.exit`.
             return None
 
+    def complete_arguments(self, parser, line, begidx, endidx):
+        """Complete the word under the cursor of a command, using a given parser.
+
+        A word starting with a dash completes to the parser's flags, and the
+        word after a flag that takes a value completes to the values of that
+        flag's type, see `complete_value`.
+
+        The completions replace the line from `begidx`, which readline puts
+        after the last of its delimiters - such as a space or a dash - so
+        they're trimmed to the part of the completed word from there. Since
+        designations and names complete ignoring case, the typed text from
+        `begidx` may change case.
+
+        :param parser: An `argparse.ArgumentParser` of the command's arguments.
+        :param line: The whole command line.
+        :param begidx: The offset of the text to replace in the line.
+        :param endidx: The offset of the end of the text to replace, at the cursor.
+        :return: A list of completions of the text from `begidx` to `endidx`.
+        """
+        # Skip the command itself, and start an empty word after a space.
+        words = split_partial_line(line[:endidx])[1:]
+        if not words or words[-1][0] + len(words[-1][1]) < endidx:
+            words.append((endidx, "", ""))
+        start, raw, word = words[-1]
+        previous = words[-2][2] if len(words) > 1 else None
+
+        action = parser._option_string_actions.get(previous)
+        if action is not None and action.nargs != 0:
+            completions = self.complete_value(action, word)
+        elif word.startswith("-"):
+            completions = sorted(
+                option for option in parser._option_string_actions if option.startswith(word)
+            )
+        else:
+            completions = []
+
+        # Only the completions that keep the text before `begidx` can be offered.
+        kept = begidx - start
+        quoted = [quote_completion(completion, raw) for completion in completions]
+        return [completion[kept:] for completion in quoted if completion[:kept] == raw[:kept]]
+
+    def complete_value(self, action, prefix):
+        """Complete a prefix of the value of a flag, according to its type.
+
+        :param action: The `argparse.Action` of the flag.
+        :param prefix: The start of the value, unquoted.
+        :return: A list of the completed values.
+        """
+        if action.dest == "pdes":
+            return self.db.complete("designation", prefix, COMPLETION_LIMIT)
+        if action.dest == "name":
+            return self.db.complete("name", prefix, COMPLETION_LIMIT)
+        if action.choices:
+            return [str(choice) for choice in action.choices if str(choice).startswith(prefix)]
+        columns = getattr(action.type, "choices", None)
+        if columns:
+            # Complete the last of a comma-separated list of columns.
+            head, comma, last = prefix.rpartition(",")
+            chosen = head.split(",")
+            return [
+                head + comma + column
+                for column in columns
+                if column.startswith(last) and column not in chosen
+            ]
+        if action.type is pathlib.Path:
+            return complete_path(prefix)
+        return []
+
+    def complete_inspect(self, _text, line, begidx, endidx):
+        """Complete the flags of `inspect`, and designations and names of NEOs."""
+        return self.complete_arguments(self.inspect, line, begidx, endidx)
+
+    def complete_query(self, _text, line, begidx, endidx):
+        """Complete the flags of `query` and their values."""
+        return self.complete_arguments(self.query, line, begidx, endidx)
+
+    complete_i = complete_inspect
+    complete_q = complete_query
+
     def do_i(self, arg):
         """Shorthand for `inspect`."""
         self.do_inspect(arg)
@@ -402,13 +1380,33 @@ class NEOShell(cmd.Cmd):
         Additionally, list all known close approaches:
 
             (neo) inspect --verbose --name Eros
+
+        Or summarize them:
+
+            (neo) inspect --summary --name Eros
+
+        List the NEOs on the most similar orbits, if the session was started
+        with the orbital columns a, e and i:
+
+            (neo) inspect --similar 5 --name Eros
         """
         args = self.parse_arg_with(arg, self.inspect)
         if not args:
             return
 
         # Run the `inspect` subcommand.
-        inspect(self.db, pdes=args.pdes, name=args.name, verbose=args.verbose)
+        try:
+            inspect(
+                self.db,
+                pdes=args.pdes,
+                name=args.name,
+                verbose=args.verbose,
+                summary=args.summary,
+                similar=args.similar,
+                angles=args.with_angles,
+            )
+        except ValueError as err:
+            print(err, file=sys.stderr)
 
     def do_q(self, arg):
         """Shorthand for `query`."""
@@ -424,7 +1422,9 @@ class NEOShell(cmd.Cmd):
 
         You can use any of the other filters: `--start-date`, `--end-date`,
         `--min-distance`, `--max-distance`, `--min-velocity`, `--max-velocity`,
-        `--min-diameter`, `--max-diameter`, `--hazardous`, `--not-hazardous`.
+        `--min-diameter`, `--max-diameter`, `--hazardous`, `--not-hazardous`,
+        and the orbital filters such as `--max-moid`, if the session was started
+        with their `--orbital-columns`.
 
         The number of results shown can be limited to a maximum number with `--limit`:
 
@@ -435,13 +1435,21 @@ class NEOShell(cmd.Cmd):
 
             (neo) query --limit 5 --outfile results.csv
             (neo) query --limit 5 --outfile results.json
+
+        For a rough idea of the number and distribution of the matches, without
+        waiting for a full scan, estimate them from a sample with `--estimate`:
+
+            (neo) query --estimate --start-date 2030-01-01 --max-distance 0.01
         """
         args = self.parse_arg_with(arg, self.query)
         if not args:
             return
 
-        # Run the `inspect` subcommand.
-        query(self.db, args)
+        # Run the `query` subcommand.
+        try:
+            query(self.db, args)
+        except UnsupportedCriterionError as err:
+            print(err, file=sys.stderr)
 
     def do_EOF(self, _arg):
         """Exit the interactive session."""
@@ -479,14 +1487,73 @@ def main():
     parser, inspect_parser, query_parser = make_parser()
     args = parser.parse_args()
 
-    # Extract data from the data files into structured Python objects.
-    database = NEODatabase(load_neos(args.neofile), load_approaches(args.cadfile))
+    # Extract data from the data files into structured Python objects, map the
+    # previously converted column files, open an SQLite database, or prepare to
+    # stream the approaches.
+    orbital_columns = required_orbital_columns(args)
+    extra_columns = required_extra_columns(args)
+    if (orbital_columns or extra_columns) and (args.sqlite or getattr(args, "stream", False)):
+        parser.error(
+            "Orbital and extra columns are only loaded by the in-memory database or --columns."
+        )
+    if args.cmd == "query" and args.estimate and (args.sqlite or args.stream):
+        parser.error("--estimate runs on the in-memory database or on --columns.")
+    if args.cmd == "query" and args.stream:
+        database = ApproachStream(load_neos(args.neofile), args.cadfile, args.chunk_size)
+    elif args.columns:
+        database = NEODatabase.from_columns(args.columns)
+    elif args.cmd in ("aggregate", "clusters", "timeseries", "histogram2d", "convert") and args.sqlite:
+        parser.error(f"{args.cmd} runs on the in-memory database or on --columns, not on --sqlite.")
+    elif args.sqlite and args.sqlite.exists():
+        database = SQLiteDatabase(args.sqlite)
+    elif args.sqlite:
+        database = SQLiteDatabase.import_files(args.sqlite, args.neofile, args.cadfile)
+    else:
+        database = NEODatabase(
+            load_neos(args.neofile),
+            load_approaches(args.cadfile),
+            load_orbital_columns(orbital_columns, args.neofile),
+            load_approach_columns(extra_columns, args.cadfile),
+        )
+    loaded = {}
+    if orbital_columns:
+        loaded.update(database.orbital_nbytes())
+    if extra_columns:
+        loaded.update(database.extra_nbytes())
+    missing = set(orbital_columns + extra_columns).difference(loaded)
+    if missing:
+        parser.error(
+            f"The columns {', '.join(sorted(missing))} aren't in {args.columns}; convert "
+            "the data files again with --orbital-columns or --approach-columns."
+        )
+    for name, nbytes in loaded.items():
+        print(f"Column {name}: {nbytes / 1024:.1f} KiB", file=sys.stderr)
 
     # Run the chosen subcommand.
     if args.cmd == "inspect":
-        inspect(database, pdes=args.pdes, name=args.name, verbose=args.verbose)
+        inspect(
+            database,
+            pdes=args.pdes,
+            name=args.name,
+            verbose=args.verbose,
+            summary=args.summary,
+            similar=args.similar,
+            angles=args.with_angles,
+        )
     elif args.cmd == "query":
         query(database, args)
+    elif args.cmd == "aggregate":
+        aggregate(database, args)
+    elif args.cmd == "next":
+        next_approaches(database, args)
+    elif args.cmd == "clusters":
+        clusters(database, args)
+    elif args.cmd == "timeseries":
+        timeseries(database, args)
+    elif args.cmd == "histogram2d":
+        histogram(database, args)
+    elif args.cmd == "convert":
+        database.save_columns(args.outdir, partition_by=args.partition_by)
     elif args.cmd == "interactive":
         NEOShell(
             database, inspect_parser, query_parser, aggressive=args.aggressive
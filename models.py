@@ -5,11 +5,13 @@ primary designation, an optional unique name, an optional diameter, and a flag
 for whether the object is potentially hazardous.
 
 The `CloseApproach` class represents a close approach to Earth by an NEO. Each
-has an approach datetime, a nominal approach distance, and a relative approach
-velocity.
+has an approach time, a nominal approach distance, and a relative approach
+velocity. The time is kept as whole minutes since the Unix epoch, and only
+converted to a `datetime` when it is accessed.
 
 A `NearEarthObject` maintains a collection of its close approaches, and a
-`CloseApproach` maintains a reference to its NEO.
+`CloseApproach` maintains a reference to its NEO. An `NEOSummary` describes the
+close approaches of an NEO as a whole.
 
 The functions that construct these objects use information extracted from the
 data files from NASA, so these objects should be able to handle all of the
@@ -17,7 +19,7 @@ quirks of the data set, such as missing names and unknown diameters.
 
 You'll edit this file in Task 1.
 """
-from helpers import cd_to_datetime, datetime_to_str
+from helpers import datetime_to_str, minutes_to_datetime
 from helpers import coerce_input, transformdict
 
 
@@ -74,6 +76,10 @@ class CloseApproach:
     approach distance in astronomical units, and the relative approach velocity
     in kilometers per second.
 
+    The time of closest approach is stored in `minutes`, as whole minutes since
+    the Unix epoch, like the `time` column of a `columns.ColumnStore`. The
+    `time` property creates the corresponding `datetime` on demand.
+
     A `CloseApproach` also maintains a reference to its `NearEarthObject` -
     initially, this information (the NEO's primary designation) is saved in a
     private attribute, but the referenced NEO is eventually replaced in the
@@ -86,18 +92,28 @@ class CloseApproach:
         :param info: A dictionary of excess keyword arguments supplied to the constructor.
         """
         self._designation = coerce_input(info["_designation"], "str", transformdict)
-        self.time = cd_to_datetime(info["time"])
+        self.minutes = coerce_input(info["time"], "minutes", transformdict, required=True)
         self.distance = coerce_input(info["distance"], "float", transformdict)
         self.velocity = coerce_input(info["velocity"], "float", transformdict)
 
         # Create an attribute for the referenced NEO, originally None.
         self.neo = None
 
+    @property
+    def time(self):
+        """Return the approach time of this `CloseApproach` as a naive `datetime` (in UTC)."""
+        return minutes_to_datetime(self.minutes)
+
+    @time.setter
+    def time(self, value):
+        """Set the approach time from a `datetime`, a calendar date or a number of minutes."""
+        self.minutes = coerce_input(value, "minutes", transformdict, required=True)
+
     @property
     def time_str(self):
         """Return a formatted representation of this `CloseApproach`'s approach time.
 
-        The value in `self.time` should be a Python `datetime` object. While a
+        The value of `self.time` is a Python `datetime` object. While a
         `datetime` object has a string representation, the default representation
         includes seconds - significant figures that don't exist in our input
         data set.
@@ -121,3 +137,51 @@ class CloseApproach:
             f"CloseApproach(time={self.time_str!r}, distance={self.distance:.2f}, "
             f"velocity={self.velocity:.2f}, neo={self.neo!r})"
         )
+
+
+class NEOSummary:
+    """A summary of the close approaches of an NEO.
+
+    An `NEOSummary` records the number of close approaches of an NEO, the times
+    of its first and last approaches, the distance and time of its closest
+    approach, and its maximum approach velocity. Except for the number of
+    approaches, these are None for an NEO without any known close approach.
+    """
+
+    def __init__(self, neo, count, first_time=None, last_time=None,
+                 min_distance=None, min_distance_time=None, max_velocity=None):
+        """Create a new `NEOSummary`.
+
+        :param neo: The summarized `NearEarthObject`.
+        :param count: The number of close approaches of the NEO.
+        :param first_time: The `datetime` of the first close approach.
+        :param last_time: The `datetime` of the last close approach.
+        :param min_distance: The distance of the closest approach, in au.
+        :param min_distance_time: The `datetime` of the closest approach.
+        :param max_velocity: The maximum approach velocity, in km/s.
+        """
+        self.neo = neo
+        self.count = count
+        self.first_time = first_time
+        self.last_time = last_time
+        self.min_distance = min_distance
+        self.min_distance_time = min_distance_time
+        self.max_velocity = max_velocity
+
+    def __str__(self):
+        """Return `str(self)`."""
+        if not self.count:
+            return f"NEO {self.neo.fullname} has no known close approaches."
+        return (
+            f"NEO {self.neo.fullname} has {self.count} close approaches from "
+            f"{datetime_to_str(self.first_time)} to {datetime_to_str(self.last_time)}. "
+            f"Closest approach: {self.min_distance} au at {datetime_to_str(self.min_distance_time)}. "
+            f"Maximum velocity: {self.max_velocity} km/s."
+        )
+
+    def __repr__(self):
+        """Return `repr(self)`, a computer-readable string representation of this object."""
+        return (
+            f"NEOSummary(neo={self.neo.designation!r}, count={self.count}, "
+            f"min_distance={self.min_distance}, max_velocity={self.max_velocity})"
+        )
@@ -0,0 +1,232 @@
+"""Estimate the results of queries from a random sample of close approaches.
+
+An `ApproachSample` is a stratified random sample of the rows of a
+`columns.ColumnStore`, drawn once. The rows are split into strata of
+consecutive rows - the partitions of a `columns.PartitionedColumnStore`, or
+`N_STRATA` equal ranges otherwise - and each stratum contributes a share of
+the sample proportional to its size. Since close approaches are stored roughly
+in order of time, every period of time is represented.
+
+The sampled rows are copied into a small `ColumnStore` of their own, in random
+order, so that a query can be estimated by evaluating its filters on any
+prefix of the sample: `ApproachSample.estimate` evaluates the sample chunk by
+chunk until it runs out of rows or of time, whatever the size of the data.
+
+An `Estimate` holds the estimated number of matching approaches, with a
+confidence interval from the normal approximation, and the weighted quantiles
+of the distance and velocity of the sampled matches.
+"""
+import statistics
+import time
+
+import numpy as np
+
+from columns import ColumnStore, PartitionedColumnStore
+from filters import combined_mask
+
+
+# The number of close approaches in a sample.
+SAMPLE_SIZE = 100_000
+
+# The number of strata of a `ColumnStore` that isn't partitioned.
+N_STRATA = 64
+
+# The number of sampled approaches evaluated between two checks of the time budget.
+CHUNK_SIZE = 8192
+
+# The quantiles of the distance and velocity of the matches that are estimated.
+QUANTILES = (0.05, 0.25, 0.5, 0.75, 0.95)
+QUANTILE_COLUMNS = ("distance", "velocity")
+
+
+class Estimate:
+    """An estimate of the number and distribution of the matches of a query.
+
+    `count` is the estimated number of matching close approaches, between
+    `low` and `high` with the given `confidence`. `quantiles` maps each of
+    the `QUANTILE_COLUMNS` to a dictionary of the estimated `QUANTILES` of the
+    matches, which is empty if no sampled approach matches.
+    """
+
+    def __init__(self, count, low, high, confidence, sampled, matched, total, quantiles):
+        """Create a new `Estimate`.
+
+        :param count: The estimated number of matching close approaches.
+        :param low: The lower bound of the confidence interval of `count`.
+        :param high: The upper bound of the confidence interval of `count`.
+        :param confidence: The confidence level of the interval, such as 0.95.
+        :param sampled: The number of sampled approaches that were evaluated.
+        :param matched: The number of evaluated approaches that matched.
+        :param total: The total number of close approaches.
+        :param quantiles: A dictionary mapping column names to dictionaries of quantiles.
+        """
+        self.count = count
+        self.low = low
+        self.high = high
+        self.confidence = confidence
+        self.sampled = sampled
+        self.matched = matched
+        self.total = total
+        self.quantiles = quantiles
+
+    def __str__(self):
+        """Return `str(self)`."""
+        lines = [
+            f"About {self.count:,.0f} matching close approaches "
+            f"({self.confidence:.0%} confidence interval: {self.low:,.0f} to {self.high:,.0f}), "
+            f"estimated from {self.matched} matches among {self.sampled} of {self.total} approaches."
+        ]
+        for column, quantiles in self.quantiles.items():
+            values = ", ".join(f"{quantile:.0%}: {value:.4g}" for quantile, value in quantiles.items())
+            lines.append(f"Quantiles of {column}: {values}.")
+        return "\n".join(lines)
+
+    def __repr__(self):
+        """Return `repr(self)`, a computer-readable string representation of this object."""
+        return (
+            f"Estimate(count={self.count:.1f}, low={self.low:.1f}, high={self.high:.1f}, "
+            f"sampled={self.sampled}, matched={self.matched})"
+        )
+
+
+class ApproachSample:
+    """A stratified random sample of the close approaches of a `ColumnStore`."""
+
+    def __init__(self, columns, strata, stratum_sizes):
+        """Create a new `ApproachSample`.
+
+        :param columns: A `ColumnStore` of the sampled rows, in random order.
+        :param strata: A NumPy array of the stratum of each sampled row.
+        :param stratum_sizes: A NumPy array of the number of rows of each stratum.
+        """
+        self.columns = columns
+        self.strata = strata
+        self.stratum_sizes = stratum_sizes
+
+    @classmethod
+    def draw(cls, columns, size=SAMPLE_SIZE, seed=0):
+        """Draw a stratified random sample of the rows of a `ColumnStore`.
+
+        If the store holds at most `size` rows, the sample holds all of them,
+        and its estimates are exact.
+
+        :param columns: A `ColumnStore`, possibly partitioned.
+        :param size: The number of rows to sample.
+        :param seed: The seed of the random number generator.
+        :return: A new `ApproachSample`.
+        """
+        rng = np.random.default_rng(seed)
+        if isinstance(columns, PartitionedColumnStore):
+            ranges = [(partition.start, partition.stop) for partition in columns.partitions]
+        else:
+            bounds = np.linspace(0, len(columns), N_STRATA + 1).astype(np.int64)
+            ranges = list(zip(bounds[:-1].tolist(), bounds[1:].tolist()))
+        stratum_sizes = np.array([stop - start for start, stop in ranges], dtype=np.int64)
+        n = int(stratum_sizes.sum())
+        # Every non-empty stratum contributes at least one row.
+        allocation = np.minimum(
+            stratum_sizes, np.maximum(np.round(stratum_sizes * (size / max(n, 1))), stratum_sizes > 0)
+        ).astype(np.int64)
+
+        parts, strata = [], []
+        for stratum, ((start, stop), n_rows) in enumerate(zip(ranges, allocation)):
+            if not n_rows:
+                continue
+            rows = np.sort(rng.choice(stop - start, size=n_rows, replace=False))
+            if isinstance(columns, PartitionedColumnStore):
+                parts.append(columns.partitions[stratum].columns.take(rows))
+            else:
+                parts.append(columns.take(rows + start))
+            strata.append(np.full(n_rows, stratum, dtype=np.int64))
+
+        if not parts:
+            return cls(ColumnStore({}), np.zeros(0, dtype=np.int64), stratum_sizes)
+        order = rng.permutation(int(allocation.sum()))
+        sample = ColumnStore(
+            {name: np.concatenate([part[name] for part in parts])[order] for name in parts[0].columns}
+        )
+        return cls(sample, np.concatenate(strata)[order], stratum_sizes)
+
+    def __len__(self):
+        """Return the number of sampled rows."""
+        return len(self.strata)
+
+    def estimate(self, filters=(), budget=None, confidence=0.95):
+        """Estimate the number and distribution of the rows that match some filters.
+
+        The filters are evaluated on chunks of the sample until all of it is
+        evaluated or `budget` seconds have passed; at least one chunk is
+        always evaluated. The count is estimated stratum by stratum, and a
+        stratum without any evaluated row is assumed to match at the overall
+        rate of the evaluated rows.
+
+        :param filters: A collection of filters that support `mask`.
+        :param budget: The maximum time to spend, in seconds, or None for no limit.
+        :param confidence: The confidence level of the interval of the count.
+        :return: An `Estimate`.
+        """
+        start = time.perf_counter()
+        masks = []
+        evaluated = 0
+        while evaluated < len(self):
+            chunk = self.columns.slice(evaluated, evaluated + CHUNK_SIZE)
+            masks.append(combined_mask(filters, chunk))
+            evaluated += len(chunk)
+            if budget is not None and time.perf_counter() - start >= budget:
+                break
+        matches = np.concatenate(masks) if masks else np.zeros(0, dtype=bool)
+        strata = self.strata[:evaluated]
+
+        n_strata = len(self.stratum_sizes)
+        sampled = np.bincount(strata, minlength=n_strata)
+        matched = np.bincount(strata, weights=matches, minlength=n_strata)
+        overall = matches.mean() if evaluated else 0.0
+        with np.errstate(invalid="ignore", divide="ignore"):
+            rates = np.where(sampled > 0, matched / sampled, overall)
+            # The variance of each stratum's rate, with the finite population correction.
+            variances = np.where(
+                sampled > 1,
+                (1 - sampled / self.stratum_sizes) * rates * (1 - rates) / (sampled - 1),
+                0.0,
+            )
+        total = int(self.stratum_sizes.sum())
+        count = float(np.sum(self.stratum_sizes * rates))
+        margin = statistics.NormalDist().inv_cdf((1 + confidence) / 2) * float(
+            np.sqrt(np.sum(self.stratum_sizes.astype(np.float64) ** 2 * variances))
+        )
+
+        # Each sampled match stands for the rows of its stratum.
+        weights = (self.stratum_sizes / np.maximum(sampled, 1))[strata[matches]]
+        quantiles = {}
+        if matches.any():
+            for column in QUANTILE_COLUMNS:
+                values = np.asarray(self.columns[column][:evaluated], dtype=np.float64)[matches]
+                quantiles[column] = dict(zip(QUANTILES, weighted_quantiles(values, weights, QUANTILES)))
+        return Estimate(
+            count,
+            max(count - margin, 0.0),
+            min(count + margin, float(total)),
+            confidence,
+            evaluated,
+            int(matches.sum()),
+            total,
+            quantiles,
+        )
+
+
+def weighted_quantiles(values, weights, quantiles):
+    """Compute quantiles of weighted values, ignoring missing values (NaN).
+
+    :param values: A NumPy array of values.
+    :param weights: A NumPy array of the weights of the values.
+    :param quantiles: A sequence of quantiles, between 0 and 1.
+    :return: A list of the value at each quantile, or NaN if no value is known.
+    """
+    known = ~np.isnan(values)
+    values, weights = values[known], weights[known]
+    if not len(values):
+        return [float("nan")] * len(quantiles)
+    order = np.argsort(values, kind="stable")
+    cumulative = np.cumsum(weights[order])
+    positions = np.searchsorted(cumulative, np.asarray(quantiles) * cumulative[-1], side="left")
+    return values[order][np.minimum(positions, len(values) - 1)].tolist()
@@ -0,0 +1,432 @@
+"""A persistent, indexed database of near-Earth objects and their close approaches.
+
+An `SQLiteDatabase` is an alternative to `NEODatabase` that keeps its data in a
+local SQLite file instead of in memory. The file is built once from the data
+files with `SQLiteDatabase.import_files`, which inserts NEOs and close
+approaches in bulk transactions and then indexes the approaches by time,
+distance, velocity and NEO designation. Afterwards, opening the file is cheap,
+and several processes can share it.
+
+An `SQLiteDatabase` provides the same methods as an `NEODatabase` to fetch an
+NEO and to query close approaches. A query translates the filters created by
+`filters.create_filters` into a parameterized SQL `WHERE` clause, so that SQLite
+can use its indexes, and streams back the matching rows as `CloseApproach`
+objects.
+"""
+import collections.abc
+import math
+import sqlite3
+
+from extract import load_neos, load_approach_chunks
+from filters import UnsupportedCriterionError, filter_intervals, orbital_columns, supports_neos
+from helpers import datetime_to_minutes, minutes_to_datetime
+from indexes import NameIndex, PrefixIndex
+from models import NearEarthObject, CloseApproach, NEOSummary
+
+
+SCHEMA = """
+CREATE TABLE neos (
+    designation TEXT PRIMARY KEY,
+    name TEXT,
+    diameter REAL,
+    hazardous INTEGER NOT NULL
+);
+CREATE TABLE approaches (
+    id INTEGER PRIMARY KEY,
+    designation TEXT NOT NULL,
+    time INTEGER NOT NULL,
+    distance REAL NOT NULL,
+    velocity REAL NOT NULL
+);
+"""
+
+INDEXES = """
+CREATE INDEX neos_name ON neos (name);
+CREATE INDEX approaches_time ON approaches (time);
+CREATE INDEX approaches_distance ON approaches (distance);
+CREATE INDEX approaches_velocity ON approaches (velocity);
+CREATE INDEX approaches_designation ON approaches (designation);
+"""
+
+# The SQL expression of each column that filters can be evaluated on.
+SQL_COLUMNS = {
+    "time": "a.time",
+    "distance": "a.distance",
+    "velocity": "a.velocity",
+    "diameter": "n.diameter",
+    "hazardous": "n.hazardous",
+}
+
+FROM_APPROACHES = "FROM approaches AS a LEFT JOIN neos AS n ON n.designation = a.designation"
+
+SELECT_APPROACHES = f"""
+SELECT a.designation, a.time, a.distance, a.velocity,
+       n.designation, n.name, n.diameter, n.hazardous
+{FROM_APPROACHES}
+"""
+
+
+def translate_filters(filters):
+    """Translate a collection of filters into a parameterized SQL condition.
+
+    Filters that don't name a column are returned as residual filters, to be
+    called on each `CloseApproach` produced by the SQL query.
+
+    :param filters: A collection of filters capturing user-specified criteria.
+    :return: A tuple of the SQL condition, its parameters, and the residual filters.
+    """
+    columnar = [filter for filter in filters if getattr(filter, "column", None) in SQL_COLUMNS]
+    residual = [filter for filter in filters if filter not in columnar]
+    conditions, parameters = [], []
+    for column, (low, high) in filter_intervals(columnar).items():
+        for bound, comparison in ((low, ">="), (high, "<=")):
+            if isinstance(bound, float) and math.isinf(bound):
+                continue
+            conditions.append(f"{SQL_COLUMNS[column]} {comparison} ?")
+            parameters.append(int(bound) if isinstance(bound, bool) else bound)
+    return " AND ".join(conditions) or "1", parameters, residual
+
+
+class SQLiteApproaches(collections.abc.Sequence):
+    """The close approaches of an NEO, sorted by time, fetched from SQLite on first access."""
+
+    def __init__(self, database, neo):
+        """Create a new `SQLiteApproaches`.
+
+        :param database: The `SQLiteDatabase` holding the approaches.
+        :param neo: The `NearEarthObject` whose approaches these are.
+        """
+        self.database = database
+        self.neo = neo
+        self._approaches = None
+
+    def _load(self):
+        """Fetch the approaches, if they haven't been fetched yet."""
+        if self._approaches is None:
+            cursor = self.database.connection.execute(
+                f"{SELECT_APPROACHES} WHERE a.designation = ? ORDER BY a.time, a.id",
+                (self.neo.designation,),
+            )
+            self._approaches = [self.database._approach_from_row(row) for row in cursor]
+        return self._approaches
+
+    def __len__(self):
+        """Return the number of close approaches of the NEO."""
+        return len(self._load())
+
+    def __getitem__(self, index):
+        """Return the close approach at the given index."""
+        return self._load()[index]
+
+
+class SQLiteDatabase:
+    """A database of near-Earth objects and their close approaches, stored in SQLite.
+
+    The NEOs created by a database are cached, so that every close approach of
+    the same NEO refers to the same `NearEarthObject`.
+    """
+
+    def __init__(self, path):
+        """Open an existing SQLite database file.
+
+        :param path: A Path-like object pointing to a file written by `import_files`.
+        """
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        self._neos = {}
+        self._names = None
+        self._prefix_indexes = {}
+
+    @classmethod
+    def import_files(cls, path, neo_csv_path, cad_json_path, chunk_size=100_000):
+        """Create an SQLite database file from the data files, and open it.
+
+        The NEOs and close approaches are inserted in bulk, in a single
+        transaction, and the indexes are created after all rows are inserted.
+
+        :param path: A Path-like object pointing to the SQLite file to create.
+        :param neo_csv_path: A path to a CSV file containing data about near-Earth objects.
+        :param cad_json_path: A path to a JSON file containing data about close approaches.
+        :param chunk_size: The number of close approaches inserted at once.
+        :return: A new `SQLiteDatabase`.
+        """
+        connection = sqlite3.connect(path)
+        try:
+            connection.execute("PRAGMA journal_mode = OFF")
+            connection.execute("PRAGMA synchronous = OFF")
+            with connection:
+                connection.executescript(SCHEMA)
+                connection.executemany(
+                    "INSERT INTO neos VALUES (?, ?, ?, ?)",
+                    (
+                        (
+                            neo.designation,
+                            neo.name,
+                            None if math.isnan(neo.diameter) else neo.diameter,
+                            int(neo.hazardous),
+                        )
+                        for neo in load_neos(neo_csv_path)
+                    ),
+                )
+                for chunk in load_approach_chunks(cad_json_path, chunk_size):
+                    connection.executemany(
+                        "INSERT INTO approaches (designation, time, distance, velocity) "
+                        "VALUES (?, ?, ?, ?)",
+                        (
+                            (
+                                approach._designation,
+                                approach.minutes,
+                                approach.distance,
+                                approach.velocity,
+                            )
+                            for approach in chunk
+                        ),
+                    )
+                connection.executescript(INDEXES)
+            connection.execute("ANALYZE")
+        finally:
+            connection.close()
+        return cls(path)
+
+    def close(self):
+        """Close the connection to the SQLite file."""
+        self.connection.close()
+
+    def _neo_from_row(self, designation, name, diameter, hazardous):
+        """Return the cached NEO with the given attributes, creating it if needed."""
+        neo = self._neos.get(designation)
+        if neo is None:
+            neo = NearEarthObject(
+                designation=designation,
+                name=name,
+                diameter=diameter,
+                hazardous=bool(hazardous),
+            )
+            neo.approaches = SQLiteApproaches(self, neo)
+            self._neos[designation] = neo
+        return neo
+
+    def _approach_from_row(self, row):
+        """Create a `CloseApproach`, linked to its NEO, from a row of `SELECT_APPROACHES`."""
+        designation, time, distance, velocity = row[:4]
+        approach = CloseApproach(
+            _designation=designation,
+            time=time,
+            distance=distance,
+            velocity=velocity,
+        )
+        if row[4] is not None:
+            approach.neo = self._neo_from_row(*row[4:])
+        return approach
+
+    def _get_neo_where(self, condition, value):
+        """Find and return the first NEO matching an SQL condition, or None."""
+        row = self.connection.execute(
+            f"SELECT designation, name, diameter, hazardous FROM neos WHERE {condition} LIMIT 1",
+            (value,),
+        ).fetchone()
+        return self._neo_from_row(*row) if row else None
+
+    def get_neo_by_designation(self, designation):
+        """Find and return an NEO by its primary designation.
+
+        If no match is found, return `None` instead.
+
+        :param designation: The primary designation of the NEO to search for.
+        :return: The `NearEarthObject` with the desired primary designation, or `None`.
+        """
+        return self._get_neo_where("designation = ?", designation)
+
+    def get_neo_by_name(self, name):
+        """Find and return an NEO by its name.
+
+        If no match is found, return `None` instead. No NEOs are associated with
+        the empty string nor with the `None` singleton. An exact match is
+        preferred, but the name can also differ in (ASCII) case.
+
+        :param name: The name, as a string, of the NEO to search for.
+        :return: The `NearEarthObject` with the desired name, or `None`.
+        """
+        if not name:
+            return None
+        return self._get_neo_where("name = ?", name) or self._get_neo_where(
+            "name = ? COLLATE NOCASE", name
+        )
+
+    def search_neos_by_name(self, name, k=5):
+        """Find the NEOs whose names are most similar to a possibly misspelled name.
+
+        The names are read once, on first use, into an `indexes.NameIndex`.
+
+        :param name: The name, as a string, to search for.
+        :param k: The maximum number of NEOs to return.
+        :return: A list of `(NearEarthObject, similarity)` tuples, most similar first.
+        """
+        if self._names is None:
+            rows = self.connection.execute(
+                "SELECT designation, name FROM neos WHERE name IS NOT NULL AND name != ''"
+            ).fetchall()
+            self._named_designations = [designation for designation, _ in rows]
+            self._names = NameIndex([name for _, name in rows])
+        return [
+            (self.get_neo_by_designation(self._named_designations[index]), similarity)
+            for index, similarity in self._names.search(name, k)
+        ]
+
+    def complete(self, field, prefix, limit=None):
+        """Complete a prefix of the designation or the name of an NEO, ignoring case.
+
+        The values of each field are read once, on first use, into an
+        `indexes.PrefixIndex`.
+
+        :param field: The field to complete, "designation" or "name".
+        :param prefix: The prefix to complete.
+        :param limit: The maximum number of completions to return, or None for no limit.
+        :return: A list of the designations or names starting with the prefix.
+        """
+        if field not in ("designation", "name"):
+            raise ValueError(f"Cannot complete {field!r}. Choose among designation, name.")
+        if field not in self._prefix_indexes:
+            rows = self.connection.execute(f"SELECT {field} FROM neos")
+            self._prefix_indexes[field] = PrefixIndex(value for value, in rows)
+        return self._prefix_indexes[field].complete(prefix, limit)
+
+    def get_summary(self, neo):
+        """Return the summary of the close approaches of an NEO of this database.
+
+        The summary is computed by SQLite from the index of approaches by NEO.
+
+        :param neo: A `NearEarthObject` of this database.
+        :return: An `NEOSummary`.
+        """
+        count, first_time, last_time, max_velocity = self.connection.execute(
+            "SELECT COUNT(*), MIN(time), MAX(time), MAX(velocity) FROM approaches "
+            "WHERE designation = ?",
+            (neo.designation,),
+        ).fetchone()
+        if not count:
+            return NEOSummary(neo, 0)
+        min_distance, min_distance_time = self.connection.execute(
+            "SELECT distance, time FROM approaches WHERE designation = ? "
+            "ORDER BY distance, time LIMIT 1",
+            (neo.designation,),
+        ).fetchone()
+        return NEOSummary(
+            neo,
+            count,
+            first_time=minutes_to_datetime(first_time),
+            last_time=minutes_to_datetime(last_time),
+            min_distance=min_distance,
+            min_distance_time=minutes_to_datetime(min_distance_time),
+            max_velocity=max_velocity,
+        )
+
+    def next_approach(self, neo, after):
+        """Find the first close approach of an NEO strictly after a given time.
+
+        :param neo: A `NearEarthObject` of this database.
+        :param after: A `datetime`.
+        :return: The next `CloseApproach` of the NEO, or None if there is none.
+        """
+        row = self.connection.execute(
+            f"{SELECT_APPROACHES} WHERE a.designation = ? AND a.time > ? "
+            "ORDER BY a.time, a.id LIMIT 1",
+            (neo.designation, datetime_to_minutes(after)),
+        ).fetchone()
+        return self._approach_from_row(row) if row else None
+
+    def next_approaches(self, after, filters=(), limit=None):
+        """Find the next close approach of each NEO after a given time.
+
+        SQLite finds the earliest time after `after` of each NEO with the index
+        of approaches by time, and joins it back to the approaches. Of several
+        approaches of an NEO at that time, the first in internal order is kept.
+
+        :param after: A `datetime`; only approaches strictly after it are considered.
+        :param filters: A collection of filters on the diameter or hazardous flag of NEOs.
+        :param limit: The maximum number of approaches to return.
+        :return: A list of `CloseApproach`es, at most one per NEO, sorted by time.
+        :raises ValueError: If a filter doesn't apply to NEOs.
+        :raises UnsupportedCriterionError: If a filter applies to an orbital element.
+        """
+        if not supports_neos(filters):
+            raise ValueError("Only filters on the diameter or hazardous flag apply to NEOs.")
+        if orbital_columns(filters):
+            raise UnsupportedCriterionError("Orbital filters aren't supported on SQLite.")
+        condition, parameters, _ = translate_filters(filters)
+        sql = (
+            f"{SELECT_APPROACHES} JOIN ("
+            "SELECT MIN(f.id) AS id FROM approaches AS f JOIN ("
+            "SELECT designation, MIN(time) AS time FROM approaches WHERE time > ? "
+            "GROUP BY designation"
+            ") AS m ON m.designation = f.designation AND m.time = f.time "
+            "GROUP BY f.designation"
+            ") AS first ON first.id = a.id "
+            f"WHERE {condition} ORDER BY a.time, a.id"
+        )
+        parameters = [datetime_to_minutes(after)] + parameters
+        if limit:
+            sql += " LIMIT ?"
+            parameters.append(limit)
+        return [self._approach_from_row(row) for row in self.connection.execute(sql, parameters)]
+
+    def query(self, filters=(), limit=None, workers=1, stats=None):
+        """Query close approaches to generate those that match a collection of filters.
+
+        The filters are evaluated by SQLite, using its indexes where it sees fit,
+        and the `CloseApproach` objects are generated in internal order (the order
+        of the close approach file). If every filter could be translated to SQL,
+        the limit is applied by SQLite as well.
+
+        :param filters: A collection of filters capturing user-specified criteria.
+        :param limit: The maximum number of matches to produce.
+        :param workers: Ignored; SQLite evaluates the query.
+        :param stats: A `QueryStats` in which to count the matches.
+        :return: A stream of matching `CloseApproach` objects.
+        """
+        condition, parameters, residual = translate_filters(filters)
+        sql = f"{SELECT_APPROACHES} WHERE {condition} ORDER BY a.id"
+        if limit and not residual:
+            sql += " LIMIT ?"
+            parameters.append(limit)
+
+        produced = 0
+        for row in self.connection.execute(sql, parameters):
+            approach = self._approach_from_row(row)
+            if all(filter(approach) for filter in residual):
+                yield approach
+                produced += 1
+                if stats is not None:
+                    stats.matches += 1
+                if limit and produced >= limit:
+                    return
+
+    def count(self, filters=(), workers=1, stats=None):
+        """Count the close approaches that match a collection of filters.
+
+        If every filter could be translated to SQL, SQLite counts the matches
+        without returning any row.
+
+        :param filters: A collection of filters capturing user-specified criteria.
+        :param workers: Ignored; SQLite evaluates the query.
+        :param stats: A `QueryStats` in which to count the matches.
+        :return: The number of matching close approaches.
+        """
+        condition, parameters, residual = translate_filters(filters)
+        if residual:
+            return sum(1 for _ in self.query(filters, stats=stats))
+        (count,) = self.connection.execute(
+            f"SELECT COUNT(*) {FROM_APPROACHES} WHERE {condition}", parameters
+        ).fetchone()
+        if stats is not None:
+            stats.matches += count
+        return count
+
+    def exists(self, filters=(), stats=None):
+        """Check whether any close approach matches a collection of filters.
+
+        :param filters: A collection of filters capturing user-specified criteria.
+        :param stats: A `QueryStats` in which to count the matches.
+        :return: True if some close approach matches all of the filters.
+        """
+        return any(True for _ in self.query(filters, limit=1, stats=stats))
@@ -0,0 +1,284 @@
+"""Check that `NEODatabase.aggregate` summarizes groups of close approaches correctly.
+
+The groups and metrics computed on the columns are compared with the same
+summaries computed directly from the `CloseApproach` objects. The clusters of
+approaches found by `NEODatabase.clusters` are compared with a pairwise search,
+and the time series of `NEODatabase.timeseries` with counts of the approaches.
+The 2-D histograms of `NEODatabase.histogram2d` are compared with those of
+`np.histogram2d`.
+
+To run these tests from the project root, run:
+
+    $ python3 -m unittest --verbose tests.test_aggregate
+"""
+import collections
+import datetime
+import math
+import pathlib
+import tempfile
+import random
+import unittest
+
+import numpy as np
+
+from aggregate import aggregate_fieldnames, parse_metric, time_clusters, bin_edges, histogram2d
+from database import NEODatabase, QueryStats
+from extract import load_neos, load_approaches
+from filters import create_filters
+
+
+TESTS_ROOT = (pathlib.Path(__file__).parent).resolve()
+TEST_NEO_FILE = TESTS_ROOT / "test-neos-2020.csv"
+TEST_CAD_FILE = TESTS_ROOT / "test-cad-2020.json"
+
+
+def summarize(approaches, key):
+    """Group approaches by a key function and compute the default metrics of each group."""
+    groups = collections.defaultdict(list)
+    for approach in approaches:
+        groups[key(approach)].append(approach)
+    return {
+        group: (
+            len(members),
+            min(approach.distance for approach in members),
+            max(approach.velocity for approach in members),
+        )
+        for group, members in groups.items()
+    }
+
+
+class TestAggregate(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.approaches = load_approaches(TEST_CAD_FILE)
+        cls.db = NEODatabase(load_neos(TEST_NEO_FILE), cls.approaches)
+
+    def assertRowsMatch(self, rows, expected, key):
+        self.assertEqual(len(rows), len(expected))
+        for row in rows:
+            count, min_distance, max_velocity = expected[key(row)]
+            self.assertEqual(row["count"], count)
+            self.assertAlmostEqual(row["min_distance"], min_distance)
+            self.assertAlmostEqual(row["max_velocity"], max_velocity)
+
+    def test_group_by_neo_and_year(self):
+        rows = self.db.aggregate(group_by=("neo", "year"))
+        expected = summarize(self.approaches, lambda approach: (approach.neo.designation, approach.time.year))
+        self.assertRowsMatch(rows, expected, lambda row: (row["designation"], row["year"]))
+        self.assertEqual(list(rows[0]), aggregate_fieldnames(("neo", "year")))
+
+    def test_group_by_month_with_filters(self):
+        filters = create_filters(distance_max=0.1, hazardous=False)
+        rows = self.db.aggregate(filters, group_by=("month",))
+        matches = [approach for approach in self.approaches if all(filter(approach) for filter in filters)]
+        expected = summarize(matches, lambda approach: approach.time.strftime("%Y-%m"))
+        self.assertRowsMatch(rows, expected, lambda row: row["month"])
+        self.assertEqual([row["month"] for row in rows], sorted(row["month"] for row in rows))
+
+    def test_group_by_hazardous_without_filters(self):
+        rows = self.db.aggregate(group_by=("hazardous",))
+        expected = summarize(self.approaches, lambda approach: approach.neo.hazardous)
+        self.assertRowsMatch(rows, expected, lambda row: row["hazardous"])
+
+    def test_mean_ignores_unknown_diameters(self):
+        rows = self.db.aggregate(group_by=("neo",), metrics=("mean_diameter", "max_diameter"))
+        for row in rows:
+            neo = self.db.get_neo_by_designation(row["designation"])
+            if math.isnan(neo.diameter):
+                self.assertIsNone(row["mean_diameter"])
+            else:
+                self.assertAlmostEqual(row["mean_diameter"], neo.diameter)
+                self.assertAlmostEqual(row["max_diameter"], neo.diameter)
+
+    def test_single_group_and_no_matches(self):
+        rows = self.db.aggregate(group_by=(), metrics=("count", "mean_velocity"))
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]["count"], len(self.approaches))
+        self.assertAlmostEqual(
+            rows[0]["mean_velocity"],
+            sum(approach.velocity for approach in self.approaches) / len(self.approaches),
+        )
+        filters = create_filters(date=datetime.date(1900, 1, 1))
+        self.assertEqual(self.db.aggregate(filters, group_by=("neo",)), [])
+        self.assertEqual(self.db.aggregate(filters, group_by=()), [])
+
+    def test_row_filters_are_supported(self):
+        filters = [lambda approach: approach.velocity > 20]
+        rows = self.db.aggregate(filters, group_by=("hazardous",))
+        matches = [approach for approach in self.approaches if approach.velocity > 20]
+        expected = summarize(matches, lambda approach: approach.neo.hazardous)
+        self.assertRowsMatch(rows, expected, lambda row: row["hazardous"])
+
+    def test_mapped_database_agrees(self):
+        with tempfile.TemporaryDirectory() as directory:
+            self.db.save_columns(directory)
+            mapped = NEODatabase.from_columns(directory)
+            self.assertEqual(
+                mapped.aggregate(group_by=("neo", "month")),
+                self.db.aggregate(group_by=("neo", "month")),
+            )
+
+    def test_unknown_metric(self):
+        self.assertEqual(parse_metric("min_velocity"), ("min", "velocity"))
+        with self.assertRaises(ValueError):
+            parse_metric("median_distance")
+        with self.assertRaises(ValueError):
+            parse_metric("min_time")
+
+
+def pairwise_clusters(times, window, min_size):
+    """Find clusters by counting the times within each window one by one, and merging them."""
+    clusters = []
+    for start, time in enumerate(times):
+        stop = start
+        while stop < len(times) and times[stop] <= time + window:
+            stop += 1
+        if stop - start < min_size:
+            continue
+        if clusters and start < clusters[-1][1]:
+            clusters[-1] = (clusters[-1][0], stop)
+        else:
+            clusters.append((start, stop))
+    return clusters
+
+
+class TestClusters(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.approaches = load_approaches(TEST_CAD_FILE)
+        cls.db = NEODatabase(load_neos(TEST_NEO_FILE), cls.approaches)
+
+    def test_time_clusters_match_pairwise_search(self):
+        rng = random.Random(0)
+        times = np.array(sorted(rng.randrange(0, 10_000) for _ in range(500)))
+        for window, min_size in ((10, 3), (30, 5), (0, 2), (100, 40)):
+            with self.subTest(window=window, min_size=min_size):
+                self.assertEqual(
+                    time_clusters(times, window, min_size),
+                    pairwise_clusters(times.tolist(), window, min_size),
+                )
+        self.assertEqual(time_clusters(np.zeros(0, dtype=np.int64), 10, 2), [])
+
+    def test_clusters_of_close_approaches(self):
+        filters = create_filters(distance_max=0.05)
+        rows = self.db.clusters(filters, window=24 * 60, min_size=3)
+        self.assertGreater(len(rows), 0)
+        matches = [approach for approach in self.approaches if approach.distance <= 0.05]
+        for row in rows:
+            members = [
+                approach for approach in matches
+                if row["start"] <= approach.time_str <= row["end"]
+            ]
+            self.assertEqual(len(members), row["approaches"])
+            self.assertGreaterEqual(row["neos"], 3)
+            self.assertEqual(set(row["designations"].split(";")), {a._designation for a in members})
+            self.assertEqual(row["min_distance"], min(approach.distance for approach in members))
+
+    def test_clusters_of_mapped_partitions(self):
+        filters = create_filters(distance_max=0.05)
+        with tempfile.TemporaryDirectory() as directory:
+            self.db.save_columns(directory, partition_by="year")
+            mapped = NEODatabase.from_columns(directory)
+            self.assertEqual(
+                mapped.clusters(filters, window=24 * 60, min_size=3),
+                self.db.clusters(filters, window=24 * 60, min_size=3),
+            )
+
+    def test_no_clusters_when_too_large(self):
+        self.assertEqual(self.db.clusters(window=60, min_size=1000), [])
+
+
+class TestTimeSeries(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.approaches = load_approaches(TEST_CAD_FILE)
+        cls.db = NEODatabase(load_neos(TEST_NEO_FILE), cls.approaches)
+
+    def expected_rows(self, key, start_date, end_date):
+        rows = collections.defaultdict(lambda: {"approaches": 0, "hazardous": 0, "diameter_known": 0})
+        for approach in self.approaches:
+            if start_date <= approach.time.date() <= end_date:
+                row = rows[key(approach.time.date())]
+                row["approaches"] += 1
+                row["hazardous"] += approach.neo.hazardous
+                row["diameter_known"] += not math.isnan(approach.neo.diameter)
+        return rows
+
+    def test_daily_weekly_and_monthly_counts(self):
+        start_date, end_date = datetime.date(2020, 1, 30), datetime.date(2020, 5, 3)
+        for interval, key in (
+            ("day", lambda date: date.isoformat()),
+            ("week", lambda date: max(date - datetime.timedelta(days=date.weekday()), start_date).isoformat()),
+            ("month", lambda date: date.strftime("%Y-%m")),
+        ):
+            with self.subTest(interval=interval):
+                rows = self.db.timeseries(start_date, end_date, interval)
+                expected = self.expected_rows(key, start_date, end_date)
+                self.assertEqual(
+                    {row.pop("period"): row for row in rows if row["approaches"]}, dict(expected)
+                )
+        self.assertEqual(len(self.db.timeseries(start_date, end_date, "day")), 95)
+        self.assertEqual(self.db.timeseries(end_date, start_date), [])
+
+    def test_default_range_covers_all_approaches(self):
+        rows = self.db.timeseries(interval="month")
+        self.assertEqual(sum(row["approaches"] for row in rows), len(self.approaches))
+
+    def test_date_counts_use_day_counts(self):
+        for filters in (
+            create_filters(start_date=datetime.date(2020, 3, 1), end_date=datetime.date(2020, 3, 31)),
+            create_filters(date=datetime.date(2020, 3, 2), hazardous=False),
+            create_filters(end_date=datetime.date(2020, 6, 1), hazardous=True),
+        ):
+            with self.subTest(filters=filters):
+                stats = QueryStats()
+                expected = sum(1 for approach in self.approaches if all(filter(approach) for filter in filters))
+                self.assertEqual(self.db.count(filters, stats=stats), expected)
+                self.assertEqual(stats.blocks_scanned, 0)
+
+
+class TestHistogram2D(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.approaches = load_approaches(TEST_CAD_FILE)
+        cls.db = NEODatabase(load_neos(TEST_NEO_FILE), cls.approaches)
+
+    def test_histogram_matches_numpy(self):
+        rng = np.random.default_rng(0)
+        x, y = rng.uniform(0.0, 1.0, 10_000), rng.uniform(0.0, 40.0, 10_000)
+        x[::10] = np.nan
+        for x_edges, y_edges in (
+            (bin_edges(x, 7), bin_edges(y, 5)),
+            (bin_edges(x, 4, log=True), bin_edges(y, 3, (10.0, 20.0))),
+        ):
+            expected, _, _ = np.histogram2d(x[~np.isnan(x)], y[~np.isnan(x)], (x_edges, y_edges))
+            self.assertEqual(histogram2d(x, y, x_edges, y_edges).tolist(), expected.astype(int).tolist())
+
+    def test_histogram_of_matches(self):
+        filters = create_filters(hazardous=True, start_date=datetime.date(2020, 3, 1))
+        matches = list(self.db.query(filters))
+        distance_edges, velocity_edges, counts = self.db.histogram2d(
+            filters, distance_bins=6, velocity_bins=4, log_distance=True, velocity_range=(0.0, 20.0)
+        )
+        self.assertEqual(distance_edges[0], min(approach.distance for approach in matches))
+        self.assertEqual(distance_edges[-1], max(approach.distance for approach in matches))
+        self.assertEqual(velocity_edges.tolist(), [0.0, 5.0, 10.0, 15.0, 20.0])
+        expected, _, _ = np.histogram2d(
+            [approach.distance for approach in matches],
+            [approach.velocity for approach in matches],
+            (distance_edges, velocity_edges),
+        )
+        self.assertEqual(counts.tolist(), expected.astype(int).tolist())
+        self.assertEqual(counts.sum(), sum(approach.velocity <= 20 for approach in matches))
+
+    def test_invalid_ranges(self):
+        with self.assertRaises(ValueError):
+            self.db.histogram2d(distance_range=(0.0, 0.1), log_distance=True)
+        with self.assertRaises(ValueError):
+            self.db.histogram2d(velocity_range=(20.0, 10.0))
+        _, _, counts = self.db.histogram2d(create_filters(distance_min=0.5, distance_max=0.4), 2, 3)
+        self.assertEqual(counts.tolist(), [[0, 0, 0], [0, 0, 0]])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,240 @@
+"""Check that the columns of an `NEODatabase` mirror its close approaches.
+
+A `ColumnStore` holds the attributes of the close approaches as NumPy arrays, and
+filters evaluated on those columns with `mask` must agree with the filters called
+on each `CloseApproach`. A `SharedColumnStore` publishes the same columns into
+shared memory, from which other processes can attach to them. A database saved
+with `save_columns` and memory-mapped with `NEODatabase.from_columns` must answer
+queries exactly like the database it was saved from, and a database saved with
+`partition_by="year"` must only open the partitions that can match a query.
+
+To run these tests from the project root, run:
+
+    $ python3 -m unittest --verbose tests.test_columns
+"""
+import datetime
+import math
+import multiprocessing
+import pathlib
+import tempfile
+import unittest
+
+import numpy as np
+
+from columns import SharedColumnStore
+from database import NEODatabase
+from extract import load_neos, load_approaches
+from models import NearEarthObject, CloseApproach
+from filters import create_filters, combined_mask
+from helpers import datetime_to_minutes
+
+
+TESTS_ROOT = (pathlib.Path(__file__).parent).resolve()
+TEST_NEO_FILE = TESTS_ROOT / "test-neos-2020.csv"
+TEST_CAD_FILE = TESTS_ROOT / "test-cad-2020.json"
+
+
+def sum_distance_column(spec):
+    """Attach to a published store in another process and sum its distances."""
+    with SharedColumnStore.attach(spec) as shared:
+        return float(shared["distance"].sum())
+
+
+class TestColumnStore(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.neos = load_neos(TEST_NEO_FILE)
+        cls.approaches = load_approaches(TEST_CAD_FILE)
+        cls.db = NEODatabase(cls.neos, cls.approaches)
+        cls.columns = cls.db._columns
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.db.close()
+
+    def test_columns_are_aligned_with_approaches(self):
+        self.assertEqual(len(self.columns), len(self.approaches))
+        for index in (0, 1, len(self.approaches) // 2, len(self.approaches) - 1):
+            approach = self.approaches[index]
+            self.assertEqual(self.columns["time"][index], datetime_to_minutes(approach.time))
+            self.assertEqual(self.columns["distance"][index], approach.distance)
+            self.assertEqual(self.columns["velocity"][index], approach.velocity)
+            self.assertIs(self.neos[self.columns["neo_index"][index]], approach.neo)
+            self.assertEqual(self.columns["hazardous"][index], approach.neo.hazardous)
+
+    def test_masks_agree_with_filters_on_approaches(self):
+        filter_sets = [
+            create_filters(date=datetime.date(2020, 3, 2)),
+            create_filters(start_date=datetime.date(2020, 3, 1), end_date=datetime.date(2020, 3, 31)),
+            create_filters(distance_min=0.1, velocity_max=20),
+            create_filters(diameter_min=0.5, diameter_max=1.5),
+            create_filters(hazardous=True),
+            create_filters(hazardous=False),
+        ]
+        for filters in filter_sets:
+            expected = [all(filter(approach) for filter in filters) for approach in self.approaches]
+            received = combined_mask(filters, self.columns)
+            self.assertEqual(expected, received.tolist(), msg=f"Masks differ for {filters}.")
+
+    def test_shared_columns_can_be_attached_from_another_process(self):
+        with SharedColumnStore.publish(self.columns) as shared:
+            for name, column in self.columns.columns.items():
+                np.testing.assert_array_equal(shared[name], column)
+            with multiprocessing.get_context("spawn").Pool(1) as pool:
+                total = pool.apply(sum_distance_column, (shared.spec,))
+            self.assertAlmostEqual(total, float(self.columns["distance"].sum()))
+
+    def test_shared_columns_are_unlinked_on_close(self):
+        shared = SharedColumnStore.publish(self.columns)
+        spec = shared.spec
+        shared.close()
+        with self.assertRaises(FileNotFoundError):
+            SharedColumnStore.attach(spec)
+
+    def test_database_publishes_its_columns_once(self):
+        self.assertIs(self.db.share_columns(), self.db.share_columns())
+
+
+def describe(approach):
+    """Summarize a close approach and its NEO as a comparable tuple."""
+    return (
+        approach.time,
+        approach.distance,
+        approach.velocity,
+        approach.neo.designation,
+        approach.neo.name,
+        approach.neo.hazardous,
+    )
+
+
+class TestMappedDatabase(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.db = NEODatabase(load_neos(TEST_NEO_FILE), load_approaches(TEST_CAD_FILE))
+        cls.tempdir = tempfile.TemporaryDirectory()
+        cls.db.save_columns(cls.tempdir.name)
+        cls.mapped = NEODatabase.from_columns(cls.tempdir.name)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.tempdir.cleanup()
+
+    def test_mapped_columns_are_memory_maps(self):
+        self.assertIsInstance(self.mapped._columns["distance"], np.memmap)
+
+    def test_mapped_queries_match_in_memory_queries(self):
+        filter_sets = [
+            create_filters(),
+            create_filters(date=datetime.date(2020, 3, 2)),
+            create_filters(start_date=datetime.date(2020, 3, 1), distance_max=0.1),
+            create_filters(velocity_min=10, diameter_min=0.5),
+            create_filters(hazardous=True),
+        ]
+        for filters in filter_sets:
+            expected = [describe(approach) for approach in self.db.query(filters)]
+            received = [describe(approach) for approach in self.mapped.query(filters)]
+            self.assertEqual(expected, received, msg=f"Mapped results differ for {filters}.")
+
+    def test_mapped_query_with_limit(self):
+        expected = [describe(approach) for approach in self.db.query(limit=3)]
+        received = [describe(approach) for approach in self.mapped.query(limit=3)]
+        self.assertEqual(expected, received)
+
+    def test_mapped_get_neo_by_designation_and_name(self):
+        adonis = self.mapped.get_neo_by_designation("2101")
+        self.assertEqual(adonis.name, "Adonis")
+        self.assertEqual(adonis.diameter, 0.60)
+        self.assertTrue(adonis.hazardous)
+        self.assertIs(self.mapped.get_neo_by_name("Adonis"), adonis)
+
+        bs_2020 = self.mapped.get_neo_by_designation("2020 BS")
+        self.assertIsNone(bs_2020.name)
+        self.assertTrue(math.isnan(bs_2020.diameter))
+
+    def test_mapped_neos_and_approaches_are_linked(self):
+        for designation in ("2020 AY1", "2019 YK", "1865"):
+            expected = self.db.get_neo_by_designation(designation)
+            received = self.mapped.get_neo_by_designation(designation)
+            self.assertEqual(
+                [describe(approach) for approach in expected.approaches],
+                [describe(approach) for approach in received.approaches],
+            )
+            for approach in received.approaches:
+                self.assertIs(approach.neo, received)
+
+
+def build_multi_year_database():
+    """Build a small database of approaches from 2018 through 2022, sorted by time.
+
+    The approaches of 2019 are all farther than 0.3 au.
+    """
+    neos = [
+        NearEarthObject(designation=str(i), name="", diameter="0.5", hazardous="Y" if i % 2 else "N")
+        for i in range(10)
+    ]
+    approaches = []
+    for year in range(2018, 2023):
+        for month in ("Jan", "Apr", "Jul", "Oct"):
+            for day in range(1, 11):
+                approaches.append(
+                    CloseApproach(
+                        _designation=str((year + day) % 10),
+                        time=f"{year}-{month}-{day:02d} 12:00",
+                        distance=str(0.35 + day / 100 if year == 2019 else day / 50),
+                        velocity=str(day * 3.0),
+                    )
+                )
+    return NEODatabase(neos, approaches)
+
+
+class TestPartitionedDatabase(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.db = build_multi_year_database()
+        cls.tempdir = tempfile.TemporaryDirectory()
+        cls.db.save_columns(cls.tempdir.name, partition_by="year")
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.tempdir.cleanup()
+
+    def open_partitions(self, filters):
+        """Run a query on a freshly mapped database and return its results and opened partitions."""
+        mapped = NEODatabase.from_columns(self.tempdir.name)
+        results = [describe(approach) for approach in mapped.query(filters)]
+        opened = [partition.name for partition in mapped._partitions if partition.loaded]
+        return results, opened
+
+    def test_partitions_are_years_with_ranges(self):
+        mapped = NEODatabase.from_columns(self.tempdir.name)
+        self.assertEqual(
+            [partition.name for partition in mapped._partitions],
+            ["2018", "2019", "2020", "2021", "2022"],
+        )
+        for partition in mapped._partitions:
+            self.assertEqual(len(partition), 40)
+            self.assertFalse(partition.loaded)
+        minimum, maximum = mapped._partitions[1].stats["distance"]
+        self.assertGreater(minimum, 0.3)
+
+    def test_date_filters_only_open_matching_years(self):
+        filters = create_filters(start_date=datetime.date(2020, 3, 1), end_date=datetime.date(2020, 9, 1))
+        results, opened = self.open_partitions(filters)
+        self.assertEqual(results, [describe(approach) for approach in self.db.query(filters)])
+        self.assertEqual(len(results), 20)
+        self.assertEqual(opened, ["2020"])
+
+    def test_range_filters_skip_partitions(self):
+        filters = create_filters(distance_max=0.1)
+        results, opened = self.open_partitions(filters)
+        self.assertEqual(results, [describe(approach) for approach in self.db.query(filters)])
+        self.assertNotIn("2019", opened)
+
+    def test_unfiltered_query_reads_every_partition(self):
+        results, opened = self.open_partitions(create_filters())
+        self.assertEqual(results, [describe(approach) for approach in self.db.query()])
+        self.assertEqual(len(opened), 5)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -10,13 +10,18 @@ To run these tests from the project root, run:
 
 These tests should pass when Task 2 is complete.
 """
+import csv
+import datetime
 import pathlib
 import math
+import statistics
+import tempfile
 import unittest
 
 
-from extract import load_neos, load_approaches
+from extract import load_neos, load_approaches, load_orbital_columns, load_approach_columns
 from database import NEODatabase
+from filters import UnsupportedCriterionError, create_filters
 
 
 # Paths to the test data files.
@@ -113,6 +118,310 @@ class TestDatabase(unittest.TestCase):
     def test_get_neo_by_name_missing(self):
         nonexistent = self.db.get_neo_by_name("not-real-name")
         self.assertIsNone(nonexistent)
+        self.assertIsNone(self.db.get_neo_by_name(""))
+        self.assertIsNone(self.db.get_neo_by_name(None))
+
+    def test_get_neo_by_name_ignores_case(self):
+        self.assertIs(self.db.get_neo_by_name("jORMUNGANDR"), self.db.get_neo_by_name("Jormungandr"))
+
+    def test_search_neos_by_misspelled_name(self):
+        matches = self.db.search_neos_by_name("Jormungander")
+        self.assertEqual(matches[0][0].designation, "471926")
+        self.assertLess(matches[0][1], 1.0)
+        self.assertEqual(self.db.search_neos_by_name("Lemmon", k=1), [(self.db.get_neo_by_name("Lemmon"), 1.0)])
+        self.assertEqual(self.db.search_neos_by_name("xyzzy"), [])
+
+    def test_complete_designations_and_names(self):
+        self.assertEqual(self.db.complete("designation", "2020 ab", limit=2), ["2020 AB2", "2020 AB3"])
+        self.assertEqual(self.db.complete("name", "jor"), ["Jormungandr"])
+        self.assertEqual(self.db.complete("name", "xyzzy"), [])
+        with self.assertRaises(ValueError):
+            self.db.complete("diameter", "1")
+
+
+class TestNEOSummaries(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.neos = load_neos(TEST_NEO_FILE)
+        cls.approaches = load_approaches(TEST_CAD_FILE)
+        cls.db = NEODatabase(cls.neos, cls.approaches)
+        cls.tempdir = tempfile.TemporaryDirectory()
+        cls.db.save_columns(cls.tempdir.name)
+        cls.mapped = NEODatabase.from_columns(cls.tempdir.name)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.tempdir.cleanup()
+
+    def assertSummaryDescribes(self, summary, approaches):
+        self.assertEqual(summary.count, len(approaches))
+        if not approaches:
+            self.assertIsNone(summary.first_time)
+            return
+        closest = min(approaches, key=lambda approach: (approach.distance, approach.time))
+        self.assertEqual(summary.first_time, min(approach.time for approach in approaches))
+        self.assertEqual(summary.last_time, max(approach.time for approach in approaches))
+        self.assertEqual(summary.min_distance, closest.distance)
+        self.assertEqual(summary.min_distance_time, closest.time)
+        self.assertEqual(summary.max_velocity, max(approach.velocity for approach in approaches))
+
+    def test_approaches_are_sorted_by_time(self):
+        for neo in self.neos:
+            times = [approach.time for approach in neo.approaches]
+            self.assertEqual(times, sorted(times))
+
+    def test_summaries_describe_approaches(self):
+        self.assertTrue(any(len(neo.approaches) > 1 for neo in self.neos))
+        for neo in self.neos:
+            self.assertSummaryDescribes(self.db.get_summary(neo), neo.approaches)
+
+    def test_mapped_summaries_match(self):
+        for neo in self.neos[:200]:
+            mapped_neo = self.mapped.get_neo_by_designation(neo.designation)
+            self.assertSummaryDescribes(self.mapped.get_summary(mapped_neo), neo.approaches)
+            self.assertEqual(
+                [approach.time for approach in mapped_neo.approaches],
+                [approach.time for approach in neo.approaches],
+            )
+
+    def test_next_approach(self):
+        neo = max(self.neos, key=lambda neo: len(neo.approaches))
+        first, second = neo.approaches[:2]
+        self.assertIs(self.db.next_approach(neo, datetime.datetime(1900, 1, 1)), first)
+        self.assertIs(self.db.next_approach(neo, first.time), second)
+        self.assertIsNone(self.db.next_approach(neo, neo.approaches[-1].time))
+        mapped_neo = self.mapped.get_neo_by_designation(neo.designation)
+        self.assertEqual(self.mapped.next_approach(mapped_neo, first.time).time, second.time)
+
+
+def expected_next_approaches(neos, after, filters=()):
+    """Find the next approach of each NEO after a time by looking at every approach."""
+    upcoming = []
+    for neo in neos:
+        later = [approach for approach in neo.approaches if approach.time > after]
+        if later and all(filter(later[0]) for filter in filters):
+            upcoming.append(min(later, key=lambda approach: approach.time))
+    return sorted(upcoming, key=lambda approach: approach.time)
+
+
+class TestNextApproaches(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.neos = load_neos(TEST_NEO_FILE)
+        cls.db = NEODatabase(cls.neos, load_approaches(TEST_CAD_FILE))
+
+    def test_next_approaches_match_brute_force(self):
+        for after in (datetime.datetime(1999, 1, 1), datetime.datetime(2020, 6, 1, 12, 30)):
+            for filters in (
+                create_filters(),
+                create_filters(hazardous=True),
+                create_filters(diameter_min=0.5, hazardous=False),
+            ):
+                expected = expected_next_approaches(self.neos, after, filters)
+                received = self.db.next_approaches(after, filters)
+                self.assertEqual(
+                    [approach.time for approach in received],
+                    [approach.time for approach in expected],
+                )
+                self.assertEqual(
+                    {approach.neo.designation for approach in received},
+                    {approach.neo.designation for approach in expected},
+                )
+
+    def test_next_approaches_with_limit(self):
+        after = datetime.datetime(2020, 6, 1)
+        self.assertEqual(
+            self.db.next_approaches(after, limit=4), self.db.next_approaches(after)[:4]
+        )
+        self.assertEqual(self.db.next_approaches(datetime.datetime(2030, 1, 1)), [])
+
+    def test_only_neo_filters_are_accepted(self):
+        with self.assertRaises(ValueError):
+            self.db.next_approaches(datetime.datetime(2020, 1, 1), create_filters(distance_max=0.1))
+
+    def test_mapped_database_agrees(self):
+        after = datetime.datetime(2020, 3, 1)
+        with tempfile.TemporaryDirectory() as directory:
+            self.db.save_columns(directory)
+            mapped = NEODatabase.from_columns(directory)
+            received = mapped.next_approaches(after, create_filters(hazardous=True), limit=20)
+            expected = self.db.next_approaches(after, create_filters(hazardous=True), limit=20)
+            self.assertEqual(
+                [(approach.time, approach.neo.designation) for approach in received],
+                [(approach.time, approach.neo.designation) for approach in expected],
+            )
+
+
+def orbital_values(name):
+    """Read an orbital element of every NEO of the test file, by designation."""
+    with open(TEST_NEO_FILE) as csvfile:
+        return {
+            row["pdes"]: float(row[name]) if row[name] else math.nan
+            for row in csv.DictReader(csvfile)
+        }
+
+
+class TestOrbitalFilters(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.neos = load_neos(TEST_NEO_FILE)
+        cls.approaches = load_approaches(TEST_CAD_FILE)
+        cls.db = NEODatabase(
+            cls.neos, cls.approaches, load_orbital_columns(["moid", "q", "H"], TEST_NEO_FILE)
+        )
+        cls.moid = orbital_values("moid")
+        cls.q = orbital_values("q")
+        cls.H = orbital_values("H")
+
+    def test_orbital_columns_are_loaded(self):
+        self.assertEqual(self.db.orbital_columns(), ["moid", "q", "H"])
+        self.assertEqual(
+            self.db.orbital_nbytes(), {name: 8 * len(self.neos) for name in ("moid", "q", "H")}
+        )
+
+    def test_query_with_orbital_filters(self):
+        filters = create_filters(moid_max=0.01, H_max=22, distance_max=0.2)
+        expected = [
+            approach for approach in self.approaches
+            if self.moid[approach._designation] <= 0.01
+            and self.H[approach._designation] <= 22
+            and approach.distance <= 0.2
+        ]
+        self.assertGreater(len(expected), 0)
+        self.assertEqual(list(self.db.query(filters)), expected)
+        self.assertEqual(self.db.count(filters), len(expected))
+        self.assertEqual(list(self.db.query(filters, workers=2)), expected)
+
+    def test_next_approaches_with_orbital_filters(self):
+        after = datetime.datetime(2020, 6, 1)
+        filters = create_filters(q_max=0.9)
+        neos = [neo for neo in self.neos if self.q[neo.designation] <= 0.9]
+        self.assertEqual(
+            [approach.time for approach in self.db.next_approaches(after, filters)],
+            [approach.time for approach in expected_next_approaches(neos, after, [])],
+        )
+
+    def test_orbital_filters_need_their_columns(self):
+        with self.assertRaises(UnsupportedCriterionError):
+            self.db.count(create_filters(albedo_min=0.2))
+
+    def test_mapped_database_keeps_orbital_columns(self):
+        filters = create_filters(moid_min=0.05, hazardous=True)
+        with tempfile.TemporaryDirectory() as directory:
+            self.db.save_columns(directory)
+            mapped = NEODatabase.from_columns(directory)
+            self.assertEqual(sorted(mapped.orbital_columns()), ["H", "moid", "q"])
+            self.assertEqual(
+                [approach.time for approach in mapped.query(filters)],
+                [approach.time for approach in self.db.query(filters)],
+            )
+
+
+class TestExtraApproachColumns(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.approaches = load_approaches(TEST_CAD_FILE)
+        cls.extras = load_approach_columns(["dist_min", "v_inf"], TEST_CAD_FILE)
+        cls.db = NEODatabase(load_neos(TEST_NEO_FILE), cls.approaches, extras=cls.extras)
+
+    def test_extra_columns_are_loaded(self):
+        self.assertEqual(self.db.extra_columns(), ["dist_min", "v_inf"])
+        self.assertEqual(
+            self.db.extra_nbytes(), {"dist_min": 8 * len(self.approaches), "v_inf": 8 * len(self.approaches)}
+        )
+
+    def test_query_with_extra_filters(self):
+        filters = create_filters(dist_lower_max=0.01, v_inf_min=10, hazardous=False)
+        expected = [
+            approach for index, approach in enumerate(self.approaches)
+            if self.extras["dist_min"][index] <= 0.01
+            and self.extras["v_inf"][index] >= 10
+            and not approach.neo.hazardous
+        ]
+        self.assertGreater(len(expected), 0)
+        self.assertEqual(list(self.db.query(filters)), expected)
+        self.assertEqual(self.db.count(filters), len(expected))
+
+    def test_query_columns(self):
+        filters = create_filters(distance_max=0.05)
+        received = list(self.db.query_columns(filters, ["dist_min"], limit=5))
+        self.assertEqual([approach for approach, _ in received], list(self.db.query(filters, limit=5)))
+        for approach, values in received:
+            index = self.approaches.index(approach)
+            self.assertEqual(values, {"dist_min": self.extras["dist_min"][index]})
+
+    def test_extra_filters_need_their_columns(self):
+        with self.assertRaises(UnsupportedCriterionError):
+            self.db.count(create_filters(dist_upper_max=0.1))
+        with self.assertRaises(UnsupportedCriterionError):
+            list(self.db.query_columns(names=["h"]))
+
+    def test_mapped_database_keeps_extra_columns(self):
+        filters = create_filters(dist_lower_max=0.05)
+        with tempfile.TemporaryDirectory() as directory:
+            self.db.save_columns(directory, partition_by="year")
+            mapped = NEODatabase.from_columns(directory)
+            self.assertEqual(
+                [approach.time for approach in mapped.query(filters)],
+                [approach.time for approach in self.db.query(filters)],
+            )
+
+
+class TestSimilarNEOs(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.neos = load_neos(TEST_NEO_FILE)
+        cls.db = NEODatabase(
+            cls.neos,
+            load_approaches(TEST_CAD_FILE),
+            load_orbital_columns(["a", "e", "i", "om", "w"], TEST_NEO_FILE),
+        )
+        cls.elements = {name: orbital_values(name) for name in ("a", "e", "i", "om", "w")}
+
+    def brute_force(self, designation, k, angles):
+        def coordinates(neo):
+            values = [self.elements[name][neo] for name in ("a", "e", "i")]
+            if angles:
+                for name in ("om", "w"):
+                    radians = math.radians(self.elements[name][neo])
+                    values.extend((math.cos(radians), math.sin(radians)))
+            return values
+
+        points = {neo.designation: coordinates(neo.designation) for neo in self.neos}
+        known = {neo: values for neo, values in points.items() if not any(map(math.isnan, values))}
+        scales = [
+            statistics.pstdev(values[dimension] for values in known.values())
+            for dimension in range(len(points[designation]))
+        ]
+        distances = {
+            neo: math.dist(
+                [value / scale for value, scale in zip(values, scales)],
+                [value / scale for value, scale in zip(points[designation], scales)],
+            )
+            for neo, values in known.items()
+            if neo != designation
+        }
+        return sorted(distances, key=distances.get)[:k]
+
+    def test_similar_neos_match_brute_force(self):
+        for designation in ("99942", "2020 AY1", "1685"):
+            for angles in (False, True):
+                with self.subTest(designation=designation, angles=angles):
+                    received = self.db.similar_neos(designation, 8, angles=angles)
+                    self.assertEqual(
+                        [neo.designation for neo, _ in received],
+                        self.brute_force(designation, 8, angles),
+                    )
+                    distances = [distance for _, distance in received]
+                    self.assertEqual(distances, sorted(distances))
+
+    def test_unknown_neo(self):
+        self.assertEqual(self.db.similar_neos("not-real-designation", 3), [])
+
+    def test_elements_must_be_loaded(self):
+        db = NEODatabase(load_neos(TEST_NEO_FILE), load_approaches(TEST_CAD_FILE))
+        with self.assertRaises(ValueError):
+            db.similar_neos("99942", 3)
 
 
 if __name__ == "__main__":
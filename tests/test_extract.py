@@ -2,7 +2,10 @@
 
 The `load_neos` function should load a collection of `NearEarthObject`s from a
 CSV file, and the `load_approaches` function should load a collection of
-`CloseApproach` objects from a JSON file.
+`CloseApproach` objects from a JSON file. The `load_approach_chunks` function
+should stream the same close approaches in chunks of bounded size. The
+`load_orbital_columns` and `load_approach_columns` functions should load extra
+fields aligned with the NEOs and with the close approaches.
 
 To run these tests from the project root, run:
 
@@ -12,11 +15,15 @@ These tests should pass when Task 2 is complete.
 """
 import collections.abc
 import datetime
+import json
 import pathlib
 import math
+import tempfile
 import unittest
 
-from extract import load_neos, load_approaches
+from extract import load_neos, load_approaches, load_approach_chunks
+from extract import load_orbital_columns, load_approach_columns
+from helpers import cd_to_minutes
 from models import NearEarthObject, CloseApproach
 
 
@@ -107,6 +114,36 @@ class TestLoadApproaches(unittest.TestCase):
         self.assertIsNotNone(approach)
         self.assertIsInstance(approach.time, datetime.datetime)
 
+    def test_approach_times_match_calendar_dates(self):
+        with open(TEST_CAD_FILE) as f:
+            cad = json.load(f)
+        dates = [row[cad["fields"].index("cd")] for row in cad["data"]]
+        self.assertEqual(
+            [approach.time for approach in self.approaches],
+            [datetime.datetime.strptime(date, "%Y-%b-%d %H:%M") for date in dates],
+        )
+
+    def test_approach_time_is_kept_in_minutes(self):
+        approach = CloseApproach(_designation="2020 AY1", time="2020-Feb-29 23:59", distance="0.1", velocity="5")
+        self.assertEqual(approach.minutes, 26_383_679)
+        self.assertEqual(approach.time_str, "2020-02-29 23:59")
+        approach.time = datetime.datetime(1969, 7, 20, 20, 17)
+        self.assertEqual(approach.minutes, -236_383)
+        with self.assertRaises(ValueError):
+            CloseApproach(_designation="2020 AY1", time="2021-Feb-29 00:00", distance="0.1", velocity="5")
+
+    def test_malformed_calendar_dates_are_rejected_like_strptime(self):
+        for date in (
+            "2020-Jan-01 1_0:00", "2020-Jan-01 +1:00", "2020-Jan-01 10: 5", "2020-Jan-001 10:00",
+            "20_20-Jan-01 10:00", "202-Jan-01 10:00", "2020-Jan-01 10:00:00",
+        ):
+            with self.subTest(date=date):
+                with self.assertRaises(ValueError):
+                    datetime.datetime.strptime(date, "%Y-%b-%d %H:%M")
+                with self.assertRaises(ValueError):
+                    cd_to_minutes(date)
+        self.assertEqual(cd_to_minutes("2020-jan-1 0:05"), cd_to_minutes("2020-Jan-01 00:05"))
+
     def test_approach_distance_is_float(self):
         approach = self.get_first_approach_or_none()
         self.assertIsNotNone(approach)
@@ -118,5 +155,85 @@ class TestLoadApproaches(unittest.TestCase):
         self.assertIsInstance(approach.velocity, float)
 
 
+def summarize(approaches):
+    return [
+        (approach._designation, approach.time, approach.distance, approach.velocity)
+        for approach in approaches
+    ]
+
+
+class TestLoadApproachChunks(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.expected = summarize(load_approaches(TEST_CAD_FILE))
+
+    def test_chunks_concatenate_to_all_approaches(self):
+        for chunk_size in (1, 333, 4700, 100_000):
+            chunks = list(load_approach_chunks(TEST_CAD_FILE, chunk_size))
+            received = summarize(approach for chunk in chunks for approach in chunk)
+            self.assertEqual(received, self.expected)
+
+    def test_chunks_are_bounded(self):
+        chunks = list(load_approach_chunks(TEST_CAD_FILE, 333))
+        self.assertEqual(len(chunks), math.ceil(4700 / 333))
+        self.assertTrue(all(len(chunk) <= 333 for chunk in chunks))
+
+    def test_chunks_with_fields_before_data(self):
+        with open(TEST_CAD_FILE) as json_file:
+            contents = json.load(json_file)
+        reordered = {"fields": contents["fields"], "count": contents["count"], "data": contents["data"]}
+        with tempfile.NamedTemporaryFile("w", suffix=".json") as json_file:
+            json.dump(reordered, json_file)
+            json_file.flush()
+            chunks = list(load_approach_chunks(json_file.name, 1000))
+        self.assertEqual(summarize(approach for chunk in chunks for approach in chunk), self.expected)
+
+
+class TestLoadOrbitalColumns(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.neos = load_neos(TEST_NEO_FILE)
+        cls.orbits = load_orbital_columns(["moid", "albedo", "moid"], TEST_NEO_FILE)
+
+    def test_columns_are_aligned_with_neos(self):
+        self.assertEqual(list(self.orbits), ["moid", "albedo"])
+        for column in self.orbits.values():
+            self.assertEqual(column.dtype.kind, "f")
+            self.assertEqual(len(column), len(self.neos))
+        toro = next(index for index, neo in enumerate(self.neos) if neo.name == "Toro")
+        self.assertEqual(self.orbits["albedo"][toro], 0.31)
+
+    def test_blank_values_are_nan(self):
+        known = [neo.diameter for neo in self.neos]
+        diameters = load_orbital_columns(["diameter"], TEST_NEO_FILE)["diameter"]
+        self.assertEqual(
+            [math.isnan(value) for value in diameters], [math.isnan(value) for value in known]
+        )
+
+    def test_unknown_column(self):
+        with self.assertRaises(ValueError):
+            load_orbital_columns(["not-a-column"], TEST_NEO_FILE)
+
+
+class TestLoadApproachColumns(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.approaches = load_approaches(TEST_CAD_FILE)
+        cls.extras = load_approach_columns(["dist_min", "dist_max", "jd"], TEST_CAD_FILE)
+
+    def test_columns_are_aligned_with_approaches(self):
+        for column in self.extras.values():
+            self.assertEqual(column.dtype.kind, "f")
+            self.assertEqual(len(column), len(self.approaches))
+        for index, approach in enumerate(self.approaches[:100]):
+            self.assertLessEqual(self.extras["dist_min"][index], approach.distance)
+            self.assertGreaterEqual(self.extras["dist_max"][index], approach.distance)
+        self.assertAlmostEqual(self.extras["jd"][0], 2458849.537524496)
+
+    def test_unknown_field(self):
+        with self.assertRaises(ValueError):
+            load_approach_columns(["not-a-field"], TEST_CAD_FILE)
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,436 @@
+"""Check that the auxiliary indexes of an `NEODatabase` answer queries correctly.
+
+Each index must produce exactly the same results as a full scan, while looking
+at less of the data. A `ZoneMap` lets a columnar scan skip whole blocks of close
+approaches, a `KDTree` finds the approaches within ranges on several columns at
+once, a `Bitmap` holds the approaches of hazardous NEOs or of NEOs with a
+known diameter, and an `IntervalTree` finds the approaches whose uncertainty
+interval of the distance overlaps or lies within a band; their use is reported
+in the `QueryStats` of a query. A `DayCounts` must count the approaches between
+any two days like a scan, a `NameIndex` must rank names like a comparison of
+the query with every name, and a `PrefixIndex` must complete prefixes like a
+comparison with every string.
+
+To run these tests from the project root, run:
+
+    $ python3 -m unittest --verbose tests.test_indexes
+"""
+import copy
+import datetime
+import random
+import unittest
+
+import numpy as np
+
+from columns import BLOCK_SIZE, ColumnStore
+from database import NEODatabase, QueryStats
+from filters import create_filters, filter_intervals
+from indexes import Bitmap, DayCounts, IntervalTree, KDTree, NameIndex, PrefixIndex, ZoneMap
+from indexes import name_trigrams
+from models import NearEarthObject, CloseApproach
+
+
+def build_time_sorted_database(n_approaches, seed=0):
+    """Build a database of approaches one hour apart from 2000-01-01 on, with random attributes."""
+    rng = random.Random(seed)
+    neos = [
+        NearEarthObject(
+            designation=str(i),
+            name="",
+            diameter="" if i % 3 == 0 else str(rng.uniform(0.01, 2.0)),
+            hazardous="Y" if i % 10 == 0 else "N",
+        )
+        for i in range(500)
+    ]
+    template = CloseApproach(
+        _designation="0", time="2000-Jan-01 00:00", distance="0.1", velocity="5.0"
+    )
+    approaches = []
+    for i in range(n_approaches):
+        approach = copy.copy(template)
+        approach._designation = str(rng.randrange(len(neos)))
+        approach.time = template.time + datetime.timedelta(hours=i)
+        approach.distance = rng.uniform(0.0, 0.5)
+        approach.velocity = rng.uniform(1.0, 40.0)
+        approaches.append(approach)
+    return NEODatabase(neos, approaches), approaches
+
+
+def expected_matches(approaches, filters):
+    return [approach for approach in approaches if all(filter(approach) for filter in filters)]
+
+
+class TestZoneMap(unittest.TestCase):
+    def setUp(self):
+        self.columns = ColumnStore(
+            {
+                "time": np.arange(10, dtype=np.int64),
+                "distance": np.array([0.1, 0.2, 0.3, 0.9, 0.8, 0.7, 0.1, 0.1, 0.5, 0.5]),
+                "diameter": np.array([np.nan] * 4 + [1.0, 2.0, 3.0, np.nan, np.nan, 5.0]),
+            }
+        )
+        self.zone_map = ZoneMap(self.columns, 4, names=("time", "distance", "diameter"))
+
+    def test_zone_map_records_block_ranges(self):
+        self.assertEqual(self.zone_map.n_blocks, 3)
+        self.assertEqual(self.zone_map.minimum["time"].tolist(), [0, 4, 8])
+        self.assertEqual(self.zone_map.maximum["time"].tolist(), [3, 7, 9])
+        self.assertEqual(self.zone_map.maximum["distance"].tolist(), [0.9, 0.8, 0.5])
+        self.assertEqual(self.zone_map.minimum["diameter"][1:].tolist(), [1.0, 5.0])
+        self.assertTrue(np.isnan(self.zone_map.minimum["diameter"][0]))
+
+    def test_candidate_blocks(self):
+        self.assertEqual(
+            self.zone_map.candidate_blocks({"time": (5, 6)}).tolist(), [False, True, False]
+        )
+        self.assertEqual(
+            self.zone_map.candidate_blocks({"distance": (0.85, 1.0)}).tolist(),
+            [True, False, False],
+        )
+
+    def test_blocks_without_known_values_never_match(self):
+        self.assertEqual(
+            self.zone_map.candidate_blocks({"diameter": (0.0, 10.0)}).tolist(),
+            [False, True, True],
+        )
+
+
+class TestZoneMapQueries(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.n_approaches = 10 * BLOCK_SIZE
+        cls.db, cls.approaches = build_time_sorted_database(cls.n_approaches)
+
+    def test_date_window_skips_blocks(self):
+        filters = create_filters(
+            start_date=datetime.date(2005, 1, 1), end_date=datetime.date(2005, 1, 31)
+        )
+        stats = QueryStats()
+        received = list(self.db.query(filters, stats=stats))
+        self.assertEqual(received, expected_matches(self.approaches, filters))
+        self.assertGreater(len(received), 0)
+        self.assertLessEqual(stats.blocks_scanned, 2)
+        self.assertEqual(stats.blocks_scanned + stats.blocks_skipped, 10)
+        self.assertEqual(stats.matches, len(received))
+
+    def test_range_outside_every_block_skips_everything(self):
+        filters = create_filters(distance_min=0.6)
+        stats = QueryStats()
+        self.assertEqual(list(self.db.query(filters, stats=stats)), [])
+        self.assertEqual(stats.blocks_scanned, 0)
+        self.assertEqual(stats.blocks_skipped, 10)
+
+    def test_unselective_filters_scan_every_block(self):
+        filters = create_filters(velocity_min=20, diameter_max=1.0)
+        stats = QueryStats()
+        received = list(self.db.query(filters, stats=stats))
+        self.assertEqual(received, expected_matches(self.approaches, filters))
+        self.assertEqual(stats.blocks_scanned, 10)
+
+    def test_limited_query_stops_scanning_blocks(self):
+        stats = QueryStats()
+        received = list(self.db.query(create_filters(velocity_min=20), limit=5, stats=stats))
+        self.assertEqual(len(received), 5)
+        self.assertEqual(stats.blocks_scanned, 1)
+
+    def test_filter_intervals_intersect(self):
+        filters = create_filters(distance_min=0.1, distance_max=0.3) + create_filters(distance_max=0.2)
+        self.assertEqual(filter_intervals(filters)["distance"], (0.1, 0.2))
+
+
+class TestKDTree(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.points = np.column_stack(
+            [np.arange(5000), rng.uniform(0.0, 0.5, 5000), rng.uniform(1.0, 40.0, 5000)]
+        )
+        self.tree = KDTree(self.points, leaf_size=32)
+
+    def brute_force(self, low, high):
+        return np.flatnonzero(np.all((self.points >= low) & (self.points <= high), axis=1))
+
+    def test_box_queries_match_brute_force(self):
+        boxes = [
+            ((1000, 0.0, 20.0), (2000, 0.1, 40.0)),
+            ((-np.inf, 0.2, -np.inf), (np.inf, 0.21, 10.0)),
+            ((0, 0.0, 1.0), (4999, 0.5, 40.0)),
+            ((3000, 0.4, 30.0), (2000, 0.5, 40.0)),
+        ]
+        for low, high in boxes:
+            with self.subTest(low=low, high=high):
+                self.assertEqual(self.tree.query(low, high).tolist(), self.brute_force(low, high).tolist())
+
+    def test_unconstrained_dimensions_ignore_missing_values(self):
+        self.points[::2, 1] = np.nan
+        tree = KDTree(self.points, leaf_size=32)
+        self.assertEqual(
+            tree.query((100, -np.inf, -np.inf), (199, np.inf, np.inf)).tolist(), list(range(100, 200))
+        )
+        self.assertTrue(np.all(tree.query((-np.inf, 0.0, -np.inf), (np.inf, 0.5, np.inf)) % 2 == 1))
+
+    def test_search_gives_up_after_too_many_leaves(self):
+        low, high = (-np.inf, 0.0, 20.0), (np.inf, 0.5, 40.0)
+        self.assertIsNone(self.tree.query(low, high, max_leaves=1))
+        self.assertEqual(
+            self.tree.query(low, high, max_leaves=self.tree.n_leaves).tolist(),
+            self.brute_force(low, high).tolist(),
+        )
+
+    def test_empty_tree(self):
+        tree = KDTree(np.zeros((0, 3)))
+        self.assertEqual(tree.query((0, 0, 0), (1, 1, 1)).tolist(), [])
+        self.assertEqual(tree.nearest((0, 0, 0), 3)[0].tolist(), [])
+
+    def test_nearest_matches_brute_force(self):
+        rng = np.random.default_rng(1)
+        points = rng.normal(size=(3000, 3))
+        points[::7, 2] = np.nan
+        tree = KDTree(points, leaf_size=16)
+        known = np.flatnonzero(~np.isnan(points).any(axis=1))
+        for point in rng.normal(size=(20, 3)):
+            distances = np.sqrt(np.sum((points[known] - point) ** 2, axis=1))
+            expected = known[np.argsort(distances, kind="stable")[:10]]
+            indices, received = tree.nearest(point, 10)
+            self.assertEqual(indices.tolist(), expected.tolist())
+            self.assertTrue(np.allclose(received, np.sort(distances)[:10]))
+        self.assertEqual(len(tree.nearest(points[1], len(points))[0]), len(known))
+
+
+class TestKDTreeQueries(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.db, cls.approaches = build_time_sorted_database(4 * BLOCK_SIZE)
+
+    def test_multi_range_query_uses_kdtree(self):
+        filters = create_filters(
+            start_date=datetime.date(2001, 1, 1),
+            end_date=datetime.date(2004, 12, 31),
+            distance_max=0.01,
+            velocity_min=30,
+        )
+        stats = QueryStats()
+        received = list(self.db.query(filters, stats=stats))
+        self.assertEqual(received, expected_matches(self.approaches, filters))
+        self.assertGreater(len(received), 0)
+        self.assertEqual(stats.blocks_scanned, 0)
+        self.assertGreater(stats.index_candidates, 0)
+        self.assertLess(stats.index_candidates, 2 * len(received))
+
+    def test_residual_filters_are_applied_to_candidates(self):
+        filters = create_filters(distance_max=0.02, velocity_max=5, hazardous=True, diameter_min=0.5)
+        stats = QueryStats()
+        received = list(self.db.query(filters, limit=3, stats=stats))
+        self.assertEqual(received, expected_matches(self.approaches, filters)[:3])
+        self.assertGreater(stats.index_candidates, 0)
+
+    def test_unselective_box_falls_back_to_block_scan(self):
+        filters = create_filters(distance_max=0.4, velocity_min=2)
+        stats = QueryStats()
+        received = list(self.db.query(filters, stats=stats))
+        self.assertEqual(received, expected_matches(self.approaches, filters))
+        self.assertEqual(stats.index_candidates, 0)
+        self.assertEqual(stats.blocks_scanned, 4)
+
+
+class TestBitmap(unittest.TestCase):
+    def setUp(self):
+        self.mask = np.array([True, False, True, True, False, False, False, True, False, True, True])
+        self.bitmap = Bitmap.from_mask(self.mask)
+
+    def test_bitmap_round_trips_mask(self):
+        self.assertEqual(len(self.bitmap), 11)
+        self.assertEqual(self.bitmap.nbytes, 2)
+        self.assertEqual(self.bitmap.to_mask().tolist(), self.mask.tolist())
+        self.assertEqual(self.bitmap.nonzero().tolist(), [0, 2, 3, 7, 9, 10])
+        self.assertEqual(self.bitmap.count(), 6)
+
+    def test_complement_leaves_padding_unset(self):
+        complement = ~self.bitmap
+        self.assertEqual(complement.to_mask().tolist(), (~self.mask).tolist())
+        self.assertEqual(complement.count(), 5)
+
+    def test_intersection_and_membership(self):
+        other = Bitmap.from_mask(np.arange(11) % 2 == 0)
+        self.assertEqual((self.bitmap & other).nonzero().tolist(), [0, 2, 10])
+        self.assertEqual(self.bitmap.contains(np.array([0, 1, 7, 10])).tolist(), [True, False, True, True])
+
+
+class TestBitmapQueries(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.db, cls.approaches = build_time_sorted_database(4 * BLOCK_SIZE)
+
+    def test_hazardous_query_starts_from_bitmap(self):
+        filters = create_filters(hazardous=True)
+        stats = QueryStats()
+        received = list(self.db.query(filters, stats=stats))
+        self.assertEqual(received, expected_matches(self.approaches, filters))
+        self.assertEqual(stats.index_candidates, len(received))
+        self.assertEqual(stats.blocks_scanned, 0)
+
+    def test_bitmaps_combine_with_other_filters(self):
+        filters = create_filters(hazardous=True, diameter_min=1.0, velocity_min=35)
+        stats = QueryStats()
+        received = list(self.db.query(filters, stats=stats))
+        self.assertEqual(received, expected_matches(self.approaches, filters))
+        self.assertEqual(stats.blocks_scanned, 0)
+        self.assertLess(stats.index_candidates, len(self.approaches) // 10)
+
+    def test_unselective_bitmap_falls_back_to_block_scan(self):
+        filters = create_filters(hazardous=False)
+        stats = QueryStats()
+        received = list(self.db.query(filters, limit=10, stats=stats))
+        self.assertEqual(received, expected_matches(self.approaches, filters)[:10])
+        self.assertEqual(stats.index_candidates, 0)
+        self.assertEqual(stats.blocks_scanned, 1)
+
+
+class TestIntervalTree(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.lows = rng.uniform(0.0, 0.5, 5000)
+        self.highs = self.lows + rng.exponential(0.01, 5000)
+        self.lows[::50] = np.nan
+        self.tree = IntervalTree(self.lows, self.highs)
+
+    def test_overlap_queries_match_brute_force(self):
+        for low, high in ((0.1, 0.1), (0.2, 0.21), (-1.0, 0.01), (0.49, 2.0), (0.3, 0.2)):
+            with self.subTest(low=low, high=high):
+                expected = np.flatnonzero((self.lows <= high) & (self.highs >= low))
+                self.assertEqual(self.tree.overlapping(low, high).tolist(), expected.tolist())
+
+    def test_containment_queries_match_brute_force(self):
+        for low, high in ((0.1, 0.12), (0.0, 0.5), (0.3, 0.3), (0.4, 0.35)):
+            with self.subTest(low=low, high=high):
+                expected = np.flatnonzero((self.lows >= low) & (self.highs <= high))
+                self.assertEqual(self.tree.within(low, high).tolist(), expected.tolist())
+
+    def test_stab_finds_intervals_containing_point(self):
+        expected = np.flatnonzero((self.lows <= 0.25) & (self.highs >= 0.25))
+        self.assertEqual(np.sort(self.tree.stab(0.25)).tolist(), expected.tolist())
+
+    def test_empty_tree(self):
+        tree = IntervalTree(np.zeros(0), np.zeros(0))
+        self.assertEqual(len(tree), 0)
+        self.assertEqual(tree.overlapping(0.0, 1.0).tolist(), [])
+        self.assertEqual(tree.within(0.0, 1.0).tolist(), [])
+
+
+class TestDayCounts(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.days = rng.integers(-50, 50, 2000)
+        self.hazardous = rng.random(2000) < 0.2
+        self.counts = DayCounts(self.days, {"hazardous": self.hazardous, "diameter_known": ~self.hazardous})
+
+    def test_counts_match_brute_force(self):
+        for first, last in ((-10, 10), (-np.inf, 0), (20, np.inf), (-np.inf, np.inf), (60, 70), (5, -5)):
+            with self.subTest(first=first, last=last):
+                selected = (self.days >= first) & (self.days <= last)
+                self.assertEqual(self.counts.count(first, last), selected.sum())
+                self.assertEqual(self.counts.count(first, last, "hazardous"), (selected & self.hazardous).sum())
+
+    def test_counts_between_edges(self):
+        edges = np.array([-100, -20, 0, 1, 49, 100])
+        self.assertEqual(
+            self.counts.counts(edges).tolist(),
+            [np.sum((self.days >= low) & (self.days < high)) for low, high in zip(edges, edges[1:])],
+        )
+        self.assertEqual((self.counts.first_day, self.counts.last_day), (-50, 49))
+
+
+class TestNameIndex(unittest.TestCase):
+    def setUp(self):
+        self.names = ["Apophis", None, "Apollo", "", "Adonis", "Bennu", "apophis"]
+        self.index = NameIndex(self.names)
+
+    def test_exact_and_case_insensitive_lookups(self):
+        self.assertEqual(self.index.get("Apophis"), 0)
+        self.assertEqual(self.index.get("apophis"), 6)
+        self.assertEqual(self.index.get("BENNU"), 5)
+        self.assertIsNone(self.index.get(""))
+        self.assertIsNone(self.index.get("Apofis"))
+
+    def test_search_matches_brute_force(self):
+        for query in ("Apofis", "adonnis", "Ben", "polo"):
+            with self.subTest(query=query):
+                trigrams = name_trigrams(query)
+                scores = [
+                    (len(trigrams & name_trigrams(name)) / len(trigrams | name_trigrams(name)), -index)
+                    for index, name in enumerate(self.names)
+                    if name and trigrams & name_trigrams(name)
+                ]
+                expected = [(-index, score) for score, index in sorted(scores, reverse=True)]
+                self.assertEqual(self.index.search(query, k=10, min_similarity=0), expected)
+        self.assertEqual(self.index.search("Apofis", k=1), [(0, 4 / 11)])
+        self.assertEqual(self.index.search(""), [])
+
+
+class TestPrefixIndex(unittest.TestCase):
+    def test_complete_matches_brute_force(self):
+        rng = random.Random(0)
+        strings = ["".join(rng.choice("aAbB 1") for _ in range(rng.randint(1, 6))) for _ in range(500)]
+        index = PrefixIndex(strings + [None, ""])
+        self.assertEqual(len(index), len(strings))
+        for prefix in ("", "a", "A", "ab", "b 1", "1A", "Bb b", "zz"):
+            with self.subTest(prefix=prefix):
+                expected = sorted(
+                    (string for string in strings if string.casefold().startswith(prefix.casefold())),
+                    key=lambda string: (string.casefold(), string),
+                )
+                self.assertEqual(index.complete(prefix), expected)
+                self.assertEqual(index.complete(prefix, limit=3), expected[:3])
+
+
+class TestIntervalTreeQueries(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        db, cls.approaches = build_time_sorted_database(4 * BLOCK_SIZE)
+        rng = np.random.default_rng(0)
+        distances = np.array([approach.distance for approach in cls.approaches])
+        cls.extras = {
+            "dist_min": distances - rng.exponential(0.002, len(distances)),
+            "dist_max": distances + rng.exponential(0.002, len(distances)),
+        }
+        cls.db = NEODatabase(db._neos, cls.approaches, extras=cls.extras)
+
+    def band_matches(self, filters, overlaps=None, within=None):
+        lows, highs = self.extras["dist_min"], self.extras["dist_max"]
+        return [
+            approach for index, approach in enumerate(self.approaches)
+            if all(filter(approach) for filter in filters)
+            and (overlaps is None or lows[index] <= overlaps[1] and highs[index] >= overlaps[0])
+            and (within is None or lows[index] >= within[0] and highs[index] <= within[1])
+        ]
+
+    def test_overlap_query_uses_interval_tree(self):
+        filters = create_filters(distance_overlaps=(0.1, 0.101))
+        stats = QueryStats()
+        received = list(self.db.query(filters, stats=stats))
+        self.assertEqual(received, self.band_matches([], overlaps=(0.1, 0.101)))
+        self.assertGreater(len(received), 0)
+        self.assertEqual(stats.index_candidates, len(received))
+        self.assertEqual(stats.blocks_scanned, 0)
+
+    def test_band_filters_combine_with_other_filters(self):
+        others = create_filters(start_date=datetime.date(2001, 1, 1), velocity_max=20)
+        for overlaps, within in (((0.2, 0.25), None), (None, (0.3, 0.35))):
+            with self.subTest(overlaps=overlaps, within=within):
+                filters = others + create_filters(distance_overlaps=overlaps, distance_within=within)
+                stats = QueryStats()
+                received = list(self.db.query(filters, stats=stats))
+                self.assertEqual(received, self.band_matches(others, overlaps, within))
+                self.assertGreater(len(received), 0)
+                self.assertEqual(stats.blocks_scanned, 0)
+                self.assertEqual(self.db.count(filters), len(received))
+
+    def test_unselective_band_falls_back_to_block_scan(self):
+        filters = create_filters(distance_within=(-1.0, 1.0))
+        stats = QueryStats()
+        received = list(self.db.query(filters, limit=10, stats=stats))
+        self.assertEqual(received, self.band_matches([], within=(-1.0, 1.0))[:10])
+        self.assertEqual(stats.index_candidates, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -8,11 +8,60 @@ It isn't guaranteed that `limit` is a generator function - it's possible to
 implement it imperatively with the tools from the `itertools` module.
 
 These tests should pass when Task 3c is complete.
+
+The `TestQueryLimit` tests check that a limit passed to `NEODatabase.query` is
+pushed down into the query itself, so that a small limit on a large synthetic
+data set only touches a small prefix of the close approaches, or of the
+candidates found by an index.
 """
 import collections.abc
+import copy
 import unittest
 
-from filters import limit
+from columns import BLOCK_SIZE
+from database import NEODatabase, QueryStats
+from filters import limit, create_filters
+from models import NearEarthObject, CloseApproach
+
+
+def build_synthetic_database(n_neos, n_approaches, fast_every=None, hazardous_every=None):
+    """Build an `NEODatabase` of `n_approaches` identical approaches spread over `n_neos` NEOs.
+
+    With `fast_every`, the last approach of every `fast_every` approaches is
+    faster, at 25 km/s instead of 5 km/s. With `hazardous_every`, the first NEO
+    of every `hazardous_every` NEOs is potentially hazardous.
+    """
+    neos = [
+        NearEarthObject(
+            designation=str(i),
+            name="",
+            diameter="1.0",
+            hazardous="Y" if hazardous_every and i % hazardous_every == 0 else "N",
+        )
+        for i in range(n_neos)
+    ]
+    template = CloseApproach(
+        _designation="0", time="2020-Jan-01 00:00", distance="0.1", velocity="5.0"
+    )
+    approaches = []
+    for i in range(n_approaches):
+        approach = copy.copy(template)
+        approach._designation = str(i % n_neos)
+        if fast_every and i % fast_every == fast_every - 1:
+            approach.velocity = 25.0
+        approaches.append(approach)
+    return NEODatabase(neos, approaches)
+
+
+class CountingFilter:
+    """A filter that accepts every approach and counts how often it is called."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, approach):
+        self.calls += 1
+        return True
 
 
 class TestLimit(unittest.TestCase):
@@ -50,5 +99,56 @@ class TestLimit(unittest.TestCase):
         self.assertIsInstance(limit(self.iterable, None), collections.abc.Iterable)
 
 
+class TestQueryLimit(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.n_approaches = 200_000
+        cls.fast_every = 1_000
+        cls.db = build_synthetic_database(
+            1_000, cls.n_approaches, cls.fast_every, hazardous_every=4
+        )
+
+    def test_query_with_limit_produces_at_most_limit_results(self):
+        self.assertEqual(len(tuple(self.db.query(create_filters(), limit=5))), 5)
+        self.assertEqual(len(tuple(self.db.query(create_filters(), limit=1))), 1)
+
+    def test_query_without_limit_produces_all_results(self):
+        self.assertEqual(len(tuple(self.db.query())), self.n_approaches)
+        self.assertEqual(len(tuple(self.db.query(limit=0))), self.n_approaches)
+        self.assertEqual(len(tuple(self.db.query(limit=None))), self.n_approaches)
+
+    def test_query_with_limit_preserves_internal_order(self):
+        expected = tuple(self.db.query())[:5]
+        self.assertEqual(tuple(self.db.query(limit=5)), expected)
+
+    def test_query_with_limit_touches_only_a_prefix(self):
+        counter = CountingFilter()
+        results = tuple(self.db.query([counter], limit=5))
+        self.assertEqual(len(results), 5)
+        self.assertEqual(counter.calls, 5)
+
+    def test_query_with_limit_and_selective_filter_stops_after_last_match(self):
+        # The counter comes first, so it counts every approach the scan visits.
+        counter = CountingFilter()
+        filters = [counter] + create_filters(velocity_min=20.0)
+        results = tuple(self.db.query(filters, limit=5))
+        self.assertEqual([approach.velocity for approach in results], [25.0] * 5)
+        fifth_match = 5 * self.fast_every - 1
+        self.assertEqual(counter.calls, fifth_match + 1)
+
+    def test_query_with_limit_evaluates_only_the_first_index_candidates(self):
+        # The bitmap of hazardous NEOs finds all the candidates at once, but
+        # only the first block of them is evaluated.
+        filters = create_filters(hazardous=True)
+        stats = QueryStats()
+        results = tuple(self.db.query(filters, limit=5, stats=stats))
+        self.assertEqual(results, tuple(self.db.query(filters))[:5])
+        self.assertEqual(stats.blocks_scanned, 0)
+        self.assertEqual(stats.index_candidates, BLOCK_SIZE)
+        stats = QueryStats()
+        self.assertEqual(sum(1 for _ in self.db.query(filters, stats=stats)), self.n_approaches // 4)
+        self.assertEqual(stats.index_candidates, self.n_approaches // 4)
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -16,7 +16,7 @@ import datetime
 import pathlib
 import unittest
 
-from database import NEODatabase
+from database import NEODatabase, ApproachStream
 from extract import load_neos, load_approaches
 from filters import create_filters
 
@@ -101,6 +101,22 @@ class TestQuery(unittest.TestCase):
         received = set(self.db.query(filters))
         self.assertEqual(expected, received, msg="Computed results do not match expected results.")
 
+    def test_date_filters_compare_whole_days(self):
+        date = datetime.date(2020, 3, 2)
+        for filter, expected in zip(
+            create_filters(date=date, start_date=date, end_date=date),
+            (
+                lambda approach: approach.time.date() == date,
+                lambda approach: approach.time.date() >= date,
+                lambda approach: approach.time.date() <= date,
+            ),
+        ):
+            with self.subTest(filter=filter):
+                self.assertEqual(
+                    [filter(approach) for approach in self.approaches],
+                    [expected(approach) for approach in self.approaches],
+                )
+
     def test_query_with_conflicting_date_bounds(self):
         start_date = datetime.date(2020, 10, 1)
         end_date = datetime.date(2020, 4, 1)
@@ -529,5 +545,107 @@ class TestQuery(unittest.TestCase):
         self.assertEqual(expected, received, msg="Computed results do not match expected results.")
 
 
+class TestParallelQuery(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.neos = load_neos(TEST_NEO_FILE)
+        cls.approaches = load_approaches(TEST_CAD_FILE)
+        cls.db = NEODatabase(cls.neos, cls.approaches)
+        cls.filter_sets = [
+            create_filters(),
+            create_filters(date=datetime.date(2020, 3, 2)),
+            create_filters(distance_max=0.4, velocity_min=10),
+            create_filters(diameter_min=0.5, hazardous=True),
+            create_filters(distance_min=0.5, distance_max=0.4),
+        ]
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.db.close()
+
+    def test_parallel_query_matches_sequential_query_in_order(self):
+        for filters in self.filter_sets:
+            expected = list(self.db.query(filters))
+            received = list(self.db.query(filters, workers=3))
+            self.assertEqual(expected, received, msg=f"Parallel results differ for {filters}.")
+
+    def test_parallel_query_with_limit(self):
+        filters = create_filters(distance_max=0.4, velocity_min=10)
+        expected = list(self.db.query(filters))[:7]
+        received = list(self.db.query(filters, limit=7, workers=3))
+        self.assertEqual(expected, received)
+
+    def test_parallel_query_with_row_only_filter(self):
+        filters = create_filters(velocity_min=10) + [lambda approach: approach.distance < 0.2]
+        expected = list(self.db.query(filters))
+        received = list(self.db.query(filters, workers=2))
+        self.assertEqual(expected, received)
+
+
+class TestApproachStream(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.db = NEODatabase(load_neos(TEST_NEO_FILE), load_approaches(TEST_CAD_FILE))
+        cls.stream = ApproachStream(load_neos(TEST_NEO_FILE), TEST_CAD_FILE, chunk_size=250)
+
+    @staticmethod
+    def describe(approaches):
+        return [
+            (approach.time, approach.distance, approach.velocity, approach.neo.designation)
+            for approach in approaches
+        ]
+
+    def test_stream_matches_in_memory_query(self):
+        filter_sets = [
+            create_filters(),
+            create_filters(date=datetime.date(2020, 3, 2)),
+            create_filters(distance_max=0.4, velocity_min=10),
+            create_filters(diameter_min=0.5, hazardous=True),
+        ]
+        for filters in filter_sets:
+            expected = self.describe(self.db.query(filters))
+            received = self.describe(self.stream.query(filters))
+            self.assertEqual(expected, received, msg=f"Streamed results differ for {filters}.")
+
+    def test_stream_with_limit(self):
+        filters = create_filters(velocity_min=10)
+        expected = self.describe(self.db.query(filters, limit=5))
+        received = self.describe(self.stream.query(filters, limit=5))
+        self.assertEqual(expected, received)
+
+
+class TestCountAndExists(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.approaches = load_approaches(TEST_CAD_FILE)
+        cls.db = NEODatabase(load_neos(TEST_NEO_FILE), cls.approaches)
+        cls.stream = ApproachStream(load_neos(TEST_NEO_FILE), TEST_CAD_FILE, chunk_size=250)
+        cls.filter_sets = [
+            create_filters(),
+            create_filters(date=datetime.date(2020, 3, 2)),
+            create_filters(distance_max=0.4, velocity_min=10),
+            create_filters(hazardous=True),
+            create_filters(hazardous=False),
+            create_filters(diameter_min=0.5, hazardous=True),
+            create_filters(distance_min=0.5, distance_max=0.4),
+            create_filters(velocity_min=10) + [lambda approach: approach.distance < 0.2],
+        ]
+
+    def expected_count(self, filters):
+        return sum(1 for approach in self.approaches if all(filter(approach) for filter in filters))
+
+    def test_count_matches_query(self):
+        for filters in self.filter_sets:
+            expected = self.expected_count(filters)
+            self.assertEqual(self.db.count(filters), expected, msg=f"Count differs for {filters}.")
+            self.assertEqual(self.stream.count(filters), expected, msg=f"Count differs for {filters}.")
+
+    def test_exists(self):
+        for filters in self.filter_sets:
+            expected = self.expected_count(filters) > 0
+            self.assertEqual(self.db.exists(filters), expected, msg=f"Exists differs for {filters}.")
+            self.assertEqual(self.stream.exists(filters), expected, msg=f"Exists differs for {filters}.")
+
+
 if __name__ == '__main__':
     unittest.main()
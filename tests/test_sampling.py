@@ -0,0 +1,92 @@
+"""Check that `NEODatabase.estimate` estimates the matches of queries from a sample.
+
+A sample holding every close approach must give exact estimates. Smaller
+samples must cover every stratum, and their confidence intervals must contain
+the true number of matches, which is computed with `NEODatabase.count`.
+
+To run these tests from the project root, run:
+
+    $ python3 -m unittest --verbose tests.test_sampling
+"""
+import pathlib
+import tempfile
+import unittest
+
+import numpy as np
+
+from columns import ColumnStore
+from database import NEODatabase
+from extract import load_neos, load_approaches
+from filters import UnsupportedCriterionError, create_filters
+from sampling import CHUNK_SIZE, N_STRATA, QUANTILES, ApproachSample
+
+
+TESTS_ROOT = (pathlib.Path(__file__).parent).resolve()
+TEST_NEO_FILE = TESTS_ROOT / "test-neos-2020.csv"
+TEST_CAD_FILE = TESTS_ROOT / "test-cad-2020.json"
+
+
+class TestEstimate(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.approaches = load_approaches(TEST_CAD_FILE)
+        cls.db = NEODatabase(load_neos(TEST_NEO_FILE), cls.approaches)
+        cls.filters = [
+            create_filters(distance_max=0.05),
+            create_filters(hazardous=True, velocity_min=10),
+            create_filters(velocity_min=30),
+        ]
+
+    def test_full_sample_is_exact(self):
+        for filters in self.filters:
+            with self.subTest(filters=filters):
+                estimate = self.db.estimate(filters)
+                count = self.db.count(filters)
+                self.assertEqual(estimate.sampled, len(self.approaches))
+                self.assertEqual((estimate.count, estimate.low, estimate.high), (count, count, count))
+                distances = sorted(approach.distance for approach in self.db.query(filters))
+                self.assertEqual(
+                    list(estimate.quantiles["distance"].values()),
+                    [distances[int(np.ceil(quantile * count)) - 1] for quantile in QUANTILES],
+                )
+
+    def test_small_samples_cover_the_true_count(self):
+        sample = ApproachSample.draw(self.db._columns, size=1000, seed=1)
+        self.assertEqual(set(sample.strata.tolist()), set(range(N_STRATA)))
+        for filters in self.filters:
+            with self.subTest(filters=filters):
+                estimate = sample.estimate(filters)
+                self.assertEqual(estimate.sampled, len(sample))
+                self.assertLessEqual(estimate.low, self.db.count(filters))
+                self.assertGreaterEqual(estimate.high, self.db.count(filters))
+                self.assertLess(estimate.high - estimate.low, len(self.approaches) / 5)
+
+    def test_time_budget_stops_after_a_chunk(self):
+        rng = np.random.default_rng(0)
+        columns = ColumnStore(
+            {"distance": rng.uniform(0.0, 0.5, 4 * CHUNK_SIZE), "velocity": rng.uniform(1.0, 40.0, 4 * CHUNK_SIZE)}
+        )
+        sample = ApproachSample.draw(columns, size=3 * CHUNK_SIZE)
+        self.assertEqual(sample.estimate(self.filters[0], budget=0).sampled, CHUNK_SIZE)
+        self.assertEqual(sample.estimate(self.filters[0]).sampled, 3 * CHUNK_SIZE)
+
+    def test_no_match(self):
+        estimate = self.db.estimate(create_filters(distance_min=0.5, distance_max=0.4))
+        self.assertEqual((estimate.count, estimate.matched, estimate.quantiles), (0.0, 0, {}))
+
+    def test_partitions_are_strata(self):
+        with tempfile.TemporaryDirectory() as directory:
+            self.db.save_columns(directory, partition_by="year")
+            mapped = NEODatabase.from_columns(directory)
+            filters = self.filters[0]
+            self.assertEqual(mapped.estimate(filters).count, self.db.count(filters))
+            sample = ApproachSample.draw(mapped._columns, size=100)
+            self.assertEqual(len(sample.stratum_sizes), len(mapped._columns.partitions))
+
+    def test_row_filters_are_not_estimated(self):
+        with self.assertRaises(UnsupportedCriterionError):
+            self.db.estimate([lambda approach: approach.distance < 0.1])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,181 @@
+"""Check that an `SQLiteDatabase` answers queries like the in-memory `NEODatabase`.
+
+The whole of `tests.test_query` is run again against an SQLite database imported
+from the same test files. Since an `SQLiteDatabase` creates its own
+`CloseApproach` objects, its results are mapped back to the approaches loaded by
+`load_approaches` (by designation and time) before they are compared.
+
+To run these tests from the project root, run:
+
+    $ python3 -m unittest --verbose tests.test_sqlite_database
+"""
+import datetime
+import pathlib
+import subprocess
+import sys
+import tempfile
+import unittest
+
+from database import NEODatabase
+from extract import load_neos, load_approaches
+from filters import create_filters
+from sqlite_database import SQLiteDatabase, translate_filters
+from tests import test_query
+
+
+TESTS_ROOT = (pathlib.Path(__file__).parent).resolve()
+PROJECT_ROOT = TESTS_ROOT.parent
+TEST_NEO_FILE = TESTS_ROOT / "test-neos-2020.csv"
+TEST_CAD_FILE = TESTS_ROOT / "test-cad-2020.json"
+
+
+def expected_matches(approaches, filters):
+    return [approach for approach in approaches if all(filter(approach) for filter in filters)]
+
+
+class ResultsByKey:
+    """Adapt a database so that its query results are the given approach objects."""
+
+    def __init__(self, database, approaches):
+        self.database = database
+        self.approaches = {(approach._designation, approach.time): approach for approach in approaches}
+
+    def query(self, filters=(), limit=None):
+        for approach in self.database.query(filters, limit=limit):
+            yield self.approaches[(approach._designation, approach.time)]
+
+
+class TestSQLiteQuery(test_query.TestQuery):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.tempdir = tempfile.TemporaryDirectory()
+        cls.sqlite = SQLiteDatabase.import_files(
+            pathlib.Path(cls.tempdir.name) / "neos.sqlite", TEST_NEO_FILE, TEST_CAD_FILE
+        )
+        cls.db = ResultsByKey(cls.sqlite, cls.approaches)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.sqlite.close()
+        cls.tempdir.cleanup()
+
+    def test_query_preserves_internal_order(self):
+        filters = create_filters(distance_max=0.1)
+        expected = [approach for approach in self.approaches if approach.distance <= 0.1]
+        self.assertEqual(list(self.db.query(filters)), expected)
+        self.assertEqual(list(self.db.query(filters, limit=3)), expected[:3])
+
+    def test_residual_filters_are_applied(self):
+        residual = lambda approach: approach.velocity > 20
+        filters = create_filters(distance_max=0.1) + [residual]
+        condition, parameters, remaining = translate_filters(filters)
+        self.assertEqual(condition, "a.distance <= ?")
+        self.assertEqual(parameters, [0.1])
+        self.assertEqual(remaining, [residual])
+        expected = [
+            approach for approach in self.approaches
+            if approach.distance <= 0.1 and approach.velocity > 20
+        ]
+        self.assertEqual(list(self.db.query(filters, limit=4)), expected[:4])
+
+    def test_count_and_exists(self):
+        for filters in (
+            create_filters(),
+            create_filters(distance_max=0.1, hazardous=False),
+            create_filters(distance_min=0.5, distance_max=0.4),
+            create_filters(distance_max=0.1) + [lambda approach: approach.velocity > 20],
+        ):
+            expected = len(expected_matches(self.approaches, filters))
+            self.assertEqual(self.sqlite.count(filters), expected)
+            self.assertEqual(self.sqlite.exists(filters), expected > 0)
+
+    def test_get_neo_by_designation_and_name(self):
+        adonis = self.sqlite.get_neo_by_designation("2101")
+        self.assertEqual(adonis.name, "Adonis")
+        self.assertEqual(adonis.diameter, 0.60)
+        self.assertTrue(adonis.hazardous)
+        self.assertIs(self.sqlite.get_neo_by_name("Adonis"), adonis)
+        self.assertIsNone(self.sqlite.get_neo_by_name(""))
+        self.assertIs(self.sqlite.get_neo_by_name("adonis"), adonis)
+        self.assertEqual(self.sqlite.search_neos_by_name("Adoniss", k=1)[0][0], adonis)
+        self.assertEqual(self.sqlite.complete("name", "adon"), ["Adonis"])
+        self.assertEqual(self.sqlite.complete("designation", "2020 ab", limit=2), ["2020 AB2", "2020 AB3"])
+        self.assertIsNone(self.sqlite.get_neo_by_designation("not-real-designation"))
+
+    def test_summary_and_next_approach(self):
+        neo = self.sqlite.get_neo_by_designation("2020 AY1")
+        expected = sorted(
+            (approach for approach in self.approaches if approach._designation == "2020 AY1"),
+            key=lambda approach: approach.time,
+        )
+        summary = self.sqlite.get_summary(neo)
+        self.assertEqual(summary.count, len(expected))
+        self.assertEqual(summary.first_time, expected[0].time)
+        self.assertEqual(summary.min_distance, min(approach.distance for approach in expected))
+        self.assertEqual([approach.time for approach in neo.approaches], [a.time for a in expected])
+        self.assertEqual(self.sqlite.next_approach(neo, expected[0].time).time, expected[1].time)
+        self.assertIsNone(self.sqlite.next_approach(neo, expected[-1].time))
+
+    def test_next_approaches(self):
+        after = datetime.datetime(2020, 6, 1)
+        db = NEODatabase(load_neos(TEST_NEO_FILE), load_approaches(TEST_CAD_FILE))
+        for filters in (create_filters(), create_filters(hazardous=True, diameter_max=1.0)):
+            self.assertEqual(
+                [(a.time, a.neo.designation) for a in self.sqlite.next_approaches(after, filters)],
+                [(a.time, a.neo.designation) for a in db.next_approaches(after, filters)],
+            )
+        self.assertEqual(len(self.sqlite.next_approaches(after, limit=3)), 3)
+
+    def test_next_approaches_breaks_ties_in_internal_order(self):
+        after = datetime.datetime(2020, 6, 1)
+        with tempfile.TemporaryDirectory() as directory:
+            sqlite = SQLiteDatabase.import_files(
+                pathlib.Path(directory) / "ties.sqlite", TEST_NEO_FILE, TEST_CAD_FILE
+            )
+            first = sqlite.next_approaches(after, limit=2)
+            # A second approach of the same NEOs in the same minute, farther away.
+            for approach in first:
+                sqlite.connection.execute(
+                    "INSERT INTO approaches (designation, time, distance, velocity) "
+                    "SELECT designation, time, distance + 1, velocity FROM approaches "
+                    "WHERE designation = ? AND distance = ?",
+                    (approach.neo.designation, approach.distance),
+                )
+            approaches = sqlite.next_approaches(after)
+            designations = [approach.neo.designation for approach in approaches]
+            self.assertEqual(len(designations), len(set(designations)))
+            self.assertEqual(
+                [(a.neo.designation, a.distance) for a in sqlite.next_approaches(after, limit=2)],
+                [(a.neo.designation, a.distance) for a in first],
+            )
+            sqlite.close()
+
+    def test_neo_approaches_are_linked(self):
+        neo = self.sqlite.get_neo_by_designation("2020 AY1")
+        self.assertGreater(len(neo.approaches), 0)
+        for approach in neo.approaches:
+            self.assertIs(approach.neo, neo)
+
+
+class TestSQLiteCommandLine(unittest.TestCase):
+    def test_unsupported_subcommand_is_a_usage_error(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = pathlib.Path(directory) / "neos.sqlite"
+            result = subprocess.run(
+                [
+                    sys.executable, str(PROJECT_ROOT / "main.py"),
+                    "--neofile", str(TEST_NEO_FILE), "--cadfile", str(TEST_CAD_FILE),
+                    "--sqlite", str(path), "convert", "--outdir", str(pathlib.Path(directory) / "columns"),
+                ],
+                capture_output=True,
+                text=True,
+            )
+            self.assertEqual(result.returncode, 2)
+            self.assertIn("convert runs on the in-memory database", result.stderr)
+            self.assertNotIn("Traceback", result.stderr)
+            self.assertFalse(path.exists())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -25,9 +25,10 @@ import unittest
 import unittest.mock
 
 
-from extract import load_neos, load_approaches
+from extract import load_neos, load_approaches, load_approach_columns
 from database import NEODatabase
-from write import write_to_csv, write_to_json
+from filters import create_filters
+from write import write_to_csv, write_to_json, write_histogram_to_json
 
 
 TESTS_ROOT = (pathlib.Path(__file__).parent).resolve()
@@ -255,5 +256,58 @@ class TestWriteToJSON(unittest.TestCase):
         self.assertIsInstance(approach["neo"]["potentially_hazardous"], bool)
 
 
+class TestWriteExtraColumns(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.db = NEODatabase(
+            load_neos(TEST_NEO_FILE),
+            load_approaches(TEST_CAD_FILE),
+            extras=load_approach_columns(["dist_min", "h"], TEST_CAD_FILE),
+        )
+        cls.filters = create_filters(distance_max=0.01)
+
+    @unittest.mock.patch("write.open")
+    def test_csv_rows_end_with_extra_columns(self, mock_file):
+        results = self.db.query_columns(self.filters, ["dist_min", "h"], limit=3)
+        with UncloseableStringIO() as buf:
+            mock_file.return_value = buf
+            write_to_csv(results, None, ["dist_min", "h"])
+            buf.seek(0)
+            rows = list(csv.DictReader(buf))
+        self.assertEqual(len(rows), 3)
+        for row in rows:
+            self.assertLessEqual(float(row["dist_min"]), float(row["distance_au"]))
+            self.assertTrue(row["h"])
+
+    @unittest.mock.patch("write.open")
+    def test_json_elements_have_extra_columns(self, mock_file):
+        results = self.db.query_columns(self.filters, ["dist_min"], limit=3)
+        with UncloseableStringIO() as buf:
+            mock_file.return_value = buf
+            write_to_json(results, None, ["dist_min"])
+            buf.seek(0)
+            data = json.load(buf)
+        self.assertEqual(len(data), 3)
+        for approach in data:
+            self.assertIsInstance(approach["dist_min"], float)
+            self.assertLessEqual(approach["dist_min"], approach["distance_au"])
+
+
+class TestWriteHistogram(unittest.TestCase):
+    @unittest.mock.patch("write.open")
+    def test_json_has_edges_and_counts(self, mock_file):
+        db = NEODatabase(load_neos(TEST_NEO_FILE), load_approaches(TEST_CAD_FILE))
+        distance_edges, velocity_edges, counts = db.histogram2d(distance_bins=3, velocity_bins=2)
+        with UncloseableStringIO() as buf:
+            mock_file.return_value = buf
+            write_histogram_to_json(distance_edges, velocity_edges, counts, None)
+            buf.seek(0)
+            data = json.load(buf)
+        self.assertEqual(data["distance_edges"], distance_edges.tolist())
+        self.assertEqual(data["velocity_edges"], velocity_edges.tolist())
+        self.assertEqual(data["counts"], counts.tolist())
+        self.assertEqual(sum(map(sum, data["counts"])), 4700)
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -2,7 +2,15 @@
 
 This module exports two functions: `write_to_csv` and `write_to_json`, each of
 which accept an `results` stream of close approaches and a path to which to
-write the data.
+write the data. Their counterparts `write_rows_to_csv` and `write_rows_to_json`
+write a stream of dictionaries, such as the groups produced by an aggregation,
+and `write_histogram_to_json` writes the edges and counts of a 2-D histogram.
+
+Extra columns of close approaches, such as the uncertainty bounds `dist_min`
+and `dist_max`, aren't attributes of `CloseApproach` objects. They can be
+written after the standard fields by passing their names as `extra_columns`,
+along with a stream of `(approach, values)` tuples as generated by
+`NEODatabase.query_columns`.
 
 These functions are invoked by the main module with the output of the `limit`
 function and the filename supplied by the user at the command line. The file's
@@ -15,12 +23,14 @@ import json
 from helpers import transform_to_str, datetime_to_str
 
 
-def transform_result_for_csv_writing(results):
+def transform_result_for_csv_writing(results, extra_columns=()):
     """
-    Transform approach objects to list of lists (only including necessary fields for csv).
+    Transform approach objects to lists (only including necessary fields for csv).
 
-    :param results: An iterrator of queried approaches
-    :return: A list of approach data for csv writing
+    :param results: An iterrator of queried approaches, or of `(approach, values)`
+        tuples if there are extra columns
+    :param extra_columns: The names of the extra columns to append to each row
+    :yield: The approach data for csv writing, one row at a time
     """
     fieldkeys = [
         "time",
@@ -31,23 +41,25 @@ def transform_result_for_csv_writing(results):
         "diameter",
         "hazardous",
     ]
-    outlist = list()
-    for approach in list(results):
+    for result in results:
+        approach, values = result if extra_columns else (result, {})
         unpacked_dict = unpack_approach(approach)
-        outlist.append([transform_to_str(unpacked_dict[fkey]) for fkey in fieldkeys])
-
-    return outlist
+        yield [transform_to_str(unpacked_dict[fkey]) for fkey in fieldkeys] + [
+            "" if values[name] is None else values[name] for name in extra_columns
+        ]
 
 
-def write_to_csv(results, filename):
+def write_to_csv(results, filename, extra_columns=()):
     """Write an iterable of `CloseApproach` objects to a CSV file.
 
     The precise output specification is in `README.md`. Roughly, each output row
     corresponds to the information in a single close approach from the `results`
     stream and its associated near-Earth object.
 
-    :param results: An iterable of `CloseApproach` objects.
+    :param results: An iterable of `CloseApproach` objects, or of `(approach, values)`
+        tuples if `extra_columns` are given.
     :param filename: A Path-like object pointing to where the data should be saved.
+    :param extra_columns: The names of extra columns to write after the standard fields.
     """
     fieldnames = (
         "datetime_utc",
@@ -57,14 +69,14 @@ def write_to_csv(results, filename):
         "name",
         "diameter_km",
         "potentially_hazardous",
-    )
+    ) + tuple(extra_columns)
 
-    outlist = transform_result_for_csv_writing(results)
+    rows = transform_result_for_csv_writing(results, extra_columns)
 
     with open(filename, "w") as f:
         write = csv.writer(f)
         write.writerow(fieldnames)
-        write.writerows(outlist)
+        write.writerows(rows)
 
     return
 
@@ -75,7 +87,7 @@ def unpack_approach(approach):
     :param approach:Approach object.
     :return: Dictionary with approach keys and values.
     """
-    return {**approach.__dict__, **approach.__dict__["neo"].__dict__}
+    return {**approach.__dict__, "time": approach.time, **approach.__dict__["neo"].__dict__}
 
 
 def get_dict_for_json_mapping():
@@ -102,16 +114,20 @@ def approach_vars():
     return ["datetime_utc", "distance_au", "velocity_km_s"]
 
 
-def transform_approaches_to_list_of_dicts(approaches, keymap_dict, approach_vars):
-    """Transform approaches collection to list of dictionaries to be dumped into json.
+def transform_approaches_to_list_of_dicts(
+    approaches, keymap_dict, approach_vars, extra_columns=()
+):
+    """Transform approaches collection to dictionaries to be dumped into json.
 
-    :param approaches: Collection of approach objects
+    :param approaches: Collection of approach objects, or of `(approach, values)`
+        tuples if there are extra columns
     :param keymap_dict: Function that returns how to lookup required fields
     :param approach_vars: List of elements indicating which fields belong to approach object
-    :return: List of results that should be written to json file
+    :param extra_columns: The names of the extra columns to add to each approach
+    :yield: The results that should be written to json file, one at a time
     """
-    resultlist = list()
-    for approach in approaches:
+    for result in approaches:
+        approach, values = result if extra_columns else (result, {})
         unpacked_approach = unpack_approach(approach)
         approachdict = {"neo": {}}
         for key, lookup_val in keymap_dict.items():
@@ -129,11 +145,12 @@ def transform_approaches_to_list_of_dicts(approaches, keymap_dict, approach_vars
                 approachdict[key] = value
             else:
                 approachdict["neo"][key] = value
-        resultlist.append(approachdict)
-    return resultlist
+        for name in extra_columns:
+            approachdict[name] = values[name]
+        yield approachdict
 
 
-def write_to_json(results, filename):
+def write_to_json(results, filename, extra_columns=()):
     """Write an iterable of `CloseApproach` objects to a JSON file.
 
     The precise output specification is in `README.md`. Roughly, the output is a
@@ -141,12 +158,68 @@ def write_to_json(results, filename):
     their values and the 'neo' key mapping to a dictionary of the associated
     NEO's attributes.
 
-    :param results: An iterable of `CloseApproach` objects.
+    The list is written one element at a time, so that a stream of results is
+    never held in memory as a whole.
+
+    :param results: An iterable of `CloseApproach` objects, or of `(approach, values)`
+        tuples if `extra_columns` are given.
     :param filename: A Path-like object pointing to where the data should be saved.
+    :param extra_columns: The names of extra columns to add to each approach.
     """
-    resultlist = transform_approaches_to_list_of_dicts(
-        results, get_dict_for_json_mapping(), approach_vars()
+    resultdicts = transform_approaches_to_list_of_dicts(
+        results, get_dict_for_json_mapping(), approach_vars(), extra_columns
     )
-    with open(filename, "w") as file:
-        json.dump(resultlist, file)
+    write_rows_to_json(resultdicts, filename)
     return
+
+
+def write_rows_to_csv(rows, fieldnames, filename):
+    """Write an iterable of dictionaries to a CSV file, one row per dictionary.
+
+    Missing values (None) are written as empty fields.
+
+    :param rows: An iterable of dictionaries mapping the field names to values.
+    :param fieldnames: The names of the fields, in the order of the columns.
+    :param filename: A Path-like object pointing to where the data should be saved.
+    """
+    with open(filename, "w") as f:
+        write = csv.DictWriter(f, fieldnames)
+        write.writeheader()
+        write.writerows(rows)
+
+
+def write_rows_to_json(rows, filename):
+    """Write an iterable of dictionaries to a JSON file, as a list.
+
+    The list is written one element at a time, so that a stream of rows is
+    never held in memory as a whole.
+
+    :param rows: An iterable of JSON-serializable dictionaries.
+    :param filename: A Path-like object pointing to where the data should be saved.
+    """
+    with open(filename, "w") as file:
+        file.write("[")
+        for i, row in enumerate(rows):
+            if i:
+                file.write(", ")
+            json.dump(row, file)
+        file.write("]")
+
+
+def write_histogram_to_json(distance_edges, velocity_edges, counts, filename):
+    """Write the edges and counts of a 2-D histogram of distances and velocities to a JSON file.
+
+    :param distance_edges: A NumPy array of the edges of the bins of distance.
+    :param velocity_edges: A NumPy array of the edges of the bins of velocity.
+    :param counts: A 2-D NumPy array of counts, indexed by the bin of distance and then of velocity.
+    :param filename: A Path-like object pointing to where the data should be saved.
+    """
+    with open(filename, "w") as file:
+        json.dump(
+            {
+                "distance_edges": distance_edges.tolist(),
+                "velocity_edges": velocity_edges.tolist(),
+                "counts": counts.tolist(),
+            },
+            file,
+        )